@@ -0,0 +1,336 @@
+import dataclasses
+import math
+from collections import namedtuple
+import numpy as np
+from records import ScanSnapshot
+
+LOCAL_BIT = 0x02  # Бит "локально администрируемый адрес" первого октета MAC
+
+# Смена лучшей физической точки доступа сети (old/new — представители групп)
+RoamEvent = namedtuple(
+    "RoamEvent", ("timestamp", "ssid", "old", "new", "old_dbm", "new_dbm")
+)
+
+
+def parse_mac(bssid):
+    """Октеты MAC-адреса (кортеж из 6 чисел) или None для некорректного адреса."""
+    parts = str(bssid).replace("-", ":").split(":")
+    if len(parts) != 6:
+        return None
+    try:
+        octets = tuple(int(part, 16) for part in parts)
+    except ValueError:
+        return None
+    return octets if all(0 <= octet <= 255 for octet in octets) else None
+
+
+def is_locally_administered(bssid):
+    """Виртуальный (локально администрируемый) адрес, а не адрес из OUI изготовителя."""
+    octets = parse_mac(bssid)
+    return octets is not None and bool(octets[0] & LOCAL_BIT)
+
+
+def related_macs(octets, max_step=16):
+    """
+    Матрицы пар адресов, похожих на радиомодули одной точки доступа
+    (octets — массив N × 6). Виртуальные BSSID одного радиомодуля и радиомодули
+    разных диапазонов одной точки доступа обычно совпадают в октетах 2–5,
+    а последний октет отличается меньше чем на max_step. Возвращает
+    (related, derived): related — первый октет совпадает или один из
+    адресов виртуальный; derived — первые октеты различаются и виртуальный
+    адрес получен из соседнего установкой бита LOCAL_BIT (и, у части
+    изготовителей, старших битов). Совпадение derived случайно почти
+    не встречается, а related даёт и последовательная нумерация адресов
+    одного изготовителя.
+    """
+    octets = np.asarray(octets, np.int16).reshape(-1, 6)
+    middle = (octets[:, None, 1:5] == octets[None, :, 1:5]).all(axis=-1)
+    last = np.abs(octets[:, None, 5] - octets[None, :, 5]) < max_step
+    local = (octets[:, 0] & LOCAL_BIT) != 0
+    same_first = octets[:, None, 0] == octets[None, :, 0]
+    derived = middle & last & ~same_first & (local[:, None] | local[None, :])
+    return middle & last & same_first | derived, derived
+
+
+def masked_correlation(values):
+    """
+    Попарная корреляция Пирсона строк values (NaN — отсчёта нет) по общим
+    отсчётам каждой пары, матричными операциями без цикла по парам.
+    Возвращает (корреляция, число общих отсчётов, средняя разность уровней);
+    корреляция NaN, если у пары нет разброса уровней.
+    """
+    known = ~np.isnan(values)
+    x = np.where(known, values, 0.0).astype(np.float64)
+    m = known.astype(np.float64)
+    n = m @ m.T  # Общие отсчёты пары
+    sx = x @ m.T  # Σx по общим отсчётам (строка i), Σy — транспонированная
+    sxx = (x * x) @ m.T
+    sxy = x @ x.T
+    sy, syy = sx.T, sxx.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sxy - sx * sy
+        var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        corr = cov / np.sqrt(var)
+        offset = (sx - sy) / n  # Средняя разность уровней пары (дБ)
+    corr[var <= 1e-9] = np.nan
+    return corr, n, offset
+
+
+class SignalMatrix:
+    """
+    Уровни всех точек доступа за последние window сканирований: кольцевой
+    буфер BSSID × сканирование (NaN — точка доступа не видна). Строки точек
+    доступа, не видимых всё окно, используются повторно.
+    """
+
+    def __init__(self, window=120):
+        self.window = window
+        self.values = np.full((0, window), np.nan, np.float32)
+        self.bssids = []  # Строка -> BSSID (None — свободная строка)
+        self.index = {}  # BSSID -> строка
+        self.scans = 0  # Учтено сканирований
+
+    def __len__(self):
+        return len(self.index)
+
+    def _row(self, bssid):
+        row = self.index.get(bssid)
+        if row is not None:
+            return row
+        if None not in self.bssids:
+            self._release()
+        if None in self.bssids:
+            row = self.bssids.index(None)
+        else:
+            row = len(self.bssids)
+            grown = np.full((max(16, 2 * row), self.window), np.nan, np.float32)
+            grown[:row] = self.values
+            self.values = grown
+            self.bssids.extend([None] * (len(grown) - row))
+        self.bssids[row] = bssid
+        self.index[bssid] = row
+        return row
+
+    def _release(self):
+        """Освобождает строки точек доступа, не видимых всё окно."""
+        empty = np.isnan(self.values).all(axis=1)
+        for row in np.flatnonzero(empty).tolist():
+            bssid = self.bssids[row]
+            if bssid is not None:
+                del self.index[bssid]
+                self.bssids[row] = None
+
+    def update(self, snapshot):
+        """Записывает уровни сканирования в очередной столбец буфера."""
+        column = self.scans % self.window
+        self.values[:, column] = np.nan
+        for observation in snapshot:
+            if observation.signal_dbm is not None:
+                row = self._row(observation.bssid)  # Может расширить буфер
+                self.values[row, column] = observation.signal_dbm
+        self.scans += 1
+
+    def rows(self):
+        """Занятые строки и их BSSID (в порядке строк)."""
+        rows = [row for row, bssid in enumerate(self.bssids) if bssid is not None]
+        return rows, [self.bssids[row] for row in rows]
+
+
+class ApGrouper:
+    """
+    Группирует BSSID в физические точки доступа. Пары объединяются, если
+    адреса похожи (related_macs) и уровни коррелируют (не ниже min_corr;
+    для виртуального адреса, полученного из соседнего, — если уровни
+    не противоречат этому, в том числе до накопления отсчётов), либо если адреса
+    не похожи (случайные виртуальные адреса), но точки доступа на одном
+    канале, а уровни почти совпадают: корреляция не ниже strong_corr
+    и средняя разность не больше max_offset дБ. Корреляция учитывается
+    при min_common общих сканированиях. Группы пересчитываются раз
+    в regroup_every сканирований и при появлении новых BSSID.
+    """
+
+    def __init__(
+        self,
+        window=120,
+        min_common=20,
+        min_corr=0.8,
+        strong_corr=0.95,
+        max_offset=6.0,
+        regroup_every=10,
+    ):
+        self.matrix = SignalMatrix(window)
+        self.min_common = min_common
+        self.min_corr = min_corr
+        self.strong_corr = strong_corr
+        self.max_offset = max_offset
+        self.regroup_every = regroup_every
+        self.channels = {}  # BSSID -> последний известный канал
+        self.group_of = {}  # BSSID -> представитель физической точки доступа
+        self._since_regroup = 0
+
+    def update(self, snapshot):
+        """Учитывает сканирование и при необходимости пересчитывает группы."""
+        self.matrix.update(snapshot)
+        new = False
+        for observation in snapshot:
+            if observation.channel is not None:
+                self.channels[observation.bssid] = observation.channel
+            new = new or observation.bssid not in self.group_of
+        self._since_regroup += 1
+        if new or self._since_regroup >= self.regroup_every:
+            self.regroup()
+
+    def regroup(self):
+        """Пересчитывает группы по всему буферу уровней."""
+        self._since_regroup = 0
+        rows, bssids = self.matrix.rows()
+        if not rows:
+            self.group_of = {}
+            return
+        octets = [parse_mac(bssid) for bssid in bssids]
+        valid = np.array([o is not None for o in octets])
+        related, derived = related_macs([o or (0,) * 6 for o in octets])
+        valid = valid & valid[:, None]
+
+        corr, common, offset = masked_correlation(self.matrix.values[rows])
+        measured = (common >= self.min_common) & ~np.isnan(corr)
+        channels = np.array([self.channels.get(b, -1) for b in bssids])
+        same_channel = (channels[:, None] == channels[None, :]) & (channels >= 0)
+        # Виртуальный адрес, полученный из соседнего, объединяется сразу,
+        # если уровни не противоречат (и не коррелируют, и расходятся —
+        # у неподвижного адаптера корреляции может не быть); прочие похожие
+        # адреса — только при подтверждённой корреляции уровней
+        apart = measured & (corr < self.min_corr) & (np.abs(offset) > self.max_offset)
+        joined = valid & derived & ~apart
+        joined |= valid & related & measured & (corr >= self.min_corr)
+        joined |= (
+            same_channel
+            & measured
+            & (corr >= self.strong_corr)
+            & (np.abs(offset) <= self.max_offset)
+        )
+
+        # Объединение пар в группы (система непересекающихся множеств)
+        parent = list(range(len(bssids)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in np.argwhere(np.triu(joined, 1)).tolist():
+            parent[find(i)] = find(j)
+
+        members = {}
+        for i, bssid in enumerate(bssids):
+            members.setdefault(find(i), []).append(bssid)
+        group_of = {}
+        for group in members.values():
+            representative = min(group, key=_representative_key)
+            for bssid in group:
+                group_of[bssid] = representative
+        self.group_of = group_of  # Заменяется целиком: читается из потока окна
+
+    def groups(self):
+        """Физические точки доступа: представитель -> список BSSID."""
+        groups = {}
+        for bssid, representative in self.group_of.items():
+            groups.setdefault(representative, []).append(bssid)
+        return groups
+
+    def collapse(self, snapshot):
+        """
+        Снимок с одной строкой на физическую точку доступа: наблюдение
+        самого сильного BSSID группы под адресом представителя группы
+        (строки таблицы не меняются при смене сильнейшего радиомодуля).
+        Сводки статистики берутся у того же BSSID.
+        """
+        group_of = self.group_of
+        strongest = {}
+        for observation in snapshot:
+            representative = group_of.get(observation.bssid, observation.bssid)
+            best = strongest.get(representative)
+            if best is None or _level(observation) > _level(best):
+                strongest[representative] = observation
+        collapsed = ScanSnapshot(
+            (
+                dataclasses.replace(observation, bssid=representative)
+                for representative, observation in strongest.items()
+            ),
+            timestamp=snapshot.timestamp,
+        )
+        if snapshot.stats is not None:
+            collapsed.stats = {
+                representative: snapshot.stats[observation.bssid]
+                for representative, observation in strongest.items()
+                if observation.bssid in snapshot.stats
+            }
+        return collapsed
+
+
+def _representative_key(bssid):
+    """Представитель группы: адрес изготовителя раньше виртуального, затем меньший."""
+    return (is_locally_administered(bssid), str(bssid).lower())
+
+
+def _level(observation):
+    dbm = observation.signal_dbm
+    return -math.inf if dbm is None else dbm
+
+
+class RoamingDetector:
+    """
+    Смены лучшей физической точки доступа каждой сети (роуминг клиента
+    в данном месте). Новая точка доступа считается лучшей, если она сильнее
+    текущей не меньше чем на hysteresis дБ в hold_scans сканированиях подряд;
+    это отсекает переключения из-за шума уровня.
+    """
+
+    def __init__(self, hysteresis=5.0, hold_scans=2):
+        self.hysteresis = hysteresis
+        self.hold_scans = hold_scans
+        self.best = {}  # SSID -> текущая лучшая физическая точка доступа
+        self._challenger = {}  # SSID -> (точка доступа, сканирований подряд)
+
+    def update(self, snapshot, group_of):
+        """Учитывает сканирование; возвращает список RoamEvent."""
+        events = []
+        for ssid in snapshot.ssids():
+            levels = {}  # Физическая точка доступа -> уровень в этой сети
+            for observation in snapshot.for_ssid(ssid):
+                ap = group_of.get(observation.bssid, observation.bssid)
+                levels[ap] = max(levels.get(ap, -math.inf), _level(observation))
+            if not levels:
+                continue
+            leader = max(levels, key=levels.get)
+            current = self.best.get(ssid)
+            # Представитель группы мог смениться после пересчёта групп
+            current = group_of.get(current, current)
+            if current is None or current not in levels and current not in group_of:
+                # Первое сканирование сети или прежняя точка доступа забыта
+                self.best[ssid] = leader
+                self._challenger.pop(ssid, None)
+                continue
+            current_level = levels.get(current, -math.inf)
+            if leader == current or levels[leader] < current_level + self.hysteresis:
+                self._challenger.pop(ssid, None)
+                continue
+            challenger, count = self._challenger.get(ssid, (leader, 0))
+            count = count + 1 if challenger == leader else 1
+            if count < self.hold_scans:
+                self._challenger[ssid] = (leader, count)
+                continue
+            events.append(
+                RoamEvent(
+                    snapshot.timestamp,
+                    ssid,
+                    current,
+                    leader,
+                    None if current_level == -math.inf else current_level,
+                    levels[leader],
+                )
+            )
+            self.best[ssid] = leader
+            self._challenger.pop(ssid, None)
+        return events
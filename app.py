@@ -1,10 +1,39 @@
+import argparse
+
 # Импортируем интерфейс Wi-Fi анализатора
 from interface import WifiAnalyzerInterface
+from scanners import default_scanner
+
+
+def parse_args(argv=None):
+    """Разбирает параметры командной строки."""
+    parser = argparse.ArgumentParser(description="Wi-Fi анализатор")
+    parser.add_argument(
+        "-i",
+        "--interface",
+        action="append",
+        dest="interfaces",
+        metavar="ИМЯ",
+        help="адаптер для сканирования; повторите ключ для нескольких адаптеров "
+        "(по умолчанию — адаптер системы)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="период сканирования в секундах (по умолчанию 1)",
+    )
+    return parser.parse_args(argv)
+
 
 # Проверяем, запущен ли скрипт непосредственно, а не импортирован как модуль
 if __name__ == "__main__":
+    args = parse_args()
+    # Сканер на каждый указанный адаптер; результаты объединяются в один снимок
+    scanners = [default_scanner(name) for name in args.interfaces or ()]
+
     # Создаем экземпляр класса интерфейса Wi-Fi анализатора
-    app = WifiAnalyzerInterface()
+    app = WifiAnalyzerInterface(scan_interval=args.interval, scanners=scanners)
 
     # Запускаем основной цикл приложения (например, графический интерфейс)
     app.mainloop()
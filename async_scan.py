@@ -0,0 +1,164 @@
+import asyncio
+import time
+from records import merge_snapshots
+from scanners import ScanError
+from tracing import span
+
+
+class _BackendState:
+    """Состояние одного адаптера в планировщике."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.failures = 0  # Число неудачных сканирований подряд
+        self.resume_at = 0.0  # Время (loop.time()), раньше которого не сканируем
+        self.task = None  # Выполняющееся сканирование
+        self.latest = None  # Последний ещё не отданный снимок
+
+
+class AsyncScanScheduler:
+    """
+    Планировщик сканирований на asyncio. Запускает сканирование на всех
+    адаптерах одновременно с постоянным периодом, не зависящим от времени
+    обработки, прерывает зависшие команды по тайм-ауту и временно отключает
+    адаптер с экспоненциально растущей паузой после ошибок. Результаты
+    адаптеров объединяются в один поток снимков.
+    """
+
+    def __init__(self, backends, period=1.0, timeout=10.0, max_backoff=60.0):
+        self.backends = list(backends)
+        self.period = period  # Период сканирования (с)
+        self.timeout = timeout  # Максимальная длительность одной команды (с)
+        self.max_backoff = max_backoff  # Максимальная пауза после ошибок (с)
+        self._loop = None
+        self._stop_event = None
+        self._stop_requested = False  # stop() мог быть вызван до запуска цикла
+
+    async def scan_backend(self, backend):
+        """Одно сканирование адаптера через asyncio.create_subprocess_exec."""
+        command = backend.command()
+        if command is None:
+            # Источник без внешней команды (например, воспроизведение записей)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, backend.scan)
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as e:
+            raise ScanError(f"Не удалось запустить {command[0]}: {e}") from e
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(), self.timeout
+            )
+        except asyncio.TimeoutError:
+            raise ScanError(
+                f"{backend.name}: команда не завершилась за {self.timeout} с"
+            ) from None
+        finally:
+            if process.returncode is None:
+                try:
+                    process.kill()  # Завершаем зависшую или отменённую команду
+                except ProcessLookupError:
+                    pass  # Процесс успел завершиться сам
+                await process.wait()
+
+        if process.returncode != 0:
+            stderr = stderr.decode(backend.encoding, errors="replace")
+            raise ScanError(f"Команда завершилась с ошибкой: {stderr}")
+        return backend.parse(backend.decode(stdout))
+
+    async def _scan(self, state):
+        loop = asyncio.get_running_loop()
+        try:
+            # Полное время сканирования адаптера: команда и разбор вывода
+            with span(f"scan {state.backend.name}"):
+                state.latest = await self.scan_backend(state.backend)
+            state.failures = 0
+        except Exception as e:
+            # Любая ошибка адаптера (команда, разбор вывода, пул потоков):
+            # экспоненциальная пауза перед следующей попыткой
+            state.failures += 1
+            backoff = min(self.max_backoff, self.period * 2**state.failures)
+            state.resume_at = loop.time() + backoff
+            if not isinstance(e, ScanError):
+                e = f"{type(e).__name__}: {e}"  # Непредвиденная ошибка
+            print(f"Ошибка сканирования ({state.backend.name}): {e}")
+        finally:
+            state.task = None
+
+    async def run(self, callback):
+        """
+        Сканирует до вызова stop(). Для каждого такта, в котором завершилось
+        хотя бы одно сканирование, вызывает callback(объединённый снимок).
+        Снимок отдаётся, как только завершились сканирования, запущенные
+        в этом такте: адаптер, команда которого выполняется дольше такта,
+        не задерживает остальные, а его результат войдёт в снимок такта,
+        в котором он завершится.
+        """
+        self._loop = loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        states = [_BackendState(backend) for backend in self.backends]
+        next_tick = loop.time()
+
+        try:
+            while not self._stop_requested:
+                # Запускаем сканирование на свободных адаптерах
+                now = loop.time()
+                started = []  # Сканирования этого такта
+                for state in states:
+                    if state.task is None and now >= state.resume_at:
+                        state.task = loop.create_task(self._scan(state))
+                        started.append(state.task)
+
+                # Следующий такт; пропущенные такты не догоняем
+                next_tick += self.period
+                if next_tick <= now:
+                    next_tick = now + self.period - (now - next_tick) % self.period
+
+                # Ждём завершения сканирований этого такта, но не дольше конца
+                # такта; незавершённые с прошлых тактов не ждём
+                if started:
+                    await asyncio.wait(
+                        started, timeout=max(0.0, next_tick - loop.time())
+                    )
+
+                fresh = [state.latest for state in states if state.latest is not None]
+                if fresh:
+                    for state in states:
+                        state.latest = None
+                    callback(merge_snapshots(fresh, timestamp=time.time()))
+
+                # Остаток такта
+                try:
+                    await asyncio.wait_for(
+                        self._stop_event.wait(), max(0.0, next_tick - loop.time())
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Отменяем незавершённые сканирования при остановке
+            pending = [state.task for state in states if state.task is not None]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def run_forever(self, callback):
+        """Запускает цикл сканирования в текущем потоке (блокирующий вызов)."""
+        asyncio.run(self.run(callback))
+
+    def stop(self):
+        """Останавливает планировщик; можно вызывать из любого потока."""
+        self._stop_requested = True
+        loop = self._loop
+        if loop is None or self._stop_event is None or loop.is_closed():
+            return  # Цикл ещё не запущен или уже завершён
+        try:
+            loop.call_soon_threadsafe(self._stop_event.set)  # Прерываем ожидание
+        except RuntimeError:
+            pass  # Цикл закрылся после проверки
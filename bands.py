@@ -0,0 +1,102 @@
+BAND_24 = "2.4 GHz"  # Диапазон 2.4 ГГц (каналы 1-14)
+BAND_5 = "5 GHz"  # Диапазон 5 ГГц (каналы 32-177)
+BAND_6 = "6 GHz"  # Диапазон 6 ГГц (каналы 1-233)
+BANDS = (BAND_24, BAND_5, BAND_6)
+
+# Каналы 5 ГГц, требующие DFS (UNII-2A: 52-64, UNII-2C: 100-144)
+DFS_CHANNELS = frozenset(list(range(52, 65, 4)) + list(range(100, 145, 4)))
+
+
+def parse_band_label(text):
+    """Диапазон из строки netsh ("2,4 ГГц", "5 GHz", ...); None, если не распознан."""
+    if not text:
+        return None
+    head = text.strip().replace(",", ".").split()[0]
+    return {"2.4": BAND_24, "5": BAND_5, "6": BAND_6}.get(head)
+
+
+def channel_band(channel, hint=None):
+    """
+    Определяет диапазон по номеру канала. Номера каналов 6 ГГц пересекаются
+    с 2.4 и 5 ГГц, поэтому явно указанный диапазон (hint) имеет приоритет.
+    """
+    if channel is None:
+        return None
+    if hint in BANDS:
+        return hint
+    if 1 <= channel <= 14:
+        return BAND_24
+    if 32 <= channel <= 177:
+        return BAND_5
+    if 181 <= channel <= 233:
+        return BAND_6
+    return None
+
+
+def is_dfs(channel, band):
+    """Требует ли канал динамического выбора частоты (DFS)."""
+    return band == BAND_5 and channel in DFS_CHANNELS
+
+
+def channel_frequency(channel, band):
+    """Центральная частота канала в МГц."""
+    if band == BAND_24:
+        return 2484 if channel == 14 else 2407 + 5 * channel
+    if band == BAND_5:
+        return 5000 + 5 * channel
+    if band == BAND_6:
+        return 5950 + 5 * channel
+    return None
+
+
+def frequency_channel(frequency):
+    """Номер канала и диапазон по центральной частоте в МГц."""
+    frequency = int(round(frequency))
+    if frequency == 2484:
+        return 14, BAND_24
+    if 2412 <= frequency < 2484:
+        return (frequency - 2407) // 5, BAND_24
+    if 5160 <= frequency <= 5885:
+        return (frequency - 5000) // 5, BAND_5
+    if 5955 <= frequency <= 7115:
+        return (frequency - 5950) // 5, BAND_6
+    return None, None
+
+
+class BandIndex:
+    """
+    Индекс точек доступа снимка: диапазон -> канал -> список BSSID.
+    Строится один раз на сканирование и используется классификатором,
+    фильтрами интерфейса и графиком по каналам.
+    """
+
+    def __init__(self, observations):
+        self.bands = {band: {} for band in BANDS}  # Диапазон -> канал -> BSSID
+        self.band_of = {}  # BSSID -> диапазон
+        self.dfs = set()  # BSSID точек доступа на DFS-каналах
+        self.invalid = []  # Наблюдения без корректного канала
+
+        for observation in observations:
+            band = channel_band(observation.channel, observation.band)
+            if band is None:
+                self.invalid.append(observation)
+                continue
+            self.bands[band].setdefault(observation.channel, []).append(
+                observation.bssid
+            )
+            self.band_of[observation.bssid] = band
+            if is_dfs(observation.channel, band):
+                self.dfs.add(observation.bssid)
+
+    def channels(self, band=None):
+        """Отсортированные номера занятых каналов диапазона (или всех диапазонов)."""
+        if band is not None:
+            return sorted(self.bands[band])
+        return sorted({ch for channels in self.bands.values() for ch in channels})
+
+    def bssids(self, band, channel=None):
+        """BSSID точек доступа диапазона (или одного канала диапазона)."""
+        channels = self.bands[band]
+        if channel is not None:
+            return channels.get(channel, [])
+        return [bssid for group in channels.values() for bssid in group]
@@ -0,0 +1,441 @@
+"""
+Нагрузочные замеры конвейера обработки сканирований.
+
+    python benchmarks/bench_pipeline.py                       # все замеры
+    python benchmarks/bench_pipeline.py --sizes 10 1000 --locales ru
+    python benchmarks/bench_pipeline.py --only parse classify
+    python benchmarks/bench_pipeline.py --compare  # с pipeline_baseline.json
+    python benchmarks/bench_pipeline.py --save benchmarks/pipeline_baseline.json
+    python benchmarks/bench_pipeline.py --only e2e --trace e2e.json
+
+Входные данные — синтетические дампы netsh (generate_netsh_dump) с 10..5000
+точками доступа на русской и английской локали. Замеряются:
+
+    parse      parse_windows_scan_results (байты cp866, как от netsh)
+    classify   classify_networks
+    table      populate_table окна (Treeview или таблица в памяти без дисплея)
+    channels   обновление графика уровней по каналам (Agg, без окна)
+    temporal   обновление графика динамики сигнала (Agg, без окна)
+    e2e        полный цикл scan_and_update: ReplayScanner, планировщик,
+               статистика, события изменений, графики и таблица
+
+Для каждого замера выводятся p50/p99 задержки, пропускная способность
+(точек доступа в секунду) и пиковое потребление памяти (tracemalloc,
+отдельный прогон). Базовая линия хранит только сравниваемые метрики:
+p50 и память (p99 слишком шумит) и время калибровочного цикла на чистом
+Python. При сравнении p50 пересчитывается на скорость текущей машины
+(отношение калибровочных времён); при ухудшении p50 или памяти больше
+допустимого (--tolerance, но не меньше абсолютного порога) скрипт
+завершается с кодом 1.
+С --trace замеры выполняются с включённой трассировкой участков (tracing),
+трасса сохраняется в формате Chrome Trace, сводка печатается в конце.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # Модули проекта лежат в корне репозитория
+
+from scanners import ReplayScanner, generate_netsh_dump  # noqa: E402
+from scan import parse_windows_scan_results, parse_scan_snapshot  # noqa: E402
+from tracing import TRACER, format_summary  # noqa: E402
+
+SIZES = (10, 100, 1000, 5000)  # Число точек доступа в дампе
+LOCALES = ("ru", "en")
+BENCHMARKS = ("parse", "classify", "table", "channels", "temporal", "e2e")
+# Базовая линия, сохранённая в репозитории (--compare без пути)
+BASELINE = os.path.join(ROOT, "benchmarks", "pipeline_baseline.json")
+# Метрики, по которым ищутся регрессии, и абсолютные пороги их шума
+COMPARED = {"p50_ms": 0.1, "peak_mb": 1.0}
+CALIBRATION = "calibration_ms"  # Ключ времени калибровки в базовой линии
+
+
+def percentile(values, q):
+    """Перцентиль q (0..100) по ближайшему рангу."""
+    ordered = sorted(values)
+    rank = max(1, -(-q * len(ordered) // 100))  # Округление вверх
+    return ordered[min(len(ordered), int(rank)) - 1]
+
+
+def _dump_bytes(lines):
+    """Строки дампа в виде байтов cp866, как их возвращает netsh."""
+    return [line.encode("cp866") for line in lines]
+
+
+def _dumps(n_bssids, locale, count):
+    """count сканирований одной обстановки (меняются уровни сигнала)."""
+    return [
+        generate_netsh_dump(n_bssids, locale=locale, seed=0, scan=i)
+        for i in range(count)
+    ]
+
+
+class _MemoryTree:
+    """
+    Минимальная замена Treeview без дисплея: хранит строки и их порядок,
+    чтобы populate_table выполнял ту же работу модели таблицы.
+    """
+
+    def __init__(self):
+        self.rows = {}  # iid -> значения
+        self.order = []  # Порядок строк
+
+    def insert(self, parent, index, iid, values):
+        self.rows[iid] = values
+        self.order.append(iid)
+
+    def item(self, iid, values):
+        self.rows[iid] = values
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.rows[iid]
+        removed = set(iids)
+        self.order = [iid for iid in self.order if iid not in removed]
+
+    def move(self, iid, parent, index):
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+
+def _tk_tree():
+    """Treeview в скрытом окне (или None без дисплея)."""
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        from table_model import COLUMNS
+
+        root = tk.Tk()
+    except Exception:
+        return None
+    root.withdraw()
+    return ttk.Treeview(root, columns=COLUMNS, show="headings")
+
+
+def _window_class():
+    """
+    Лёгкая замена окна: методы WifiAnalyzerInterface, отвечающие за
+    таблицу, события и публикацию снимков, без создания окна Tk.
+    """
+    from interface import WifiAnalyzerInterface
+
+    class HeadlessWindow:
+        populate_table = WifiAnalyzerInterface.populate_table
+        filtered_data = WifiAnalyzerInterface.filtered_data
+        apply_table_order = WifiAnalyzerInterface.apply_table_order
+        apply_snapshot = WifiAnalyzerInterface.apply_snapshot
+        report_events = WifiAnalyzerInterface.report_events
+        publish_snapshot = WifiAnalyzerInterface.publish_snapshot
+        analyze = WifiAnalyzerInterface.analyze
+        report_roaming = WifiAnalyzerInterface.report_roaming
+        update_ui = WifiAnalyzerInterface.update_ui
+
+        def __init__(self, tree, full_refresh=10):
+            # Состояние окна задаётся тем же кодом, что и в настоящем окне;
+            # история не пишется, сканеры задаёт сам замер
+            WifiAnalyzerInterface.init_state(
+                self,
+                history_path=None,
+                scanners=[ReplayScanner([])],
+                rssi_profiles=None,
+                full_refresh=full_refresh,
+            )
+            self.tree = tree
+
+        def create_graphs(self):
+            from graphs import draw_signal_level_graph, draw_temporal_signal_graph
+
+            self.update_signal_level = draw_signal_level_graph(None)[1]
+            self.update_temporal = draw_temporal_signal_graph(None)[1]
+
+        def poll(self):
+            """Отображение последнего снимка (в окне его выполняет UiDispatcher)."""
+            snapshot = self.results.latest()
+            if snapshot is not None:
+                self.apply_snapshot(snapshot)
+
+    return HeadlessWindow
+
+
+def _snapshots(dumps):
+    """Снимки дампов со статистикой, с возрастающим временем сканирования."""
+    from stats import SignalStats
+
+    stats = SignalStats()
+    start = time.time() - len(dumps)
+    snapshots = []
+    for i, lines in enumerate(dumps):
+        snapshot = parse_scan_snapshot(lines, timestamp=start + i)
+        snapshot.stats = stats.update(snapshot)
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def _cycle(items):
+    """Бесконечный перебор элементов по кругу."""
+    while True:
+        yield from items
+
+
+def make_case(name, n_bssids, locale, variants, tree_factory):
+    """
+    Подготовка замера: возвращает функцию одной итерации.
+    Подготовка (генерация дампов, создание графиков) в замер не входит.
+    """
+    dumps = _dumps(n_bssids, locale, variants)
+    if name == "parse":
+        inputs = _cycle([_dump_bytes(lines) for lines in dumps])
+        return lambda: parse_windows_scan_results(next(inputs))
+
+    if name == "classify":
+        from classifier import classify_networks
+
+        inputs = _cycle([parse_windows_scan_results(lines) for lines in dumps])
+        return lambda: classify_networks(next(inputs))
+
+    if name == "table":
+        window = _window_class()(tree_factory())
+        inputs = _cycle(_snapshots(dumps))
+        return lambda: window.populate_table(next(inputs))
+
+    if name in ("channels", "temporal"):
+        from graphs import draw_signal_level_graph, draw_temporal_signal_graph
+
+        draw = draw_signal_level_graph if name == "channels" else (
+            draw_temporal_signal_graph
+        )
+        _, update, _ = draw(None)  # Холст Agg без окна
+        inputs = _cycle(_snapshots(dumps))
+
+        def update_graph():
+            snapshot = next(inputs)
+            snapshot.timestamp = time.time()  # Каждый снимок даёт новый отсчёт
+            update(snapshot)
+
+        update_graph()  # Первая полная отрисовка не входит в замер
+        return update_graph
+
+    if name == "e2e":
+        return _EndToEnd(dumps, tree_factory)
+
+    raise ValueError(f"Неизвестный замер: {name}")
+
+
+class _EndToEnd:
+    """
+    Итерации scan_and_update: планировщик AsyncScanScheduler опрашивает
+    ReplayScanner, каждый снимок публикуется и сразу отображается.
+    Вызов выполняет iterations сканирований и возвращает их длительности.
+    """
+
+    batch = True  # Длительности измеряются внутри цикла планировщика
+
+    def __init__(self, dumps, tree_factory):
+        self.dumps = dumps
+        self.window = _window_class()(tree_factory())
+        self.window.create_graphs()
+
+    def __call__(self, iterations=1):
+        from async_scan import AsyncScanScheduler
+
+        window = self.window
+        scanner = ReplayScanner(self.dumps)
+        scheduler = AsyncScanScheduler([scanner], period=1e-3)
+        durations = []
+        last = [time.perf_counter()]
+
+        def on_snapshot(snapshot):
+            window.publish_snapshot(snapshot)
+            window.poll()
+            now = time.perf_counter()
+            durations.append(now - last[0])  # Сканирование, разбор и отображение
+            last[0] = now
+            if len(durations) >= iterations:
+                scheduler.stop()
+
+        scheduler.run_forever(on_snapshot)  # Цикл scan_and_update в текущем потоке
+        return durations
+
+
+def _timings(func, iterations):
+    """Длительности iterations вызовов (с)."""
+    if getattr(func, "batch", False):
+        return func(iterations)
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _peak_memory(func, iterations):
+    """Пиковый прирост памяти (МБ) за iterations вызовов под tracemalloc."""
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        if getattr(func, "batch", False):
+            func(iterations)
+        else:
+            for _ in range(iterations):
+                func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - base) / 2**20
+
+
+def calibrate(repeat=7, size=200000):
+    """
+    Медианное время (мс) фиксированного цикла на чистом Python: мера
+    скорости машины, не зависящая от кода проекта.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sum(i * i for i in range(size))
+        durations.append(time.perf_counter() - start)
+    return percentile(durations, 50) * 1000
+
+
+def run_case(name, n_bssids, locale, iterations, warmup, memory_iterations, tree_factory):
+    """Результат одного замера: задержки, пропускная способность и память."""
+    func = make_case(name, n_bssids, locale, min(iterations, 10), tree_factory)
+    _timings(func, warmup)  # Прогрев кэшей и ленивых импортов
+    gc.collect()  # Мусор подготовки и прошлых замеров не собирается во время замера
+    durations = _timings(func, iterations)
+    total = sum(durations)
+    return {
+        "p50_ms": percentile(durations, 50) * 1000,
+        "p99_ms": percentile(durations, 99) * 1000,
+        "bssid_per_s": n_bssids * len(durations) / total if total else 0.0,
+        "peak_mb": _peak_memory(func, memory_iterations),
+    }
+
+
+def _iterations(n_bssids, budget):
+    """Число итераций: больше для маленьких дампов, не меньше 5."""
+    return max(5, min(200, budget // max(1, n_bssids)))
+
+
+def run(names, sizes, locales, budget=20000, warmup=2, memory_iterations=3):
+    tree = _tk_tree()
+    if tree is None:
+        tree_factory = _MemoryTree  # Нет дисплея: таблица в памяти
+    else:
+        tree.winfo_toplevel().destroy()
+        tree_factory = _tk_tree  # Свежая таблица для каждого замера
+    results = {}
+    for name in names:
+        for locale in locales:
+            for n_bssids in sizes:
+                key = f"{name}[{n_bssids},{locale}]"
+                results[key] = result = run_case(
+                    name,
+                    n_bssids,
+                    locale,
+                    _iterations(n_bssids, budget),
+                    warmup,
+                    memory_iterations,
+                    tree_factory,
+                )
+                print(
+                    f"{key:<24} p50 {result['p50_ms']:9.2f} мс"
+                    f"  p99 {result['p99_ms']:9.2f} мс"
+                    f"  {result['bssid_per_s']:12,.0f} BSSID/с"
+                    f"  память {result['peak_mb']:7.2f} МБ",
+                    flush=True,
+                )
+    return results
+
+
+def baseline_entry(results, calibration_ms):
+    """Базовая линия: сравниваемые метрики замеров и время калибровки."""
+    baseline = {CALIBRATION: calibration_ms}
+    for key, result in results.items():
+        baseline[key] = {metric: result[metric] for metric in COMPARED}
+    return baseline
+
+
+def compare(results, baseline, tolerance, calibration_ms=None):
+    """
+    Замеры, ухудшившиеся относительно базовой линии больше чем на tolerance.
+    Времена базовой линии пересчитываются на скорость текущей машины
+    по отношению калибровочных времён (если оба известны); малые значения
+    шумят, поэтому ухудшение должно быть и больше абсолютного порога.
+    """
+    speed = 1.0
+    reference_ms = baseline.get(CALIBRATION)
+    if reference_ms and calibration_ms:
+        speed = calibration_ms / reference_ms
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        for metric, floor in COMPARED.items():
+            before, after = reference.get(metric), result[metric]
+            if before and metric.endswith("_ms"):
+                before *= speed
+            if before and after > max(before * (1 + tolerance), before + floor):
+                regressions.append(f"{key} {metric}: {after:.2f} (было {before:.2f})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры конвейера сканирования")
+    parser.add_argument(
+        "--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS, help="замеры"
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--locales", nargs="+", choices=LOCALES, default=LOCALES)
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=20000,
+        help="точек доступа на замер (определяет число итераций)",
+    )
+    parser.add_argument("--save", help="сохранить результаты как базовую линию")
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        const=BASELINE,
+        help="сравнить с сохранённой базовой линией (по умолчанию с BASELINE)",
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="допустимое ухудшение (доля)"
+    )
+    parser.add_argument("--trace", help="сохранить трассу участков (Chrome Trace)")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        TRACER.enable()
+    calibration_ms = calibrate()
+    results = run(args.only, args.sizes, args.locales, budget=args.budget)
+    if args.trace:
+        TRACER.disable()
+        TRACER.export_chrome_trace(args.trace)
+        print(format_summary(TRACER.summary()))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(baseline_entry(results, calibration_ms), file, indent=2)
+
+    failures = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        failures = compare(results, baseline, args.tolerance, calibration_ms)
+    for failure in failures:
+        print(f"РЕГРЕССИЯ: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
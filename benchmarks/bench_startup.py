@@ -0,0 +1,140 @@
+"""
+Замер времени холодного запуска.
+
+    python benchmarks/bench_startup.py                      # замер
+    python benchmarks/bench_startup.py --save startup.json  # сохранить базовую линию
+    python benchmarks/bench_startup.py --compare startup.json
+
+Каждый замер выполняется в отдельном процессе интерпретатора. Проверяется
+также, что модули окна и консольного режима не импортируют тяжёлые
+зависимости (Matplotlib, NumPy) до появления данных.
+При регрессии больше допустимой (--tolerance) скрипт завершается с кодом 1.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модуль -> тяжёлые модули, которые он не должен импортировать при загрузке
+IMPORTS = {
+    "app": ("matplotlib", "numpy"),
+    "interface": ("matplotlib", "numpy"),
+    "cli": ("tkinter", "matplotlib", "numpy"),
+    "graphs": (),
+}
+
+# Код дочернего процесса: время от старта окна до его отображения
+_WINDOW_PROBE = """
+import time
+start = time.perf_counter()
+from interface import WifiAnalyzerInterface
+app = WifiAnalyzerInterface(history_path=None)
+while not app.winfo_viewable():
+    app.update()
+print(time.perf_counter() - start)
+app.destroy()
+"""
+
+
+def _python(code):
+    """Выполняет код в новом процессе интерпретатора из корня проекта."""
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+
+
+def measure_import(module, repeat):
+    """Лучшее из repeat время импорта модуля (с) и список загруженных тяжёлых модулей."""
+    forbidden = IMPORTS[module]
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(elapsed, *[m for m in {forbidden!r} if m in sys.modules])\n"
+    )
+    times, loaded = [], []
+    for _ in range(repeat):
+        result = _python(code)
+        if result.returncode != 0:
+            raise RuntimeError(f"Ошибка импорта {module}: {result.stderr}")
+        elapsed, *loaded = result.stdout.split()
+        times.append(float(elapsed))
+    return min(times), loaded
+
+
+def measure_window(repeat):
+    """Лучшее из repeat время до отображения окна (с) или None без дисплея."""
+    times = []
+    for _ in range(repeat):
+        result = _python(_WINDOW_PROBE)
+        if result.returncode != 0:
+            return None  # Нет дисплея или Tk недоступен
+        times.append(float(result.stdout.split()[-1]))
+    return min(times)
+
+
+def run(repeat):
+    results = {}
+    violations = []
+    for module in IMPORTS:
+        try:
+            elapsed, loaded = measure_import(module, repeat)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)  # Например, не установлен Matplotlib
+            continue
+        results[f"import {module}"] = elapsed
+        if loaded:
+            violations.append(f"{module}: импортирует {', '.join(loaded)}")
+    window = measure_window(repeat)
+    if window is not None:
+        results["window shown"] = window
+    return results, violations
+
+
+def compare(results, baseline, tolerance):
+    """Замеры, ухудшившиеся относительно базовой линии больше чем на tolerance."""
+    regressions = []
+    for name, value in results.items():
+        reference = baseline.get(name)
+        if reference and value > reference * (1 + tolerance):
+            regressions.append(f"{name}: {value * 1000:.1f} мс (было {reference * 1000:.1f} мс)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер времени холодного запуска")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="число повторов")
+    parser.add_argument("--save", help="сохранить результаты как базовую линию")
+    parser.add_argument("--compare", help="сравнить с сохранённой базовой линией")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="допустимое ухудшение (доля)"
+    )
+    args = parser.parse_args(argv)
+
+    results, violations = run(args.repeat)
+    for name, value in results.items():
+        print(f"{name:<20} {value * 1000:8.1f} мс")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    failures = list(violations)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            failures += compare(results, json.load(file), args.tolerance)
+    for failure in failures:
+        print(f"РЕГРЕССИЯ: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+from collections import namedtuple
+
+# Виды событий
+APPEARED = "appeared"  # Точка доступа появилась
+DISAPPEARED = "disappeared"  # Точка доступа пропала
+CHANNEL_CHANGED = "channel"  # Сменился канал
+SIGNAL_CHANGED = "signal"  # Уровень изменился больше порога гистерезиса
+SECURITY_CHANGED = "security"  # Сменились проверка подлинности или шифрование
+SECURITY_DOWNGRADED = "downgrade"  # Защита стала слабее (повод для предупреждения)
+
+# Событие изменения: old/new — прежнее и новое значение изменившегося параметра
+ChangeEvent = namedtuple("ChangeEvent", ("kind", "bssid", "ssid", "old", "new"))
+
+# Стойкость проверки подлинности и шифрования (больше — надёжнее)
+_AUTH_LEVELS = (("wpa3", 4), ("owe", 4), ("wpa2", 3), ("wpa", 2), ("wep", 1))
+_CIPHER_LEVELS = (("gcmp", 3), ("ccmp", 2), ("tkip", 1), ("wep", 0))
+
+
+def _level(text, levels):
+    """Уровень стойкости по подстроке; 0 — открытая сеть, None — неизвестно."""
+    if text is None:
+        return None
+    text = text.casefold()
+    for marker, level in levels:
+        if marker in text:
+            return level
+    return 0  # "Открытая", "Нет", "Open", "None"
+
+
+def security_rank(authentication, encryption):
+    """Сравнимая оценка защиты сети: (проверка подлинности, шифрование)."""
+    return (_level(authentication, _AUTH_LEVELS), _level(encryption, _CIPHER_LEVELS))
+
+
+def is_downgrade(old, new):
+    """Стала ли защита слабее (неизвестные значения не сравниваются)."""
+    for before, after in zip(old, new):
+        if before is None or after is None or before == after:
+            continue
+        return after < before
+    return False
+
+
+class _State:
+    """Последнее сообщённое состояние точки доступа."""
+
+    __slots__ = ("ssid", "channel", "signal_dbm", "security", "missed")
+
+    def __init__(self, observation):
+        self.ssid = observation.ssid
+        self.channel = observation.channel
+        self.signal_dbm = observation.signal_dbm  # Уровень на момент последнего события
+        self.security = (observation.authentication, observation.encryption)
+        self.missed = 0  # Сканирований подряд без этой точки доступа
+
+
+class SnapshotDiffer:
+    """
+    Сравнивает очередной снимок с последним сообщённым состоянием и выдаёт
+    компактный список событий. Уровень сигнала сообщается только при
+    изменении больше hysteresis дБ относительно последнего сообщённого
+    значения, пропажа — после missing_scans сканирований подряд без точки
+    доступа. Снимок без изменений даёт пустой список.
+    """
+
+    def __init__(self, hysteresis=3.0, missing_scans=2):
+        self.hysteresis = hysteresis  # Порог изменения уровня (дБ)
+        self.missing_scans = missing_scans  # Пропусков до события "пропала"
+        self._states = {}  # BSSID -> _State
+
+    def __len__(self):
+        return len(self._states)
+
+    def __contains__(self, bssid):
+        return bssid in self._states
+
+    def diff(self, snapshot):
+        """События изменений относительно предыдущих снимков."""
+        events = []
+        states = self._states
+        for observation in snapshot:
+            bssid = observation.bssid
+            state = states.get(bssid)
+            if state is None:
+                states[bssid] = _State(observation)
+                events.append(
+                    ChangeEvent(APPEARED, bssid, observation.ssid, None, observation)
+                )
+                continue
+            state.missed = 0
+
+            if observation.channel != state.channel:
+                events.append(
+                    ChangeEvent(
+                        CHANNEL_CHANGED,
+                        bssid,
+                        observation.ssid,
+                        state.channel,
+                        observation.channel,
+                    )
+                )
+                state.channel = observation.channel
+
+            dbm = observation.signal_dbm
+            if dbm != state.signal_dbm and (
+                dbm is None
+                or state.signal_dbm is None
+                or abs(dbm - state.signal_dbm) >= self.hysteresis
+            ):
+                events.append(
+                    ChangeEvent(
+                        SIGNAL_CHANGED, bssid, observation.ssid, state.signal_dbm, dbm
+                    )
+                )
+                state.signal_dbm = dbm
+
+            security = (observation.authentication, observation.encryption)
+            if security != state.security:
+                downgrade = is_downgrade(
+                    security_rank(*state.security), security_rank(*security)
+                )
+                events.append(
+                    ChangeEvent(
+                        SECURITY_DOWNGRADED if downgrade else SECURITY_CHANGED,
+                        bssid,
+                        observation.ssid,
+                        state.security,
+                        security,
+                    )
+                )
+                state.security = security
+
+        # Точки доступа, отсутствующие в снимке. Все BSSID снимка уже есть
+        # в состояниях, поэтому при равных размерах пропавших нет
+        if len(states) != len(snapshot):
+            for bssid in [bssid for bssid in states if bssid not in snapshot]:
+                state = states[bssid]
+                state.missed += 1
+                if state.missed >= self.missing_scans:
+                    del states[bssid]
+                    events.append(
+                        ChangeEvent(DISAPPEARED, bssid, state.ssid, None, None)
+                    )
+        return events
+
+
+def changed_bssids(events):
+    """Множество BSSID, затронутых событиями."""
+    return {event.bssid for event in events}
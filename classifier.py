@@ -1,33 +1,26 @@
 import json
+from records import as_snapshot
+from bands import BANDS
 
 
 def classify_networks(networks):
-    """Разделяет список сетей на две группы: работающие на частоте 2.4 ГГц и 5 ГГц."""
-    classified_networks = {"2.4 GHz": [], "5 GHz": []}
-
-    # Проходим по каждому элементу входящего словаря сетей
-    for _, network_list in networks.items():
-        for network in network_list:
-            # Извлекаем значение канала (frequency band), используемое для классификации
-            channel = network.get("канал")
-
-            # Если канал указан численно, определяем диапазон частоты
-            if channel is not None and channel.isdigit():
-                ch_num = int(channel)
-
-                # Определяем принадлежность сети к диапазону 2.4 ГГц или 5 ГГц
-                if 1 <= ch_num <= 13:
-                    classified_networks["2.4 GHz"].append(network)
-                elif 36 <= ch_num <= 173:
-                    classified_networks["5 GHz"].append(network)
-                else:
-                    pass  # Можно оставить пустым, либо обработать другие случаи
+    """
+    Разделяет точки доступа на группы по диапазонам частот: 2.4 ГГц, 5 ГГц и 6 ГГц.
+    Принимает снимок ScanSnapshot или словарь сетей; используется индекс
+    диапазонов и каналов, построенный один раз для снимка.
+    """
+    snapshot = as_snapshot(networks)
+    index = snapshot.band_index
+    classified_networks = {
+        band: [snapshot.get(bssid) for bssid in index.bssids(band)] for band in BANDS
+    }
 
-            else:
-                # Обработка случаев, когда канал отсутствует или имеет неверный формат
-                print(
-                    f"Внимание: некорректный канал '{channel}' для сети {network['ssid']}!"
-                )
+    # Обработка случаев, когда канал отсутствует или имеет неверный формат
+    for observation in index.invalid:
+        print(
+            f"Внимание: некорректный канал для сети {observation.ssid} "
+            f"({observation.bssid})!"
+        )
 
     return classified_networks
 
@@ -36,34 +29,32 @@ def print_classified_results(classified_networks):
     """
     Функция выводит сети, разделённые по частотам, в удобной форме для чтения человеком.
     """
-    # Перебираем каждый диапазон частот (2.4 GHz и 5 GHz)
+    # Перебираем каждый диапазон частот (2.4 GHz, 5 GHz и 6 GHz)
     for freq_band, networks in classified_networks.items():
         print(f"\n--- {freq_band.upper()} ---")  # Заголовок блока
 
-        # Если сети найдены, выводим информацию о каждой
+        # Если сети найдены, выводим информацию о каждой точке доступа
         if len(networks) > 0:
             for idx, network in enumerate(networks, start=1):
                 print(f"Сеть №{idx}:")
-                print(f" SSID: {network['ssid']}")  # Название сети
-                print(
-                    f" BSSIDs: {', '.join(network.get('bssid', ['N/A']))}"
-                )  # MAC-адреса точек доступа
+                print(f" SSID: {network.ssid}")  # Название сети
+                print(f" BSSID: {network.bssid}")  # MAC-адрес точки доступа
                 print(
-                    f" Уровень сигнала: {network.get('signal_strength', '')}%"
+                    f" Уровень сигнала: {network.signal_strength}%"
                 )  # Мощность сигнала
                 print(
-                    f" Тип сети: {network.get('тип_сети', '')}"
+                    f" Тип сети: {network.network_type or ''}"
                 )  # Технология связи (Wi-Fi стандарт)
                 print(
-                    f" Проверка подлинности: {network.get('проверка_подлинности', '')}"
+                    f" Проверка подлинности: {network.authentication or ''}"
                 )  # Метод аутентификации
                 print(
-                    f" Шифрование: {network.get('шифрование', '')}"
+                    f" Шифрование: {network.encryption or ''}"
                 )  # Используемый алгоритм шифрования
                 print(
-                    f" Тип радио: {network.get('тип_радио', '')}"
+                    f" Тип радио: {network.radio_type or ''}"
                 )  # Тип радиопередачи
-                print(f" Канал: {network.get('канал', '')}\n")  # Номер канала передачи
+                print(f" Канал: {network.channel}\n")  # Номер канала передачи
         else:
             print("Нет доступных сетей.")  # Сообщение, если сеть не найдена
 
@@ -0,0 +1,336 @@
+"""
+Пакетная обработка записанных сканирований без графического интерфейса.
+
+    python -m cli parse dumps/ -o networks.csv
+    python -m cli classify dumps/*.txt -o bands.jsonl --workers 8
+    python -m cli export scan_history.scanlog -o survey.parquet --start 1700000000
+
+Модуль не импортирует tkinter и matplotlib и может работать на сервере без дисплея.
+"""
+
+import argparse
+import contextlib
+import csv
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from bands import is_dfs
+from classifier import classify_networks
+from records import ScanSnapshot
+from rssi import get_profile, load_profiles
+from scan import parse_windows_scan_results
+
+# Колонки выходных строк (одна строка на точку доступа в одном сканировании)
+FIELDS = (
+    "source",
+    "timestamp",
+    "ssid",
+    "bssid",
+    "channel",
+    "band",
+    "signal_strength",
+    "signal_dbm",
+    "radio_type",
+    "network_type",
+    "authentication",
+    "encryption",
+)
+CLASSIFY_FIELDS = FIELDS + ("dfs",)
+FORMATS = ("csv", "jsonl", "parquet")
+
+
+def observation_row(source, timestamp, observation, band=None):
+    """Строка вывода для одного наблюдения точки доступа."""
+    return {
+        "source": source,
+        "timestamp": timestamp,
+        "ssid": observation.ssid,
+        "bssid": observation.bssid,
+        "channel": observation.channel,
+        "band": band or observation.band,
+        "signal_strength": observation.signal_strength,
+        "signal_dbm": observation.signal_dbm,
+        "radio_type": observation.radio_type,
+        "network_type": observation.network_type,
+        "authentication": observation.authentication,
+        "encryption": observation.encryption,
+    }
+
+
+def _read_dump(path, encoding):
+    """Строки файла с выводом netsh (байты для cp866, иначе декодированный текст)."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if encoding == "cp866":
+        return data.splitlines()  # Парсер декодирует cp866 сам
+    return data.decode(encoding, errors="replace").splitlines()
+
+
+_loaded_calibrations = set()  # Файлы профилей RSSI, загруженные в этом процессе
+
+
+def _rssi_profile(calibration):
+    """Профиль RSSI по паре (файл профилей или None, имя профиля или None)."""
+    path, name = calibration or (None, None)
+    if path and path not in _loaded_calibrations:
+        load_profiles(path)  # Один раз на процесс пула
+        _loaded_calibrations.add(path)
+    return get_profile(name)
+
+
+def process_dump(path, encoding="cp866", classify=False, calibration=None):
+    """
+    Разбирает один файл (выполняется в процессе пула) и возвращает строки вывода.
+    При classify=True диапазон определяется классификатором и добавляется признак DFS.
+    calibration — (файл профилей RSSI, имя профиля) для пересчёта % в dBm.
+    """
+    timestamp = os.path.getmtime(path)  # Время записи файла — время сканирования
+    parsed = parse_windows_scan_results(
+        _read_dump(path, encoding), profile=_rssi_profile(calibration)
+    )
+    if not classify:
+        snapshot = ScanSnapshot.from_networks(parsed, timestamp)
+        return [observation_row(path, timestamp, obs) for obs in snapshot]
+
+    # Предупреждения классификатора не должны смешиваться с выводом в stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        classified = classify_networks(parsed)
+    rows = []
+    for band, observations in classified.items():
+        for obs in observations:
+            row = observation_row(path, timestamp, obs, band)
+            row["dfs"] = is_dfs(obs.channel, band)
+            rows.append(row)
+    return rows
+
+
+def _process_star(args):
+    return process_dump(*args)
+
+
+def _process_chunk(tasks):
+    """Разбор пачки файлов в процессе пула (одна передача задач и результатов)."""
+    return [process_dump(*task) for task in tasks]
+
+
+def iter_dump_paths(inputs, suffixes=(".txt", ".log")):
+    """Файлы из списка аргументов; каталоги обходятся рекурсивно."""
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                for name in sorted(names):
+                    if name.endswith(suffixes):
+                        yield os.path.join(root, name)
+        else:
+            yield item
+
+
+def iter_dump_rows(
+    paths,
+    encoding="cp866",
+    classify=False,
+    workers=None,
+    chunksize=16,
+    calibration=None,
+):
+    """
+    Строки вывода для всех файлов. Файлы разбираются в пуле процессов
+    пачками по chunksize и выдаются в исходном порядке. В обработке
+    одновременно не больше двух пачек на процесс, поэтому память
+    не зависит от числа файлов, даже если запись отстаёт от разбора.
+    """
+    tasks = ((path, encoding, classify, calibration) for path in paths)
+    if workers == 1:
+        for task in tasks:
+            yield from _process_star(task)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()  # Отправленные пачки в порядке файлов
+        while True:
+            # Дополняем окно новыми пачками, пока есть файлы
+            while len(pending) < 2 * workers:
+                chunk = list(itertools.islice(tasks, chunksize))
+                if not chunk:
+                    break
+                pending.append(pool.submit(_process_chunk, chunk))
+            if not pending:
+                break
+            for rows in pending.popleft().result():
+                yield from rows
+
+
+def iter_log_rows(path, start=None, end=None):
+    """Строки вывода из журнала сканирований за интервал [start, end]."""
+    from scanlog import ScanLog  # NumPy нужен только для этой команды
+
+    with ScanLog(path) as log:
+        for snapshot in log.snapshots(start, end):
+            for observation in snapshot:
+                yield observation_row(path, snapshot.timestamp, observation)
+
+
+class CsvWriter:
+    """Запись строк в CSV с заголовком."""
+
+    def __init__(self, file, fields):
+        self._writer = csv.DictWriter(file, fieldnames=fields, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, row):
+        self._writer.writerow(row)
+
+    def close(self):
+        pass
+
+
+class JsonlWriter:
+    """Запись строк в JSON Lines (объект JSON на строку)."""
+
+    def __init__(self, file, fields):
+        self._file = file
+
+    def write(self, row):
+        self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    """Запись Parquet пачками строк (требуется пакет pyarrow)."""
+
+    def __init__(self, path, fields, batch_size=65536):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Для вывода в Parquet установите пакет pyarrow")
+        self._pa = pyarrow
+        self._parquet = pyarrow.parquet
+        self._path = path
+        self._fields = fields
+        self._batch_size = batch_size  # Строк в одной группе записи
+        self._batch = []
+        self._writer = None  # Создаётся по схеме первой пачки
+
+    def write(self, row):
+        self._batch.append(row)
+        if len(self._batch) >= self._batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._batch:
+            return
+        table = self._pa.Table.from_pylist(self._batch)
+        table = table.select(list(self._fields))
+        if self._writer is None:
+            self._writer = self._parquet.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+        self._batch = []
+
+    def close(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _output_format(args):
+    if args.format:
+        return args.format
+    extension = os.path.splitext(args.output or "")[1].lstrip(".").lower()
+    return extension if extension in FORMATS else "csv"
+
+
+def write_rows(rows, output, fmt, fields):
+    """Записывает строки в файл output (или stdout для "-"/None); возвращает их число."""
+    if fmt == "parquet":
+        if output in (None, "-"):
+            raise SystemExit("Для Parquet укажите выходной файл (-o)")
+        writer = ParquetWriter(output, fields)
+        file = None
+    else:
+        file = (
+            sys.stdout
+            if output in (None, "-")
+            else open(output, "w", encoding="utf-8", newline="")
+        )
+        writer = (CsvWriter if fmt == "csv" else JsonlWriter)(file, fields)
+
+    count = 0
+    try:
+        for row in rows:
+            writer.write(row)
+            count += 1
+    finally:
+        writer.close()
+        if file is not None and file is not sys.stdout:
+            file.close()
+    return count
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m cli",
+        description="Пакетная обработка сканирований Wi-Fi без графического интерфейса",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_output(sub):
+        sub.add_argument("-o", "--output", help="выходной файл (по умолчанию stdout)")
+        sub.add_argument(
+            "-f", "--format", choices=FORMATS, help="формат вывода (по расширению файла)"
+        )
+
+    for name, help_text in (
+        ("parse", "разбор записанных выводов netsh"),
+        ("classify", "разбор и классификация по диапазонам частот"),
+    ):
+        sub = commands.add_parser(name, help=help_text)
+        sub.add_argument("inputs", nargs="+", help="файлы или каталоги с выводом netsh")
+        sub.add_argument(
+            "--encoding", default="cp866", help="кодировка файлов (по умолчанию cp866)"
+        )
+        sub.add_argument(
+            "-j", "--workers", type=int, default=None, help="число процессов разбора"
+        )
+        sub.add_argument("--rssi-profiles", help="файл калибровочных профилей RSSI")
+        sub.add_argument(
+            "--rssi-profile", help="профиль пересчёта %% в dBm (windows, linear, ...)"
+        )
+        add_output(sub)
+
+    sub = commands.add_parser("export", help="выгрузка журнала сканирований")
+    sub.add_argument("log", help="файл журнала (scan_history.scanlog)")
+    sub.add_argument("--start", type=float, help="начало интервала (epoch, с)")
+    sub.add_argument("--end", type=float, help="конец интервала (epoch, с)")
+    add_output(sub)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fmt = _output_format(args)
+    if args.command == "export":
+        rows = iter_log_rows(args.log, args.start, args.end)
+        fields = FIELDS
+    else:
+        classify = args.command == "classify"
+        rows = iter_dump_rows(
+            iter_dump_paths(args.inputs),
+            encoding=args.encoding,
+            classify=classify,
+            workers=args.workers,
+            calibration=(args.rssi_profiles, args.rssi_profile),
+        )
+        fields = CLASSIFY_FIELDS if classify else FIELDS
+    count = write_rows(rows, args.output, fmt, fields)
+    print(f"Записано строк: {count}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
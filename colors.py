@@ -0,0 +1,84 @@
+import zlib
+from collections import Counter
+
+# Палитра хорошо различимых цветов (tab20, tab20b и tab20c из Matplotlib)
+PALETTE = (
+    "#1f77b4", "#aec7e8", "#ff7f0e", "#ffbb78", "#2ca02c",
+    "#98df8a", "#d62728", "#ff9896", "#9467bd", "#c5b0d5",
+    "#8c564b", "#c49c94", "#e377c2", "#f7b6d2", "#7f7f7f",
+    "#c7c7c7", "#bcbd22", "#dbdb8d", "#17becf", "#9edae5",
+    "#393b79", "#5254a3", "#6b6ecf", "#9c9ede", "#637939",
+    "#8ca252", "#b5cf6b", "#cedb9c", "#8c6d31", "#bd9e39",
+    "#e7ba52", "#e7cb94", "#843c39", "#ad494a", "#d6616b",
+    "#e7969c", "#7b4173", "#a55194", "#ce6dbd", "#de9ed6",
+    "#3182bd", "#6baed6", "#9ecae1", "#c6dbef", "#e6550d",
+    "#fd8d3c", "#fdae6b", "#fdd0a2", "#31a354", "#74c476",
+    "#a1d99b", "#c7e9c0", "#756bb1", "#9e9ac8", "#bcbddc",
+    "#dadaeb", "#636363", "#969696", "#bdbdbd", "#d9d9d9",
+)  # fmt: skip
+
+
+class ColorRegistry:
+    """
+    Постоянное соответствие "сеть -> цвет" для всех графиков.
+    Цвет выбирается по хэшу SSID/BSSID (при коллизии — ближайший свободный)
+    и закреплён за сетью, пока она отображается хотя бы на одном графике
+    (user). Если палитра занята, новая сеть получает цвет по хэшу вместе
+    с уже отображаемой сетью: цвета отображаемых сетей не меняются.
+    """
+
+    def __init__(self, palette=PALETTE):
+        self.palette = tuple(palette)
+        self._slots = {}  # Ключ -> индекс цвета
+        self._sharing = Counter()  # Индекс цвета -> число сетей с этим цветом
+        self._users = {}  # Ключ -> графики, на которых сеть отображается
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, key):
+        return key in self._slots
+
+    def color(self, key, user=None):
+        """Цвет сети; пока сеть не освобождена, всегда один и тот же."""
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._free_slot(key)
+            self._slots[key] = slot
+            self._sharing[slot] += 1
+        self._users.setdefault(key, set()).add(user)
+        return self.palette[slot]
+
+    def release(self, key, user=None):
+        """
+        Сеть больше не отображается на графике user; цвет освобождается,
+        когда сеть убрана со всех графиков.
+        """
+        users = self._users.get(key)
+        if users is None:
+            return
+        users.discard(user)
+        if users:
+            return  # Сеть ещё видна на другом графике
+        del self._users[key]
+        slot = self._slots.pop(key)
+        self._sharing[slot] -= 1
+        if not self._sharing[slot]:
+            del self._sharing[slot]
+
+    def _free_slot(self, key):
+        """
+        Слот по хэшу ключа; при коллизии — ближайший свободный (линейное
+        пробирование), а если свободных нет — слот по хэшу (общий цвет).
+        """
+        size = len(self.palette)
+        start = zlib.crc32(str(key).encode("utf-8")) % size
+        for offset in range(size):
+            slot = (start + offset) % size
+            if slot not in self._sharing:
+                return slot
+        return start
+
+
+# Общий реестр цветов для графика по каналам и графика по времени
+SSID_COLORS = ColorRegistry()
@@ -0,0 +1,124 @@
+import math
+import numpy as np
+
+POINTS_PER_PIXEL = 2  # Не больше двух точек ряда на пиксель ширины графика
+
+
+def bin_seconds(span, pixels, points_per_pixel=POINTS_PER_PIXEL):
+    """
+    Ширина интервала прореживания (с) для участка span секунд на pixels
+    пикселях. Каждый интервал даёт две точки (минимум и максимум).
+    Ширина округляется вверх до степени двойки, поэтому сетка интервалов
+    не меняется при небольших изменениях масштаба и ширины окна.
+    """
+    if span <= 0 or pixels <= 0:
+        return 0.0
+    width = span * 2 / (pixels * points_per_pixel)
+    return 2.0 ** math.ceil(math.log2(width))
+
+
+def minmax_indices(times, values, width):
+    """
+    Индексы точек с минимальным и максимальным значением в каждом интервале
+    сетки шириной width секунд (в порядке времени). Интервал без известных
+    значений представлен одной точкой NaN — разрыв линии сохраняется.
+    """
+    if width <= 0 or not len(times):
+        return np.arange(len(times))
+    bins = np.floor(times / width)
+    known = ~np.isnan(values)
+    # Первый элемент каждой группы после сортировки по (интервал, ключ)
+    # даёт минимум и максимум без цикла по интервалам
+    low_key = np.where(known, values, np.inf)
+    high_key = np.where(known, -values, np.inf)
+    starts = np.flatnonzero(np.diff(bins)) + 1
+    starts = np.concatenate(([0], starts))
+    lowest = np.lexsort((low_key, bins))[starts]
+    highest = np.lexsort((high_key, bins))[starts]
+    return np.union1d(lowest, highest)
+
+
+def _same(old, new):
+    """Поэлементное совпадение значений (NaN совпадает с NaN)."""
+    return (old == new) | (np.isnan(old) & np.isnan(new))
+
+
+class SeriesDecimator:
+    """
+    Прореживание одного временного ряда для отрисовки, пересчитываемое
+    инкрементально. Интервалы привязаны к абсолютной сетке времени,
+    поэтому при поступлении новых отсчётов пересчитываются только
+    интервалы, начиная с первого изменившегося отсчёта (и первый интервал,
+    если начало ряда вытеснено); остальные точки берутся из кэша.
+    """
+
+    def __init__(self):
+        self.width = None  # Ширина интервала, для которой построен кэш (с)
+        self._times = None  # Исходный ряд последнего вызова
+        self._values = None
+        self._out_times = None  # Выбранные точки
+        self._out_values = None
+
+    def _select(self, times, values, width):
+        idx = minmax_indices(times, values, width)
+        return times[idx], values[idx]
+
+    def _first_change(self, times, values):
+        """
+        Время первого нового, изменившегося или удалённого отсчёта
+        (inf — ряд не изменился, None — ряд нельзя сопоставить с предыдущим).
+        """
+        old_times, old_values = self._times, self._values
+        shift = int(np.searchsorted(old_times, times[0]))
+        if shift >= len(old_times) or old_times[shift] != times[0]:
+            return None
+        n = min(len(old_times) - shift, len(times))
+        same = (old_times[shift : shift + n] == times[:n]) & _same(
+            old_values[shift : shift + n], values[:n]
+        )
+        changed = n if same.all() else int(np.argmin(same))
+        candidates = []
+        if changed < len(times):
+            candidates.append(times[changed])
+        if shift + changed < len(old_times):
+            candidates.append(old_times[shift + changed])
+        return min(candidates, default=math.inf)
+
+    def update(self, times, values, width):
+        """Точки ряда (время, значение) для отрисовки с интервалом width (с)."""
+        times = np.asarray(times)
+        values = np.asarray(values)
+        if width <= 0 or not len(times):
+            self.width = None  # Прореживать нечего
+            return times, values
+        changed = None
+        if width == self.width and len(self._times):
+            changed = self._first_change(times, values)
+        if changed is None:
+            out = self._select(times, values, width)  # Полный пересчёт
+        elif changed == math.inf and len(times) == len(self._times):
+            return self._out_times, self._out_values  # Ряд не изменился
+        else:
+            first_end = (math.floor(times[0] / width) + 1) * width
+            dirty = changed
+            if changed < math.inf:
+                dirty = math.floor(changed / width) * width  # Начало интервала
+            parts = []
+            if dirty >= first_end:
+                # Первый интервал мог потерять вытесненные отсчёты
+                head = times < first_end
+                parts.append(self._select(times[head], values[head], width))
+                cached = (self._out_times >= first_end) & (self._out_times < dirty)
+                parts.append((self._out_times[cached], self._out_values[cached]))
+                tail = times >= dirty
+            else:
+                tail = slice(None)
+            parts.append(self._select(times[tail], values[tail], width))
+            out = (
+                np.concatenate([p[0] for p in parts]),
+                np.concatenate([p[1] for p in parts]),
+            )
+        self.width = width
+        self._times, self._values = times, values
+        self._out_times, self._out_values = out
+        return out
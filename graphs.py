@@ -1,87 +1,227 @@
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure  # Без pyplot: фигуры не регистрируются глобально
+import time
 import numpy as np
-import datetime
+from colors import SSID_COLORS
+from decimate import SeriesDecimator, bin_seconds
+from records import as_snapshot
+from bands import BAND_6, BANDS
+from spectrum import BAND_6_DIVIDER, axis_position, channel_occupancy, ssid_spans
+from stats import ssid_levels
+from tracing import traced
+from timeseries import TimeSeriesStore
+
+SECONDS_PER_DAY = 86400.0  # Перевод epoch-секунд в даты Matplotlib
+MARKER_SPACING = 6  # Минимальное расстояние между маркерами точек (пикселей)
 
 global_active = True  # Флаг для управления активностью графика
 
 
+def _refresh_legend(ax, has_series, loc):
+    """Перестраивает легенду (или убирает её, если на графике нет данных)."""
+    if has_series:
+        ax.legend(loc=loc)
+    elif ax.get_legend() is not None:
+        ax.get_legend().remove()
+
+
+def _create_canvas(fig, parent):
+    """
+    Холст фигуры: встроенный в окно Tkinter или, без родителя (parent=None),
+    растровый Agg без окна — для замеров и работы без дисплея.
+    """
+    if parent is None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        return FigureCanvasAgg(fig)
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    canvas = FigureCanvasTkAgg(fig, master=parent)  # Связываем фигуру с окном Tkinter
+    canvas.get_tk_widget().pack(fill="both", expand=True)  # Отображаем виджет графики
+    return canvas
+
+
+class BlitManager:
+    """
+    Перерисовывает только изменяемые элементы графика поверх сохранённого фона.
+    Фон (оси, подписи, легенда) пересохраняется при каждой полной перерисовке.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.background = None  # Сохранённый статический фон фигуры
+        self.artists = []  # Динамические элементы (столбцы, линии)
+        self._cid = canvas.mpl_connect("draw_event", self.on_draw)
+
+    def on_draw(self, event):
+        """Сохраняет фон после полной перерисовки и дорисовывает динамику."""
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_animated()
+
+    def add_artist(self, artist):
+        """Регистрирует динамический элемент (он не попадает в фон)."""
+        artist.set_animated(True)
+        self.artists.append(artist)
+
+    def remove_artist(self, artist):
+        """Удаляет элемент из списка динамических и с осей."""
+        self.artists.remove(artist)
+        artist.remove()
+
+    def remove_container(self, container):
+        """Удаляет группу столбцов (BarContainer) вместе с записью о ней в осях."""
+        for artist in container:
+            self.artists.remove(artist)
+        container.remove()
+
+    def _draw_animated(self):
+        figure = self.canvas.figure
+        for artist in self.artists:
+            figure.draw_artist(artist)
+
+    def redraw(self):
+        """Полная перерисовка при изменении структуры графика."""
+        self.canvas.draw_idle()
+
+    def update(self):
+        """Быстрое обновление: восстановление фона и отрисовка динамики."""
+        if self.background is None:
+            self.redraw()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_animated()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+
 # Функция рисования графика уровней сигналов по каналам
-def draw_signal_level_graph(parent):
-    fig, ax = plt.subplots(figsize=(7, 5))  # Создание фигуры и осей для графика
-    canvas = FigureCanvasTkAgg(
-        fig, master=parent
-    )  # Привязываем фигуру к родительскому компоненту Tkinter
+def draw_signal_level_graph(parent, colors=SSID_COLORS):
+    fig = Figure(figsize=(7, 5))  # Создание фигуры и осей для графика
+    ax = fig.add_subplot()
+    canvas = _create_canvas(fig, parent)  # Привязываем фигуру к окну (или к Agg)
+
+    # Оформление осей задаётся один раз
+    ax.set_ylim(-100, 0)  # Ограничиваем вертикальные значения (-100..0)
+    ax.set_title("Уровень сигнала по каналам")
+    ax.set_xlabel("Номер канала")
+    ax.set_ylabel("Амплитуда (dBm)")
+
+    blit = BlitManager(canvas)
     canvas.draw()  # Рисуем начальное состояние графика
-    canvas.get_tk_widget().pack(fill="both", expand=True)  # Отображаем виджет графики
+
+    bars = {}  # SSID -> (полосы, BarContainer)
+    shown_channels = []  # Каналы, подписанные на оси X
+    shown_bands = []  # Диапазоны, для которых построена занятость каналов
+
+    # Суммарная мощность в каналах и рекомендуемые каналы (модель спектра)
+    (occupancy_line,) = ax.plot(
+        [], [], color="black", linewidth=1.5, label="Занятость канала"
+    )
+    (recommended_marks,) = ax.plot(
+        [],
+        [],
+        linestyle="",
+        marker="v",
+        markersize=10,
+        color="green",
+        label="Рекомендуемый канал",
+    )
+    blit.add_artist(occupancy_line)
+    blit.add_artist(recommended_marks)
+    # Граница диапазона 6 ГГц: его каналы сдвинуты вправо на оси X
+    band_divider = ax.axvline(BAND_6_DIVIDER, color="gray", linestyle=":")
+    band_label = ax.text(
+        BAND_6_DIVIDER, -3, " 6 ГГц", color="gray", va="top", ha="left"
+    )
+    band_divider.set_visible(False)
+    band_label.set_visible(False)
 
     # Внутренняя функция для обновления графика по новым данным
+    @traced()
     def update_plot(data):
         global global_active
         if not global_active:
             return  # Выходим, если график отключён
 
-        channels = set()  # Множество уникальных номеров каналов
-        signals = {}  # Словарь для хранения информации о сигналах разных SSID
-
-        # Собираем данные по сигналам и каналам
-        for ssid, networks in data.items():
-            for network in networks:
-                if "канал" in network and "signal_dbm" in network:
-                    channel = int(
-                        network["канал"]
-                    )  # Преобразование строки канала в число
-                    signal_dbm = float(network["signal_dbm"])  # Амплитуда сигнала в dBm
-
-                    channels.add(channel)  # Сохраняем уникальный номер канала
-                    if ssid not in signals:
-                        signals[ssid] = {"channels": [], "signals": []}
-                    signals[ssid]["channels"].append(channel)
-                    signals[ssid]["signals"].append(signal_dbm)
-
-        # Очищаем оси перед перерисовкой
-        ax.clear()
-
-        # Генерируем случайные цвета для различных SSID
-        colors = [
-            "#" + "".join(np.random.choice(list("0123456789ABCDEF"), size=6))
-            for _ in range(len(signals))
-        ]
-
-        # Строим гистограмму сигналов
-        for idx, (ssid, info) in enumerate(signals.items()):
-            # Поднимаем столбики над уровнем "-100" для наглядности визуализации
-            bottom_values = [-100] * len(info["channels"])  # Базовая линия
-            heights = [
-                (sig_val + 100) for sig_val in info["signals"]
-            ]  # Высота столбца относительно базовой линии
-
-            # Строим гистограмму для текущего SSID
-            ax.bar(
-                info["channels"],  # Положение столбцов
+        snapshot = as_snapshot(data)
+        # Полосы каждого SSID с учётом ширины канала: (центр, ширина) -> dBm
+        levels = ssid_spans(snapshot)
+        structure_changed = False  # Нужна ли полная перерисовка
+
+        # Удаляем столбцы исчезнувших сетей
+        for ssid in [ssid for ssid in bars if ssid not in levels]:
+            blit.remove_container(bars.pop(ssid)[1])
+            colors.release(ssid, "bars")  # Цвет свободен, если линии SSID тоже нет
+            structure_changed = True
+
+        for ssid, per_span in levels.items():
+            ssid_spans_key = tuple(per_span)
+            # Высота столбца относительно базовой линии "-100"
+            heights = [sig_val + 100 for sig_val in per_span.values()]
+
+            entry = bars.get(ssid)
+            if entry is not None and entry[0] == ssid_spans_key:
+                # Набор каналов не изменился: обновляем только высоты
+                for rect, height in zip(entry[1], heights):
+                    rect.set_height(height)
+                continue
+
+            # Новая сеть или сменились каналы: пересоздаём столбцы SSID
+            if entry is not None:
+                blit.remove_container(entry[1])
+            container = ax.bar(
+                [center for center, _ in ssid_spans_key],  # Центр полосы канала
                 heights,  # Высота столбцов
-                bottom=bottom_values,  # Начало столбцов от -100
-                width=0.8,
+                bottom=-100,  # Начало столбцов от -100
+                width=[width for _, width in ssid_spans_key],  # Ширина в каналах
                 align="center",
+                alpha=0.5,  # Перекрывающиеся полосы остаются видны
                 label=ssid,
-                color=colors[idx],
+                color=colors.color(ssid, "bars"),  # Цвет SSID общий для графиков
             )
+            for rect in container:
+                blit.add_artist(rect)
+            bars[ssid] = (ssid_spans_key, container)
+            structure_changed = True
 
-        # Настраиваем границы и метки графика
-        ax.set_ylim(-100, 0)  # Ограничиваем вертикальные значения (-100..0)
-        ax.set_xticks(sorted(channels))  # Устанавливаем метки X по каналам
-        ax.set_xticklabels(
-            [f"{ch}" for ch in sorted(channels)]
-        )  # Метки подписаны номерами каналов
+        # Занятость каналов: маски всех точек доступа, сложенные в линейной шкале
+        occupancy = channel_occupancy(snapshot)
+        xs, ys, marks = [], [], []
+        for band, result in occupancy.items():
+            # NaN разрывает линию между диапазонами и на пропусках в нумерации каналов
+            channels = axis_position(result.channels.astype(float), band)
+            gaps = np.flatnonzero(np.diff(channels) > 4) + 1
+            xs.extend(np.insert(channels, gaps, np.nan).tolist() + [np.nan])
+            power = np.clip(result.power_dbm, -100, 0)
+            ys.extend(np.insert(power, gaps, np.nan).tolist() + [np.nan])
+            if result.recommended is not None:
+                marks.append(axis_position(result.recommended, band))
+        occupancy_line.set_data(xs, ys)
+        recommended_marks.set_data(marks, [-5] * len(marks))
+        if list(occupancy) != shown_bands:
+            shown_bands[:] = occupancy  # Изменился охват оси X
+            structure_changed = True
 
-        # Оформляем легенду и заголовок
-        ax.legend(loc="upper right")
-        ax.set_title("Уровень сигнала по каналам")
-        ax.set_xlabel("Номер канала")
-        ax.set_ylabel("Амплитуда (dBm)")
+        # Подписи оси X меняются только при изменении набора каналов
+        # Занятые каналы всех диапазонов: (диапазон, номер канала)
+        index = snapshot.band_index
+        channels = [(band, ch) for band in BANDS for ch in index.channels(band)]
+        if channels != shown_channels:
+            shown_channels[:] = channels
+            # Метки X по положению каналов на оси, подписаны номерами каналов
+            ax.set_xticks([axis_position(ch, band) for band, ch in channels])
+            ax.set_xticklabels([f"{ch}" for _, ch in channels])
+            has_6ghz = any(band == BAND_6 for band, _ in channels)
+            band_divider.set_visible(has_6ghz)
+            band_label.set_visible(has_6ghz)
+            structure_changed = True
 
-        # Пересчитываем и обновляем график
-        canvas.draw_idle()
+        if structure_changed:
+            # Пересчитываем границы и легенду, затем полностью перерисовываем
+            ax.relim(visible_only=True)  # Скрытая граница 6 ГГц не расширяет ось
+            ax.autoscale_view(scaley=False)
+            _refresh_legend(ax, bool(bars), "upper right")
+            blit.redraw()
+        else:
+            blit.update()  # Перерисовываем только столбцы поверх фона
 
     # Функция деактивации графика
     def deactivate():
@@ -92,70 +232,108 @@ def draw_signal_level_graph(parent):
 
 
 # Функция рисования временной зависимости изменения сигнала
-def draw_temporal_signal_graph(parent):
-    fig, ax = plt.subplots(figsize=(7, 5))  # Создаем новый график
-    canvas = FigureCanvasTkAgg(fig, master=parent)  # Связываем его с окном Tkinter
+def draw_temporal_signal_graph(parent, store=None, colors=SSID_COLORS):
+    fig = Figure(figsize=(7, 5))  # Создаем новый график
+    ax = fig.add_subplot()
+    canvas = _create_canvas(fig, parent)  # Встраиваем графику в окно (или в Agg)
+
+    # Оформление осей задаётся один раз
+    ax.set_ylim(-100, 0)  # Диапазон y (-100...0)
+    ax.xaxis_date()  # Подписи оси X в формате времени
+    ax.set_title("Изменение уровня сигнала по времени")
+    ax.set_xlabel("Время")
+    ax.set_ylabel("Амплитуда (dBm)")
+
+    blit = BlitManager(canvas)
     canvas.draw()  # Отрисовываем базовый пустой график
-    canvas.get_tk_widget().pack(fill="both", expand=True)  # Встраиваем графику в окно
 
-    timeseries = {}  # Хранит временные ряды для каждого SSID
+    # Хранит временные ряды для каждого SSID в ограниченном окне
+    timeseries = store if store is not None else TimeSeriesStore()
     lines = {}  # Хранит линии для построения графика
+    decimators = {}  # SSID -> прореживание ряда для текущего масштаба
+    x_range = [None, None]  # Текущие границы оси X (epoch, с)
+    last_now = [None]  # Время предыдущего обновления
     global_active = True  # Управляет состоянием активности графика
 
-    # Внутренняя функция для обновления графика временных рядов
-    def update_temporal_plot(data):
+    # Внутренняя функция для обновления графика временных рядов.
+    # now — текущее время графика (при воспроизведении записи — время записи)
+    @traced()
+    def update_temporal_plot(data, now=None):
         global global_active
         if not global_active:
             return  # Ничего не делаем, если график выключен
 
-        current_time = datetime.datetime.now()  # Текущее время
-
-        # Обрабатываем новые данные и добавляем их в временную серию
-        for ssid, networks in data.items():
-            last_signal_dbm = None
-            for network in networks:
-                if "signal_dbm" in network:
-                    last_signal_dbm = float(network["signal_dbm"])
-
-            # Формируем временные серии для каждого SSID
-            if ssid not in timeseries:
-                timeseries[ssid] = (
-                    [current_time],
-                    [last_signal_dbm],
-                )  # Начальная точка
-            else:
-                timeseries[ssid][0].append(current_time)  # Добавляем новое время
-                timeseries[ssid][1].append(
-                    last_signal_dbm
-                )  # Добавляем новую амплитуду сигнала
-
-        # Очистка текущих осей перед построением нового графика
-        ax.clear()
-
-        # Генерация цветов для линий
-        colors = [
-            "#" + "".join(np.random.choice(list("0123456789ABCDEF"), size=6))
-            for _ in range(len(timeseries))
-        ]
-
-        # Построение графика для каждого SSID
-        for idx, (ssid, series) in enumerate(timeseries.items()):
-            (line,) = ax.plot(
-                series[0], series[1], marker="o", label=ssid, color=colors[idx]
-            )  # Линии на графике с маркерами
-            lines[ssid] = (
-                line  # Сохраняем ссылку на линию для последующего использования
-            )
+        current_time = time.time() if now is None else now  # Epoch, с
+        snapshot = as_snapshot(data)
+        # Время отсчёта — время сканирования, если оно известно
+        sample_time = snapshot.timestamp or current_time
+        if last_now[0] is not None and current_time < last_now[0]:
+            x_range[0] = x_range[1] = None  # Переход назад по записи
+        last_now[0] = current_time
 
-        # Настройка границ и оформления графика
-        ax.set_ylim(-100, 0)  # Диапазон y (-100...0)
-        ax.legend(loc="upper left")  # Легенда слева вверху
-        ax.set_title("Изменение уровня сигнала по времени")
-        ax.set_xlabel("Время")
-        ax.set_ylabel("Амплитуда (dBm)")
+        # Обрабатываем новые данные и добавляем их в временную серию:
+        # уровень сети — наибольший сглаженный уровень её точек доступа
+        # (без статистики — сигнал самой сильной точки доступа).
+        # Уже сохранённые отсчёты (например, загруженные из журнала) не дублируются
+        if timeseries.last_time is None or sample_time > timeseries.last_time:
+            timeseries.append_many(sample_time, ssid_levels(snapshot, snapshot.stats))
+        timeseries.evict(current_time)  # Удаляем данные за пределами окна хранения
 
-        # Обновление содержимого окна графика
-        canvas.draw_idle()
+        structure_changed = False  # Нужна ли полная перерисовка
+
+        # Удаляем линии рядов, вытесненных из хранилища
+        for ssid in [ssid for ssid in lines if ssid not in timeseries]:
+            blit.remove_artist(lines.pop(ssid))
+            decimators.pop(ssid, None)
+            colors.release(ssid, "lines")
+            structure_changed = True
+
+        # Прореживание: не больше ~2 точек на пиксель видимого участка оси X
+        pixels = ax.bbox.width
+        span = x_range[1] - x_range[0] if x_range[1] is not None else 60.0
+        width = bin_seconds(span, pixels)
+
+        # Обновляем данные линий, создавая линии только для новых SSID
+        first_time = current_time
+        for ssid, series in timeseries.items():
+            times, values = series.view()  # Ограниченное число точек на ряд
+            if len(times):
+                first_time = min(first_time, times[0])
+            decimator = decimators.get(ssid)
+            if decimator is None:
+                decimator = decimators[ssid] = SeriesDecimator()
+            times, values = decimator.update(times, values, width)
+            # Маркеры только там, где точки не сливаются
+            marker = "o" if len(times) * MARKER_SPACING <= pixels else ""
+            line = lines.get(ssid)
+            if line is None:
+                (line,) = ax.plot(
+                    times / SECONDS_PER_DAY,  # Даты Matplotlib в днях от 1970 г.
+                    values,
+                    marker=marker,
+                    label=ssid,
+                    color=colors.color(ssid, "lines"),  # Постоянный цвет SSID
+                )  # Линии на графике с маркерами
+                blit.add_artist(line)
+                lines[ssid] = line  # Сохраняем ссылку на линию
+                structure_changed = True
+            else:
+                line.set_data(times / SECONDS_PER_DAY, values)
+                if line.get_marker() != marker:
+                    line.set_marker(marker)
+
+        # Ось X расширяется скачками, чтобы фон не перерисовывался каждую секунду
+        if x_range[1] is None or current_time > x_range[1]:
+            span = max(current_time - first_time, 60.0)
+            x_range[0] = first_time
+            x_range[1] = current_time + 0.25 * span
+            structure_changed = True
+        if structure_changed:
+            ax.set_xlim(x_range[0] / SECONDS_PER_DAY, x_range[1] / SECONDS_PER_DAY)
+            _refresh_legend(ax, bool(lines), "upper left")  # Легенда слева вверху
+            blit.redraw()
+        else:
+            blit.update()  # Перерисовываем только линии поверх фона
 
     # Деактивация графика
     def deactivate():
@@ -163,3 +341,58 @@ def draw_temporal_signal_graph(parent):
         global_active = False  # Переключаем активность графика
 
     return canvas, update_temporal_plot, deactivate
+
+
+# Карта покрытия обследования: план помещения, интерполированный уровень
+# сигнала и точки обследования. size — (ширина, высота) плана в пикселях;
+# on_click(x, y) вызывается при щелчке по плану
+def draw_survey_map(parent, plan, size, on_click=None):
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    canvas = _create_canvas(fig, parent)
+
+    width, height = size
+    if plan is not None:
+        ax.imshow(plan, extent=(0, width, height, 0))
+    ax.set_xlim(0, width)
+    ax.set_ylim(height, 0)  # Ось Y направлена вниз, как у изображения
+    ax.set_aspect("equal")
+    ax.set_axis_off()
+
+    heat = ax.imshow(
+        np.full((1, 1), np.nan),
+        extent=(0, width, height, 0),
+        cmap="RdYlGn",
+        vmin=-100,
+        vmax=-30,
+        alpha=0.55,
+        interpolation="bilinear",
+    )
+    fig.colorbar(heat, ax=ax, label="Уровень сигнала (dBm)")
+    (points_line,) = ax.plot([], [], linestyle="", marker="o", color="black")
+    (pending_mark,) = ax.plot(
+        [], [], linestyle="", marker="x", markersize=12, color="blue"
+    )
+
+    if on_click is not None:
+
+        def clicked(event):
+            if event.inaxes is ax and event.xdata is not None:
+                on_click(event.xdata, event.ydata)
+
+        canvas.mpl_connect("button_press_event", clicked)
+
+    # grid — уровни на сетке (None — карты ещё нет), extent — её границы,
+    # points — [(x, y)] точек обследования, pending — точка, ждущая сканирования
+    @traced()
+    def update_survey_map(grid, extent, points, pending=None, title=""):
+        if grid is not None:
+            heat.set_data(grid)
+            heat.set_extent(extent)
+        heat.set_visible(grid is not None)
+        points_line.set_data([p[0] for p in points], [p[1] for p in points])
+        pending_mark.set_data(*(([pending[0]], [pending[1]]) if pending else ([], [])))
+        ax.set_title(title)
+        canvas.draw_idle()
+
+    return canvas, update_survey_map
@@ -1,37 +1,300 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter.messagebox import showinfo
+from tkinter import filedialog
 import threading
-import time
-import json
 import os
-from scan import scan_wifi_net, parse_windows_scan_results
-from graphs import (
-    draw_signal_level_graph,  # Функция для рисования графика уровня сигнала
-    draw_temporal_signal_graph,  # Функция для рисования графика динамики сигнала
-)
+import time
+from scanners import default_scanner
+from async_scan import AsyncScanScheduler
+from bands import BANDS
+from records import ScanSnapshot
+from table_model import COLUMNS, TableModel
+from pipeline import ScanResults, load_snapshot
+from stats import SignalStats
+from changes import SECURITY_DOWNGRADED, SnapshotDiffer, changed_bssids
+from rssi import load_profiles
+from tracing import TRACER, format_summary, span, traced
+
+# Matplotlib, NumPy, журнал сканирований и воспроизведение записей
+# импортируются отложенно: окно появляется сразу, графики создаются
+# при поступлении первых данных
+
+
+class UiDispatcher:
+    """
+    Применяет результаты сканирования в главном потоке Tk.
+    Очередь опрашивается через after() не чаще max_fps раз в секунду;
+    если интерфейс не успевает, промежуточные снимки пропускаются
+    и отображается только самый свежий.
+    """
+
+    def __init__(self, widget, results, apply, max_fps=4.0):
+        self.widget = widget  # Виджет Tk, через который планируются вызовы
+        self.results = results  # Очередь снимков от потока сканирования
+        self.apply = apply  # Функция отображения снимка
+        self.interval_ms = max(1, int(1000 / max_fps))  # Период опроса (мс)
+        self._after_id = None
+
+    def start(self):
+        """Запускает периодический опрос очереди."""
+        if self._after_id is None:
+            self._after_id = self.widget.after(0, self._poll)
+
+    def stop(self):
+        """Останавливает опрос очереди."""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def poll(self):
+        """Отображает самый свежий снимок, если он есть; возвращает его."""
+        snapshot = self.results.latest()  # Старые снимки отбрасываются
+        if snapshot is not None:
+            self.apply(snapshot)
+        return snapshot
+
+    def _poll(self):
+        try:
+            self.poll()
+        finally:
+            # Следующий кадр планируется даже после ошибки отображения
+            self._after_id = self.widget.after(self.interval_ms, self._poll)
+
+
+class SurveyWindow(tk.Toplevel):
+    """
+    Обследование помещения: на загруженном плане отмечается текущее
+    положение, следующее сканирование привязывается к этой точке, карты
+    покрытия (по точке доступа или лучшей точке доступа) обновляются
+    сразу после добавления точки.
+    """
+
+    BEST = "Лучшая точка доступа"  # Слой карты с лучшей точкой доступа
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Обследование помещения")
+        self.geometry("1000x750")
+        self.survey = None  # Текущее обследование (survey.Survey)
+        self.pending = None  # (x, y, время щелчка) — точка ждёт сканирования
+        self.update_map = None  # Обновление карты (после загрузки плана)
+        self.layers = {}  # Подпись слоя -> BSSID
+
+        toolbar = ttk.Frame(self)
+        toolbar.pack(fill=tk.X, pady=5)
+        ttk.Button(toolbar, text="Загрузить план...", command=self.choose_plan).pack(
+            side=tk.LEFT, padx=5
+        )
+        self.layer = ttk.Combobox(toolbar, state="readonly", width=45)
+        self.layer.set(self.BEST)
+        self.layer.bind("<<ComboboxSelected>>", lambda event: self.redraw())
+        self.layer.pack(side=tk.LEFT, padx=5)
+        self.status = ttk.Label(toolbar, text="Загрузите план помещения (PNG)")
+        self.status.pack(side=tk.LEFT, padx=5)
+        self.map_frame = ttk.Frame(self)
+        self.map_frame.pack(fill=tk.BOTH, expand=True)
+
+    def choose_plan(self):
+        """
+        Загружает план; точки обследования хранятся рядом с планом
+        (план.survey.jsonl) и продолжаются при повторной загрузке.
+        """
+        path = filedialog.askopenfilename(
+            parent=self,
+            title="План помещения",
+            filetypes=[("Изображения PNG", "*.png"), ("Все файлы", "*.*")],
+        )
+        if path:
+            self.open_plan(path)
+
+    def open_plan(self, path):
+        from matplotlib.image import imread
+        from graphs import draw_survey_map
+        from survey import Survey
+
+        try:
+            plan = imread(path)
+            height, width = plan.shape[:2]
+            survey_path = os.path.splitext(path)[0] + ".survey.jsonl"
+            if os.path.exists(survey_path):
+                survey = Survey.load(survey_path)
+            else:
+                survey = Survey(width, height, plan=path, path=survey_path)
+        except (OSError, ValueError, KeyError) as e:
+            showinfo("Обследование", f"Ошибка загрузки плана: {e}", parent=self)
+            return
+        for child in self.map_frame.winfo_children():
+            child.destroy()
+        self.survey = survey
+        self.pending = None
+        _, self.update_map = draw_survey_map(
+            self.map_frame, plan, (width, height), on_click=self.mark_position
+        )
+        self.refresh_layers()
+        self.redraw()
+        self.status.configure(
+            text=f"Точек: {len(survey)}. Щёлкните по плану в месте измерения"
+        )
+
+    def mark_position(self, x, y):
+        """Отмечает текущее положение: к нему привяжется следующее сканирование."""
+        if self.survey is None:
+            return
+        self.pending = (x, y, time.time())
+        self.status.configure(
+            text=f"Точка ({x:.0f}, {y:.0f}): ожидание сканирования..."
+        )
+        self.redraw()
+
+    def on_snapshot(self, snapshot):
+        """Привязывает первое сканирование после щелчка к отмеченной точке."""
+        if self.pending is None or snapshot.timestamp < self.pending[2]:
+            return
+        x, y, _ = self.pending
+        self.pending = None
+        self.survey.add(x, y, snapshot)
+        self.refresh_layers()
+        self.redraw()
+        self.status.configure(text=f"Точек: {len(self.survey)}")
+
+    def refresh_layers(self):
+        survey = self.survey
+        self.layers = {survey.label(b): b for b in survey.builder.bssids}
+        self.layer.configure(values=[self.BEST] + sorted(self.layers))
+
+    def redraw(self):
+        """Перерисовывает карту выбранного слоя."""
+        if self.update_map is None:
+            return
+        builder = self.survey.builder
+        name = self.layer.get()
+        grid = None
+        if name in self.layers:
+            grid = builder.heatmap(self.layers[name])
+        elif builder.points:
+            name = self.BEST
+            best = builder.best_server()
+            grid = best[0] if best is not None else None
+        self.update_map(
+            grid,
+            builder.extent,
+            [(p.x, p.y) for p in self.survey.points],
+            self.pending,
+            title=name,
+        )
 
 
 class WifiAnalyzerInterface(tk.Tk):
-    def __init__(self):
+    def __init__(
+        self,
+        history_path="scan_history.scanlog",
+        scan_interval=1.0,
+        max_fps=4.0,
+        scanners=None,
+        rssi_profiles="rssi_profiles.json",
+        full_refresh=10,
+    ):
         super().__init__()
         self.title("Анализатор Wi-Fi")  # Назначаем имя окна
         self.geometry("1600x800")  # Размер окна приложения
-        self.selected_networks = (
-            []
-        )  # Список выбранных сетей (не используется в данном примере)
-        self.network_data = {}  # Данные о сетях Wi-Fi
-        self.scan_stopped = True  # Начальное состояние: сканирование остановлено
+        self.init_state(
+            history_path=history_path,
+            scan_interval=scan_interval,
+            scanners=scanners,
+            rssi_profiles=rssi_profiles,
+            full_refresh=full_refresh,
+        )
         self.create_widgets()  # Создание UI-компонентов
-        self.update_ui()  # Первоначальное заполнение интерфейса данными
+        # История прошлых запусков читается в фоне, не задерживая показ окна
+        self.loader = threading.Thread(target=self.load_initial_data, daemon=True)
+        self.loader.start()
+        # Снимки отображаются в главном потоке с ограниченной частотой кадров
+        self.dispatcher = UiDispatcher(
+            self, self.results, self.apply_snapshot, max_fps=max_fps
+        )
+        self.dispatcher.start()
 
         # Регистрация обработчика события закрытия окна
         self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # F12 включает замеры производительности и строку состояния с ними
+        self.bind("<F12>", lambda event: self.toggle_profiling())
+
+    def init_state(
+        self,
+        history_path="scan_history.scanlog",
+        scan_interval=1.0,
+        scanners=None,
+        rssi_profiles="rssi_profiles.json",
+        full_refresh=10,
+    ):
+        """
+        Состояние окна, не зависящее от виджетов Tk. Вызывается из __init__
+        и из замеров, которые используют методы окна без создания окна.
+        """
+        self.selected_networks = (
+            []
+        )  # Список выбранных сетей (не используется в данном примере)
+        self.network_data = ScanSnapshot()  # Данные о сетях Wi-Fi (по BSSID)
+        self.table = TableModel()  # Модель таблицы: строки по BSSID и сортировка
+        self.frequency_filter = "Все сети"  # Текущий фильтр по диапазону частот
+        self.scan_stopped = True  # Начальное состояние: сканирование остановлено
+        self.scan_thread = None  # Поток сканирования
+        self.scheduler = None  # Планировщик сканирований текущего запуска
+        self.launch_after = None  # Запуск, ожидающий загрузки истории
+        # Калибровочные профили RSSI адаптеров (если файл есть)
+        if rssi_profiles and os.path.exists(rssi_profiles):
+            try:
+                load_profiles(rssi_profiles)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ошибка загрузки профилей RSSI: {e}")
+        # Источники сканирований (по одному на адаптер): netsh, iw, nmcli
+        # или воспроизведение записей
+        self.scanners = list(scanners) if scanners else [default_scanner()]
+        self.scan_interval = scan_interval  # Пауза между сканированиями (с)
+        self.results = ScanResults()  # Очередь снимков от потока сканирования
+        # Потоковая статистика по BSSID (обновляется в потоке сканирования)
+        self.stats = SignalStats()
+        # События изменений между отображёнными снимками: таблица и график
+        # по каналам обрабатывают только изменения
+        self.differ = SnapshotDiffer()
+        # Группировка BSSID в физические точки доступа и роуминг
+        # (создаются с первым сканированием: модуль использует NumPy)
+        self.grouper = None
+        self.roaming = None
+        # Сеанс анализа: меняется при остановке сканирования и сбросе состояния.
+        # Поток сканирования прежнего запуска может ещё выполнять analyze();
+        # его снимки отбрасываются и не попадают в состояние нового сеанса
+        self.session = 0
+        self.session_lock = threading.Lock()
+        self.collapse_aps = False  # Таблица и графики по физическим точкам доступа
+        self.shown_snapshot = None  # Последний отображённый снимок (до группировки)
+        # Полное обновление графика раз в N снимков; за N снимков таблица
+        # обновляет и строки без событий (N <= 1 — всё на каждом снимке)
+        self.full_refresh = max(1, int(full_refresh or 1))
+        self.applied = 0  # Число отображённых снимков
+        self.history_path = history_path  # Журнал сканирований (или None)
+        self.history = None  # Фоновая запись истории (создаётся при загрузке)
+        self.timeseries = None  # Ряды графика динамики сигнала (из журнала)
+        self.update_signal_level = None  # Графики создаются при первых данных
+        self.update_temporal = None
+        # Воспроизведение записанного обследования (None — живое сканирование)
+        self.replay = None  # Открытая запись (ReplaySession)
+        self.replay_clock = None  # Положение и скорость воспроизведения
+        self.replay_bar = None  # Панель управления воспроизведением
+        self.replay_shown = None  # Время отображённого сканирования записи
+        self.replay_after = None  # Запланированный кадр воспроизведения
+        self.replay_seek_after = None  # Отложенный переход по ползунку
+        self.perf_bar = None  # Строка замеров производительности (F12)
+        self.perf_after = None  # Запланированное обновление строки замеров
+        self.survey_window = None  # Окно обследования помещения (SurveyWindow)
 
     def on_close(self):
         """
         Завершение процесса принудительным способом при закрытии окна.
         """
+        if self.history is not None:
+            self.history.close()  # Дописываем накопленную историю
         pid = os.getpid()  # Получаем PID текущего процесса
         os.kill(
             pid, 9
@@ -56,7 +319,7 @@ class WifiAnalyzerInterface(tk.Tk):
         btn_scan_stop.grid(row=0, column=1, padx=5)  # Вторая кнопка справа от первой
 
         # Фильтры по частотному диапазону
-        buttons = ["Все сети", "2.4 GHz", "5 GHz"]  # Варианты фильтров
+        buttons = ["Все сети"] + list(BANDS)  # Варианты фильтров
         for idx, freq in enumerate(buttons):
             cmd = lambda x=freq: self.filter_by_frequency(
                 x
@@ -66,6 +329,28 @@ class WifiAnalyzerInterface(tk.Tk):
                 row=0, column=idx + 2, padx=5
             )  # Каждую кнопку размещаем рядом друг с другом
 
+        # Воспроизведение записанного обследования
+        btn_replay = ttk.Button(
+            menu_frame, text="Открыть запись...", command=self.choose_replay
+        )
+        btn_replay.grid(row=0, column=len(buttons) + 2, padx=5)
+
+        # Обследование помещения с картами покрытия по плану
+        btn_survey = ttk.Button(
+            menu_frame, text="Обследование...", command=self.open_survey
+        )
+        btn_survey.grid(row=0, column=len(buttons) + 3, padx=5)
+
+        # Одна строка на физическую точку доступа вместо каждого BSSID
+        self.collapse_var = tk.BooleanVar(value=self.collapse_aps)
+        ttk.Checkbutton(
+            menu_frame,
+            text="Физические точки доступа",
+            variable=self.collapse_var,
+            command=self.toggle_collapse,
+        ).grid(row=0, column=len(buttons) + 4, padx=5)
+        self.menu_frame = menu_frame
+
         # Основной контейнер компонентов
         main_container = ttk.Frame(self)
         main_container.pack(
@@ -79,17 +364,7 @@ class WifiAnalyzerInterface(tk.Tk):
         )  # Таблица располагается сверху контейнера
 
         # Определение структуры таблицы
-        columns = (
-            "№",
-            "Имя сети (SSID)",
-            "Канал",
-            "Сила сигнала (%)",
-            "Сила сигнала (dBm)",
-            "Тип сети",
-            "Проверка подлинности",
-            "Шифрование",
-            "Тип радио",
-        )
+        columns = COLUMNS
         self.tree = ttk.Treeview(
             table_frame, columns=columns, show="headings"
         )  # Дерево таблиц
@@ -114,10 +389,35 @@ class WifiAnalyzerInterface(tk.Tk):
             )  # Параметры колонок
 
         # Графическая область для отображения двух видов графиков
-        graph_container = ttk.Frame(main_container)
-        graph_container.pack(
+        self.graph_container = ttk.Frame(main_container)
+        self.graph_container.pack(
             side=tk.BOTTOM, fill=tk.BOTH, expand=True
         )  # Расположены внизу экрана
+        # Заглушка до появления первых данных
+        self.graph_placeholder = ttk.Label(
+            self.graph_container, text="Ожидание данных сканирования...", anchor=tk.CENTER
+        )
+        self.graph_placeholder.pack(fill=tk.BOTH, expand=True)
+
+        # Упаковка остальных элементов
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll_v.pack(side=tk.RIGHT, fill=tk.Y)
+        scroll_h.pack(side=tk.BOTTOM, fill=tk.X)
+
+    def create_graphs(self):
+        """Импортирует Matplotlib и создаёт оба графика (при первых данных)."""
+        from graphs import (
+            draw_signal_level_graph,  # Функция для рисования графика уровня сигнала
+            draw_temporal_signal_graph,  # Функция для рисования графика динамики сигнала
+        )
+
+        self.graph_placeholder.destroy()
+        graph_container = self.graph_container
+        if self.timeseries is None:
+            from timeseries import TimeSeriesStore
+
+            # Общее хранилище рядов: воспроизведение записи заполняет его заново
+            self.timeseries = TimeSeriesStore()
 
         # Левый график: уровень сигнала по каналам
         graph_left, update_left, deactivate_left = draw_signal_level_graph(
@@ -129,7 +429,7 @@ class WifiAnalyzerInterface(tk.Tk):
 
         # Правый график: временная динамика сигнала
         graph_right, update_right, deactivate_right = draw_temporal_signal_graph(
-            graph_container
+            graph_container, store=self.timeseries
         )
         graph_right.get_tk_widget().pack(
             side=tk.RIGHT, fill=tk.BOTH, expand=True
@@ -141,80 +441,185 @@ class WifiAnalyzerInterface(tk.Tk):
         self.update_temporal = update_right
         self.deactivate_temporal = deactivate_right
 
-        # Упаковка остальных элементов
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scroll_v.pack(side=tk.RIGHT, fill=tk.Y)
-        scroll_h.pack(side=tk.BOTTOM, fill=tk.X)
-
     def sort_column(self, col_idx):
-        """Метод для сортировки таблицы по указанному индексу колонки."""
-        items = list(self.tree.get_children(""))  # Получаем все элементы таблицы
-        try:
-            items = sorted(
-                items, key=lambda i: self.tree.item(i)["values"][col_idx], reverse=False
-            )  # Сортируем элементы по нужному полю
-        except ValueError:
-            pass  # Игнорируем ошибку, если нельзя отсортировать (например, строковые данные)
-        for idx, item in enumerate(items):
+        """
+        Метод для сортировки таблицы по указанному индексу колонки.
+        Повторный щелчок по заголовку меняет направление сортировки.
+        """
+        previous = self.table.sort_column
+        self.table.set_sort(col_idx)  # Сортировка сохраняется между сканированиями
+        self.tree.heading(previous, text=COLUMNS[previous])  # Снимаем стрелку
+        arrow = " ▼" if self.table.sort_descending else " ▲"
+        self.tree.heading(col_idx, text=COLUMNS[col_idx] + arrow)
+        self.apply_table_order()
+
+    def apply_table_order(self):
+        """Переставляет в Treeview только строки, оказавшиеся не на своём месте."""
+        for item, idx in self.table.moves(self.table.sorted_order()):
             self.tree.move(
                 item, "", idx
             )  # Перемещаем элементы согласно порядку сортировки
 
     def filter_by_frequency(self, choice):
-        """Фильтрует сети по выбранному диапазону частот."""
-        if choice == "Все сети":
-            filtered_data = self.network_data  # Показывать все доступные сети
-        elif choice == "2.4 GHz":
-            filtered_data = {
-                key: val
-                for key, val in self.network_data.items()
-                if any(int(net["канал"]) <= 13 for net in val)
-            }  # Оставляем только сети с каналом ≤ 13
-        elif choice == "5 GHz":
-            filtered_data = {
-                key: val
-                for key, val in self.network_data.items()
-                if any(int(net["канал"]) >= 36 for net in val)
-            }  # Оставляем только сети с каналом ≥ 36
-        self.populate_table(filtered_data)  # Обновляем таблицу фильтрованными данными
-
-    def populate_table(self, data):
-        """Обновляет содержимое таблицы новыми данными."""
-        self.tree.delete(*self.tree.get_children())  # Удаляем старые записи
-        row_id = 1  # Начинаем нумеровать строки заново
-        for _, networks in sorted(data.items()):
-            for net in networks:
-                values = (
-                    row_id,
-                    net.get("ssid"),
-                    net.get("канал"),
-                    f"{net.get('signal_strength')}%",
-                    net.get("signal_dbm"),
-                    net.get("тип_сети"),
-                    net.get("проверка_подлинности"),
-                    net.get("шифрование"),
-                    net.get("тип_радио"),
-                )
-                self.tree.insert(
-                    "", tk.END, values=values
-                )  # Добавляем новую запись в таблицу
-                row_id += 1  # Следующий порядковый номер строки
+        """Фильтрует точки доступа по выбранному диапазону частот."""
+        self.frequency_filter = choice  # Фильтр действует и для следующих сканирований
+        self.populate_table(self.network_data)  # Обновляем таблицу фильтрованными данными
 
-    def update_ui(self):
-        """Обновляет интерфейс: считывает данные из файла и обновляет графики и таблицу."""
+    def filtered_data(self, data):
+        """Точки доступа снимка, попадающие в выбранный диапазон частот."""
+        if self.frequency_filter == "Все сети":
+            return data  # Показывать все доступные сети
+        # Выборка из индекса диапазонов, построенного один раз для снимка
+        return data.for_band(self.frequency_filter)
+
+    @traced()
+    def populate_table(self, data, only=None):
+        """
+        Обновляет содержимое таблицы новыми данными (строка на каждый BSSID).
+        В Treeview передаются только изменения: новые, изменённые и исчезнувшие строки.
+        only — BSSID, затронутые событиями (None — проверить все строки).
+        """
+        if only is not None and not only:
+            return  # Снимок без изменений
+        added, changed, removed = self.table.diff(
+            self.filtered_data(data), data.stats, only
+        )
+        if removed:
+            self.tree.delete(*removed)  # Удаляем исчезнувшие точки доступа
+        for bssid, values in changed:
+            self.tree.item(bssid, values=values)  # Обновляем изменившиеся строки
+        for bssid, values in added:
+            self.tree.insert(
+                "", tk.END, iid=bssid, values=values
+            )  # Добавляем новую запись в таблицу
+        if self.table.needs_sort:
+            self.apply_table_order()  # Сохраняем текущую сортировку
+
+    def load_saved_networks(self, path="parsed_networks.json"):
+        """Публикует сохранённый снимок сетей для первоначального отображения."""
         try:
-            with open("parsed_networks.json", "r", encoding="utf-8") as file:
-                self.network_data = json.load(
-                    file
-                )  # Загружаем сохранённые данные о сетях
+            self.results.publish(load_snapshot(path))
         except Exception as e:
             print(f"Ошибка загрузки файла: {e}")
-            return
+
+    def restore_history(self):
+        """
+        Загружает из журнала сканирований ряды графика динамики сигнала
+        за окно хранения и публикует последний записанный снимок.
+        Возвращает True, если в журнале нашлись данные.
+        """
+        if not self.history_path or not os.path.exists(self.history_path):
+            return False
+        from scanlog import ScanLog
+        from timeseries import TimeSeriesStore
+
+        store = TimeSeriesStore()
+        try:
+            with ScanLog(self.history_path) as log:
+                snapshot = log.latest_snapshot()
+                if snapshot is None:
+                    return False
+                start = snapshot.timestamp - store.retention
+                for ssid, (times, values) in log.ssid_series(start).items():
+                    store.load(ssid, times, values)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка чтения журнала сканирований: {e}")
+            return False
+        self.timeseries = store  # Подхватывается графиком при его создании
+        self.results.publish(snapshot)
+        return True
+
+    def load_initial_data(self):
+        """
+        Загрузка при запуске (в фоновом потоке): история из журнала прошлых
+        запусков или сохранённый снимок, затем открытие журнала для записи.
+        """
+        if not self.restore_history():
+            self.load_saved_networks()
+        if self.history_path:
+            from scanlog import ScanLogSink
+
+            try:
+                self.history = ScanLogSink(self.history_path)
+            except (OSError, ValueError) as e:
+                print(f"Ошибка открытия журнала сканирований: {e}")
+
+    def update_ui(self):
+        """Обновляет интерфейс последним снимком из очереди (вызывать из главного потока)."""
+        self.dispatcher.poll()
+
+    @traced()
+    def apply_snapshot(self, snapshot, now=None):
+        """
+        Отображает снимок в графиках и таблице (только главный поток Tk).
+        now — текущее время графика динамики (при воспроизведении — время записи).
+        """
+        self.shown_snapshot = snapshot
+        self.report_roaming(snapshot.roams)
+        # Таблица и графики могут показывать физические точки доступа;
+        # исходный снимок (по BSSID) остаётся для обследования
+        shown = snapshot
+        if self.collapse_aps and self.grouper is not None:
+            shown = self.grouper.collapse(snapshot)  # Без виртуальных BSSID
+        self.network_data = shown
+        if self.update_signal_level is None:
+            self.create_graphs()  # Первые данные: создаём графики
+
+        events = self.differ.diff(shown)  # Изменения с прошлого отображения
+        self.report_events(events)
+        self.applied += 1
+        # График по каналам периодически перерисовывается полностью
+        full = self.full_refresh <= 1 or self.applied % self.full_refresh == 1
+        # Таблица проверяется полностью только на первом снимке; кроме строк
+        # с событиями, на каждом снимке обновляется 1/full_refresh остальных
+        # строк по кругу (уровни в пределах гистерезиса и статистика), так что
+        # строка отстаёт не больше чем на full_refresh снимков, а работа
+        # распределена по снимкам равномерно
+        only = None
+        if self.full_refresh > 1 and self.applied > 1:
+            only = changed_bssids(events)
+            only.update(self.table.refresh_batch(self.full_refresh))
 
         # Обновляем графики и таблицу
-        self.update_signal_level(self.network_data)
-        self.update_temporal(self.network_data)
-        self.populate_table(self.network_data)
+        if events or full:
+            self.update_signal_level(self.network_data)
+        self.update_temporal(self.network_data, now)  # Ось времени сдвигается всегда
+        self.populate_table(self.network_data, only)
+        # Точки обследования получают только живые сканирования с реальными
+        # уровнями каждого BSSID, без группировки
+        if self.survey_window is not None and self.replay is None:
+            self.survey_window.on_snapshot(snapshot)
+
+    def report_events(self, events):
+        """Предупреждения о событиях, требующих внимания (ослабление защиты)."""
+        for event in events:
+            if event.kind == SECURITY_DOWNGRADED:
+                old_auth, old_cipher = event.old
+                new_auth, new_cipher = event.new
+                print(
+                    f"Внимание: защита сети {event.ssid} ({event.bssid}) ослаблена: "
+                    f"{old_auth}/{old_cipher} -> {new_auth}/{new_cipher}"
+                )
+
+    def report_roaming(self, roams):
+        """Сообщает о смене лучшей физической точки доступа сетей."""
+        for event in roams:
+            old = "нет сигнала" if event.old_dbm is None else f"{event.old_dbm} dBm"
+            print(
+                f"Роуминг: сеть {event.ssid}: {event.old} ({old}) "
+                f"-> {event.new} ({event.new_dbm} dBm)"
+            )
+
+    def toggle_collapse(self):
+        """Переключает таблицу и графики между BSSID и физическими точками доступа."""
+        self.collapse_aps = self.collapse_var.get()
+        self.differ = SnapshotDiffer()  # Набор строк меняется целиком
+        self.applied = 0
+        if self.shown_snapshot is not None:
+            snapshot = self.shown_snapshot
+            snapshot.roams = []  # Уже сообщены
+            now = self.replay_clock.position if self.replay is not None else None
+            self.apply_snapshot(snapshot, now=now)
 
     def stop_scanning(self):
         """
@@ -223,32 +628,364 @@ class WifiAnalyzerInterface(tk.Tk):
         self.scan_stopped = (
             True  # Устанавливаем флаг, сообщающий о прекращении сканирования
         )
+        if self.launch_after is not None:
+            self.after_cancel(self.launch_after)  # Запуск ещё не состоялся
+            self.launch_after = None
+        with self.session_lock:
+            self.session += 1  # Запоздавшие снимки запуска отбрасываются
+        if self.scheduler is not None:
+            self.scheduler.stop()  # Прерываем ожидание и незавершённые команды
+            # Поток сканирования держит свою ссылку и завершится сам;
+            # повторная остановка ничего не делает
+            self.scheduler = None
 
     def start_scanning(self):
         """
         Запускает процесс сканирования.
         """
+        if not self.scan_stopped:
+            return  # Сканирование уже идёт
+        self.close_replay()  # Возврат из режима воспроизведения
         self.scan_stopped = False  # Снимаем флаг остановки
+        self.launch_scanning()
+
+    def launch_scanning(self):
+        """
+        Создаёт планировщик и поток сканирования. История должна быть
+        загружена до первых новых снимков: пока загрузка идёт, проверка
+        повторяется через after(), не блокируя главный поток.
+        """
+        self.launch_after = None
+        if self.scan_stopped:
+            return
+        if self.loader.is_alive():
+            self.launch_after = self.after(50, self.launch_scanning)
+            return
+        # Новый планировщик на каждый запуск: старый поток завершится сам
+        self.scheduler = AsyncScanScheduler(
+            self.scanners, period=self.scan_interval
+        )
         self.scan_thread = threading.Thread(
-            target=self.scan_and_update
+            target=self.scan_and_update,
+            args=(self.scheduler, self.session),
+            daemon=True,
         )  # Создаем поток для фоновой обработки
         self.scan_thread.start()  # Запускаем поток
 
-    def scan_and_update(self):
-        """
-        Выполняет циклический процесс сканирования и обновления данных.
-        Продолжает работать пока не будет установлено условие остановки.
-        """
-        while not self.scan_stopped:
-            result_lines = (
-                scan_wifi_net()
-            )  # Запрашивает сканирование беспроводных сетей
-            networks = parse_windows_scan_results(
-                result_lines
-            )  # Парсим полученные результаты
-            with open("parsed_networks.json", "w", encoding="utf-8") as file:
-                json.dump(
-                    networks, file, ensure_ascii=False, indent=4
-                )  # Сохраняем результаты в файл
-            self.update_ui()  # Обновляем интерфейс с новыми данными
-            time.sleep(1)  # Пауза между итерациями сканирования
+    def publish_snapshot(self, snapshot, session=None):
+        """
+        Передаёт снимок интерфейсу и в историю (вызывается из потока сканирования).
+        session — сеанс анализа, в котором запущено сканирование: снимок
+        устаревшего сеанса отбрасывается.
+        """
+        with self.session_lock:
+            if session is not None and session != self.session:
+                return  # Сканирование уже остановлено, состояние могло смениться
+            self.analyze(snapshot)
+            self.results.publish(snapshot)  # Передаём снимок интерфейсу
+        if self.history is not None:
+            self.history.submit(snapshot)  # Сохранение истории в фоне
+
+    def reset_analysis(self):
+        """
+        Новый сеанс анализа: статистика, группировка и события изменений
+        начинаются заново. Ждёт окончания analyze() в потоке сканирования;
+        снимки прежнего сеанса, обработанные позже, отбрасываются.
+        """
+        with self.session_lock:
+            self.session += 1
+            self.stats = SignalStats()
+            self.grouper = self.roaming = None
+            self.differ = SnapshotDiffer()
+            self.applied = 0
+        self.results.latest()  # Снимки прежнего сеанса, ещё не показанные
+
+    def analyze(self, snapshot):
+        """
+        Статистика, группировка BSSID в физические точки доступа и роуминг.
+        Выполняется для каждого сканирования, даже если интерфейс покажет
+        не каждый снимок.
+        """
+        with span("stats_update"):
+            snapshot.stats = self.stats.update(snapshot)
+        with span("ap_grouping"):
+            if self.grouper is None:
+                from apgroups import ApGrouper, RoamingDetector
+
+                self.grouper = ApGrouper()
+                self.roaming = RoamingDetector()
+            self.grouper.update(snapshot)
+            snapshot.roams = self.roaming.update(snapshot, self.grouper.group_of)
+
+    def toggle_profiling(self):
+        """
+        Включает или выключает замеры времени участков цикла сканирования
+        и строку состояния с их перцентилями.
+        """
+        if TRACER.enabled:
+            TRACER.disable()
+            if self.perf_after is not None:
+                self.after_cancel(self.perf_after)
+                self.perf_after = None
+            self.perf_bar.destroy()
+            self.perf_bar = None
+            return
+
+        TRACER.reset()
+        TRACER.enable()
+        bar = ttk.Frame(self)
+        bar.pack(side=tk.BOTTOM, fill=tk.X, before=self.menu_frame)
+        self.perf_label = ttk.Label(bar, text="Замеры включены...", anchor=tk.W)
+        self.perf_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        ttk.Button(bar, text="Сохранить трассу...", command=self.save_trace).pack(
+            side=tk.RIGHT, padx=5
+        )
+        self.perf_bar = bar
+        self.update_perf_bar()
+
+    def update_perf_bar(self):
+        """Обновляет строку замеров (раз в секунду, пока замеры включены)."""
+        self.perf_after = None
+        if self.perf_bar is None:
+            return
+        summary = TRACER.summary()
+        if summary:
+            self.perf_label.configure(text=format_summary(summary))
+        self.perf_after = self.after(1000, self.update_perf_bar)
+
+    def save_trace(self):
+        """Сохраняет накопленные замеры в формате Chrome Trace (JSON)."""
+        path = filedialog.asksaveasfilename(
+            title="Сохранить трассу",
+            defaultextension=".json",
+            filetypes=[("Chrome Trace", "*.json"), ("Все файлы", "*.*")],
+        )
+        if path:
+            try:
+                TRACER.export_chrome_trace(path)
+            except OSError as e:
+                showinfo("Трасса", f"Ошибка записи трассы: {e}")
+
+    def open_survey(self):
+        """Открывает окно обследования помещения (или поднимает открытое)."""
+        if self.survey_window is not None:
+            self.survey_window.lift()
+            return
+        self.survey_window = SurveyWindow(self)
+
+        def closed():
+            self.survey_window.destroy()
+            self.survey_window = None
+
+        self.survey_window.protocol("WM_DELETE_WINDOW", closed)
+
+    def choose_replay(self):
+        """Выбор файла записи обследования для воспроизведения."""
+        path = filedialog.askopenfilename(
+            title="Открыть запись обследования",
+            filetypes=[("Журнал сканирований", "*.scanlog"), ("Все файлы", "*.*")],
+        )
+        if path:
+            self.open_replay(path)
+
+    def open_replay(self, path):
+        """
+        Открывает запись в фоновом потоке (индекс записи строится за один
+        проход по журналу) и переключает окно в режим воспроизведения.
+        """
+        self.stop_scanning()  # Живые снимки не смешиваются с записью
+        self.close_replay()
+        interval = self.timeseries.bucket_seconds if self.timeseries else 60.0
+        result = {}
+
+        def load():
+            from replay import ReplaySession
+
+            try:
+                result["session"] = ReplaySession(path, interval=interval)
+            except (OSError, ValueError) as e:
+                result["error"] = e
+
+        loader = threading.Thread(target=load, daemon=True)
+        loader.start()
+
+        def wait():
+            if loader.is_alive():
+                self.after(50, wait)  # Окно остаётся отзывчивым во время загрузки
+            elif "error" in result:
+                showinfo("Воспроизведение", f"Ошибка чтения записи: {result['error']}")
+            elif not len(result["session"]):
+                result["session"].close()
+                showinfo("Воспроизведение", "Запись не содержит сканирований")
+            else:
+                self.start_replay(result["session"])
+
+        wait()
+
+    def start_replay(self, session):
+        """Режим воспроизведения: панель управления и первый кадр записи."""
+        from replay import ReplayClock
+
+        self.replay = session
+        self.replay_clock = ReplayClock(session.start, session.end)
+        self.dispatcher.stop()  # Запоздавшие живые снимки не отображаются
+        self.create_replay_bar()
+        self.seek_replay(session.start)
+
+    def create_replay_bar(self):
+        """Панель воспроизведения: пуск/пауза, скорость, ползунок времени."""
+        from replay import SPEEDS
+
+        bar = ttk.Frame(self)
+        bar.pack(fill=tk.X, pady=(0, 10), after=self.menu_frame)
+        self.replay_bar = bar
+
+        self.replay_button = ttk.Button(
+            bar, text="▶", width=3, command=self.toggle_replay
+        )
+        self.replay_button.pack(side=tk.LEFT, padx=5)
+
+        self.replay_speed = tk.StringVar(value=f"{SPEEDS[0]}×")
+        speed = ttk.Combobox(
+            bar,
+            textvariable=self.replay_speed,
+            values=[f"{value}×" for value in SPEEDS],
+            width=5,
+            state="readonly",
+        )
+        speed.bind("<<ComboboxSelected>>", self.on_replay_speed)
+        speed.pack(side=tk.LEFT, padx=5)
+
+        self.replay_scale = ttk.Scale(
+            bar,
+            from_=self.replay.start,
+            to=max(self.replay.end, self.replay.start + 1),
+            orient=tk.HORIZONTAL,
+            command=self.on_replay_scale,
+        )
+        self.replay_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self._scale_updating = False  # Ползунок двигает само воспроизведение
+
+        self.replay_label = ttk.Label(bar, width=20)
+        self.replay_label.pack(side=tk.LEFT, padx=5)
+
+        ttk.Button(
+            bar, text="Завершить воспроизведение", command=self.close_replay
+        ).pack(side=tk.LEFT, padx=5)
+
+    def toggle_replay(self):
+        """Пуск или пауза воспроизведения."""
+        clock = self.replay_clock
+        if clock.playing:
+            clock.pause()
+            self.replay_button.configure(text="▶")
+        else:
+            clock.play()
+            self.replay_button.configure(text="⏸")
+            if clock.position < (self.replay_shown or clock.start):
+                self.seek_replay(clock.position)  # Повтор записи с начала
+            self.schedule_replay()
+
+    def on_replay_speed(self, event=None):
+        self.replay_clock.speed = float(self.replay_speed.get().rstrip("×"))
+
+    def on_replay_scale(self, value):
+        """Перемещение ползунка: переход выполняется после паузы в движении."""
+        if self._scale_updating:
+            return
+        if self.replay_seek_after is not None:
+            self.after_cancel(self.replay_seek_after)
+        self.replay_seek_after = self.after(
+            100, lambda: self.seek_replay(float(value))
+        )
+
+    def seek_replay(self, position):
+        """
+        Переход к моменту записи: ряды графика динамики восстанавливаются
+        из предвычисленных свёрток и короткого окна исходных записей,
+        статистика и события изменений начинаются заново.
+        """
+        self.replay_seek_after = None
+        if self.replay is None:
+            return
+        if self.update_signal_level is None:
+            self.create_graphs()
+        self.replay_clock.seek(position)
+        position = self.replay_clock.position
+        self.replay.fill_store(self.timeseries, position)
+        self.reset_analysis()
+        self.replay_shown = None
+        self.show_replay_frame(position)
+
+    def show_replay_frame(self, position):
+        """Отображает сканирование записи, действовавшее в момент position."""
+        scan_time = self.replay.scan_time(position)
+        if scan_time != self.replay_shown:
+            if self.replay_shown is not None and scan_time > self.replay_shown:
+                # Сканирования между кадрами попадают в ряды графика динамики
+                for ssid, (times, values) in self.replay.levels(
+                    self.replay_shown, scan_time
+                ).items():
+                    for timestamp, value in zip(times.tolist(), values.tolist()):
+                        self.timeseries.append(ssid, timestamp, value)
+            snapshot = self.replay.snapshot_at(scan_time)
+            with self.session_lock:
+                self.analyze(snapshot)
+            self.replay_shown = scan_time
+            self.apply_snapshot(snapshot, now=position)
+
+        self._scale_updating = True
+        try:
+            self.replay_scale.set(position)
+        finally:
+            self._scale_updating = False
+        self.replay_label.configure(
+            text=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(position))
+        )
+
+    def schedule_replay(self):
+        if self.replay_after is None:
+            self.replay_after = self.after(
+                self.dispatcher.interval_ms, self.replay_frame
+            )
+
+    def replay_frame(self):
+        """Очередной кадр воспроизведения (с частотой обновления окна)."""
+        self.replay_after = None
+        if self.replay is None:
+            return
+        clock = self.replay_clock
+        self.show_replay_frame(clock.advance())
+        if clock.playing:
+            self.schedule_replay()
+        else:
+            self.replay_button.configure(text="▶")  # Запись закончилась
+
+    def close_replay(self):
+        """Завершает воспроизведение и возвращает окно к живому сканированию."""
+        if self.replay is None:
+            return
+        for after_id in (self.replay_after, self.replay_seek_after):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        self.replay_after = self.replay_seek_after = None
+        self.replay.close()
+        self.replay = self.replay_clock = self.replay_shown = None
+        self.replay_bar.destroy()
+        self.replay_bar = None
+        # Данные записи не смешиваются с последующими живыми сканированиями
+        if self.timeseries is not None:
+            self.timeseries.clear()
+        self.reset_analysis()
+        self.network_data = ScanSnapshot()
+        self.populate_table(self.network_data)
+        self.dispatcher.start()
+
+    def scan_and_update(self, scheduler, session=None):
+        """
+        Выполняет циклический процесс сканирования в фоновом потоке.
+        Все адаптеры сканируются одновременно с постоянным периодом;
+        интерфейс не трогается: снимки передаются через очередь диспетчеру.
+        Продолжает работать пока не будет вызван stop_scanning.
+        """
+        scheduler.run_forever(lambda snapshot: self.publish_snapshot(snapshot, session))
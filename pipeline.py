@@ -0,0 +1,122 @@
+import json
+import queue
+import threading
+import time
+from records import ScanSnapshot
+from tracing import span
+
+
+class ScanResults:
+    """
+    Очередь результатов сканирования между потоком сканирования и интерфейсом.
+    Поток сканирования публикует снимки, интерфейс забирает самый свежий.
+    """
+
+    def __init__(self, maxsize=16):
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def publish(self, snapshot):
+        """Передаёт снимок интерфейсу; при переполнении вытесняется самый старый."""
+        while True:
+            try:
+                self._queue.put_nowait(snapshot)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def latest(self):
+        """Забирает все накопившиеся снимки и возвращает последний (или None)."""
+        snapshot = None
+        while True:
+            try:
+                snapshot = self._queue.get_nowait()
+            except queue.Empty:
+                return snapshot
+
+
+def encode_snapshot(snapshot):
+    """Компактная строка JSON для журнала сканирований."""
+    return json.dumps(
+        {"timestamp": snapshot.timestamp, "networks": snapshot.to_networks()},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def load_snapshot(path):
+    """Загружает снимок из файла в формате parsed_networks.json."""
+    with open(path, "r", encoding="utf-8") as file:
+        return ScanSnapshot.from_networks(json.load(file))
+
+
+class HistorySink:
+    """
+    Асинхронная запись истории сканирований в файл JSON Lines (только дозапись).
+    Снимки сериализуются в отдельном потоке и пишутся пачками,
+    поэтому submit() никогда не блокирует обновление интерфейса.
+    """
+
+    _STOP = object()  # Признак завершения работы потока записи
+
+    def __init__(self, path, batch_size=10, flush_interval=5.0, maxsize=1000):
+        self.path = path
+        self.batch_size = batch_size  # Максимум снимков в одной записи
+        self.flush_interval = flush_interval  # Максимальная задержка записи (с)
+        self.dropped = 0  # Снимки, отброшенные из-за переполнения очереди
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, snapshot):
+        """Ставит снимок в очередь на запись без ожидания."""
+        try:
+            self._queue.put_nowait(snapshot)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """Дописывает накопленные снимки и останавливает поток записи."""
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+    def encode(self, snapshot):
+        """Сериализует снимок в потоке записи."""
+        return encode_snapshot(snapshot)
+
+    def _run(self):
+        batch = []  # Сериализованные, но ещё не записанные снимки
+        deadline = None  # Момент обязательной записи текущей пачки
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is self._STOP:
+                self._write(batch)
+                return
+            if item is not None:
+                batch.append(self.encode(item))
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (
+                len(batch) >= self.batch_size or time.monotonic() >= deadline
+            ):
+                with span("history_write"):
+                    self._write(batch)
+                batch = []
+                deadline = None
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write("\n".join(batch) + "\n")
+        except OSError as e:
+            print(f"Ошибка записи истории сканирований: {e}")
@@ -0,0 +1,292 @@
+import time
+from dataclasses import dataclass
+from bands import BandIndex, parse_band_label
+
+
+# Ключи словаря сети (parse_windows_scan_results) -> поля наблюдения
+_DICT_FIELDS = {
+    "ssid": "ssid",
+    "bssid": "bssid",
+    "signal_strength": "signal_strength",
+    "signal_dbm": "signal_dbm",
+    "канал": "channel",
+    "диапазон": "band",
+    "тип_радио": "radio_type",
+    "тип_сети": "network_type",
+    "проверка_подлинности": "authentication",
+    "шифрование": "encryption",
+}
+
+
+@dataclass
+class BssidObservation:
+    """
+    Наблюдение одной точки доступа (BSSID) в рамках одного сканирования.
+    Канал, сигнал и тип радио хранятся отдельно для каждой точки доступа.
+    """
+
+    __slots__ = (
+        "ssid",
+        "bssid",
+        "signal_strength",
+        "signal_dbm",
+        "channel",
+        "band",
+        "radio_type",
+        "network_type",
+        "authentication",
+        "encryption",
+    )
+
+    ssid: str  # Имя сети
+    bssid: str  # MAC-адрес точки доступа
+    signal_strength: object  # Уровень сигнала в % (или None)
+    signal_dbm: object  # Уровень сигнала в dBm (или None)
+    channel: object  # Номер канала (int или None)
+    band: object  # Диапазон, явно указанный сканером ("2.4 GHz"/"5 GHz"/"6 GHz")
+    radio_type: object  # Стандарт связи (802.11n/ac/ax)
+    network_type: object  # Тип сети (Инфраструктура)
+    authentication: object  # Проверка подлинности (WPA2-Personal)
+    encryption: object  # Шифрование (CCMP)
+
+    def __getitem__(self, key):
+        """
+        Доступ по ключам словаря parse_windows_scan_results ("bssid", "канал",
+        "signal_strength", ...) для кода, работавшего со словарями сетей.
+        """
+        try:
+            field = _DICT_FIELDS[key]
+        except KeyError:
+            raise KeyError(key) from None
+        if field == "channel":
+            return "" if self.channel is None else str(self.channel)
+        return getattr(self, field)
+
+    def get(self, key, default=None):
+        """Значение по ключу словаря сети или default."""
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def to_network_dict(self):
+        """Возвращает поля точки доступа в формате словаря parse_windows_scan_results."""
+        return {
+            "bssid": self.bssid,
+            "signal_strength": self.signal_strength,
+            "signal_dbm": self.signal_dbm,
+            "тип_радио": self.radio_type,
+            "канал": "" if self.channel is None else str(self.channel),
+            "диапазон": self.band,
+        }
+
+
+def parse_channel(value):
+    """Преобразует строковое значение канала в число (None, если канал некорректен)."""
+    if isinstance(value, int):
+        return value
+    if value is not None:
+        value = str(value).strip()
+        if value.isdigit():
+            return int(value)
+    return None
+
+
+def _observation_from_fields(network, fields, bssid):
+    """Собирает наблюдение из полей сети и полей конкретной точки доступа."""
+    return BssidObservation(
+        ssid=network.get("ssid", ""),
+        bssid=bssid,
+        signal_strength=fields.get("signal_strength"),
+        signal_dbm=fields.get("signal_dbm"),
+        channel=parse_channel(fields.get("канал")),
+        band=parse_band_label(fields.get("диапазон")),
+        radio_type=fields.get("тип_радио"),
+        network_type=network.get("тип_сети"),
+        authentication=network.get("проверка_подлинности"),
+        encryption=network.get("шифрование"),
+    )
+
+
+class ScanSnapshot:
+    """
+    Результат одного сканирования: наблюдения, проиндексированные по BSSID и по SSID.
+    Агрегаты по SSID вычисляются один раз и кэшируются до следующего изменения.
+    """
+
+    def __init__(self, observations=(), timestamp=None):
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.by_bssid = {}  # BSSID -> наблюдение
+        self.by_ssid = {}  # SSID -> список наблюдений
+        self._best = None  # Кэш: SSID -> самое сильное наблюдение
+        self._levels = None  # Кэш: SSID -> {канал: максимальный dBm}
+        self._band_index = None  # Кэш: индекс диапазонов и каналов
+        self._band_subsets = {}  # Кэш: диапазон -> снимок только этого диапазона
+        self.stats = None  # BSSID -> StatsSummary (заполняется при публикации)
+        self.roams = []  # События роуминга (apgroups.RoamEvent, при публикации)
+        for observation in observations:
+            self.add(observation)
+
+    @classmethod
+    def from_networks(cls, networks, timestamp=None):
+        """
+        Строит снимок из словарей сетей (результат parse_windows_scan_results,
+        содержимое parsed_networks.json или поток iter_windows_scan_results).
+        """
+        if isinstance(networks, dict):
+            networks = (net for group in networks.values() for net in group)
+
+        snapshot = cls(timestamp=timestamp)
+        for network in networks:
+            access_points = network.get("access_points")
+            if access_points:
+                # Подробные данные по каждой точке доступа
+                for ap in access_points:
+                    snapshot.add(_observation_from_fields(network, ap, ap["bssid"]))
+            else:
+                # Старый формат: параметры сети общие для всех её BSSID
+                for bssid in network.get("bssid", []):
+                    snapshot.add(_observation_from_fields(network, network, bssid))
+        return snapshot
+
+    def add(self, observation):
+        """Добавляет наблюдение; для повторного BSSID остаётся более сильный сигнал."""
+        previous = self.by_bssid.get(observation.bssid)
+        if previous is not None:
+            if _signal_key(previous) >= _signal_key(observation):
+                return
+            self.by_ssid[previous.ssid].remove(previous)
+
+        self.by_bssid[observation.bssid] = observation
+        self.by_ssid.setdefault(observation.ssid, []).append(observation)
+        self._best = None  # Сбрасываем кэши агрегатов
+        self._levels = None
+        self._band_index = None
+        self._band_subsets = {}
+
+    def __len__(self):
+        return len(self.by_bssid)
+
+    def __iter__(self):
+        return iter(self.by_bssid.values())
+
+    def __contains__(self, bssid):
+        return bssid in self.by_bssid
+
+    def get(self, bssid, default=None):
+        """Наблюдение по MAC-адресу точки доступа."""
+        return self.by_bssid.get(bssid, default)
+
+    def ssids(self):
+        """Имена всех сетей снимка."""
+        return self.by_ssid.keys()
+
+    def for_ssid(self, ssid):
+        """Все точки доступа сети с указанным SSID."""
+        return self.by_ssid.get(ssid, [])
+
+    def best_by_ssid(self):
+        """Самая сильная точка доступа для каждого SSID."""
+        if self._best is None:
+            self._best = {
+                ssid: max(group, key=_signal_key)
+                for ssid, group in self.by_ssid.items()
+                if group
+            }
+        return self._best
+
+    def best(self, ssid):
+        """Самая сильная точка доступа сети (или None)."""
+        return self.best_by_ssid().get(ssid)
+
+    def channel_levels(self):
+        """Максимальный уровень сигнала (dBm) каждого SSID на каждом из его каналов."""
+        if self._levels is None:
+            levels = {}
+            for observation in self.by_bssid.values():
+                if observation.channel is None or observation.signal_dbm is None:
+                    continue
+                per_channel = levels.setdefault(observation.ssid, {})
+                dbm = float(observation.signal_dbm)
+                if per_channel.get(observation.channel, -1000.0) < dbm:
+                    per_channel[observation.channel] = dbm
+            self._levels = levels
+        return self._levels
+
+    @property
+    def band_index(self):
+        """Индекс диапазон -> канал -> BSSID (строится один раз на снимок)."""
+        if self._band_index is None:
+            self._band_index = BandIndex(self.by_bssid.values())
+        return self._band_index
+
+    def for_band(self, band):
+        """Снимок только с точками доступа указанного диапазона."""
+        subset = self._band_subsets.get(band)
+        if subset is None:
+            subset = self._band_subsets[band] = ScanSnapshot(
+                (self.by_bssid[bssid] for bssid in self.band_index.bssids(band)),
+                timestamp=self.timestamp,
+            )
+        return subset
+
+    def filter(self, predicate):
+        """Новый снимок только с наблюдениями, удовлетворяющими условию."""
+        return ScanSnapshot(
+            (obs for obs in self.by_bssid.values() if predicate(obs)),
+            timestamp=self.timestamp,
+        )
+
+    def to_networks(self):
+        """
+        Преобразует снимок в формат parse_windows_scan_results (SSID -> список сетей).
+        Общие поля сети берутся у самой сильной точки доступа.
+        """
+        networks = {}
+        for ssid, group in self.by_ssid.items():
+            if not group:
+                continue
+            best = self.best(ssid)
+            best_fields = best.to_network_dict()
+            del best_fields["bssid"]  # Вместо одного MAC-адреса сохраняем список
+            network = {
+                "ssid": ssid,
+                "тип_сети": best.network_type,
+                "проверка_подлинности": best.authentication,
+                "шифрование": best.encryption,
+                "bssid": [obs.bssid for obs in group],
+            }
+            network.update(best_fields)
+            network["access_points"] = [obs.to_network_dict() for obs in group]
+            networks[ssid] = [network]
+        return networks
+
+
+def merge_snapshots(snapshots, timestamp=None):
+    """
+    Объединяет снимки нескольких адаптеров в один. Если точку доступа видели
+    несколько адаптеров, остаётся наблюдение с более сильным сигналом.
+    """
+    snapshots = list(snapshots)
+    if timestamp is None:
+        timestamp = max((s.timestamp for s in snapshots), default=None)
+    merged = ScanSnapshot(timestamp=timestamp)
+    for snapshot in snapshots:
+        for observation in snapshot:
+            merged.add(observation)
+    return merged
+
+
+def _signal_key(observation):
+    """Ключ сравнения наблюдений по силе сигнала (отсутствующий сигнал — слабейший)."""
+    if observation.signal_dbm is None:
+        return float("-inf")
+    return float(observation.signal_dbm)
+
+
+def as_snapshot(data):
+    """Приводит данные о сетях (снимок или словарь SSID -> сети) к ScanSnapshot."""
+    if isinstance(data, ScanSnapshot):
+        return data
+    return ScanSnapshot.from_networks(data or {})
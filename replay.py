@@ -0,0 +1,222 @@
+import math
+import time
+import numpy as np
+from scanlog import ScanLog, scan_levels
+
+SPEEDS = (1, 2, 5, 10, 20, 50, 100)  # Скорости воспроизведения записи
+
+
+class SurveyIndex:
+    """
+    Предвычисленные данные записи обследования, строятся за один проход
+    по журналу: время каждого сканирования и уровни сетей, свёрнутые
+    в интервалы по interval секунд (минимум, максимум, среднее).
+    Переход к любому моменту записи использует свёртки для прошлого
+    и читает исходные записи только для короткого окна перед ним.
+    """
+
+    def __init__(self, log, interval=60.0, batch_records=1 << 16):
+        self.interval = interval  # Длительность интервала свёртки (с)
+        self._names = log.tables["ssid"]  # id -> SSID
+        times, parts = [], []
+        # Блоки обрабатываются пачками не меньше batch_records записей.
+        # Последнее сканирование пачки может продолжиться в следующем блоке,
+        # поэтому оно переносится в следующую пачку
+        pending, size = [], 0
+        for records in log.blocks():
+            pending.append(records)
+            size += len(records)
+            if size >= batch_records:
+                records = np.concatenate(pending)
+                tail = records["timestamp"] == records["timestamp"][-1]
+                self._add(records[~tail], times, parts)
+                pending, size = [records[tail]], int(tail.sum())
+        if pending:
+            self._add(np.concatenate(pending), times, parts)
+
+        self.scan_times = (
+            np.unique(np.concatenate(times)) if times else np.empty(0)
+        )  # Время каждого сканирования (по возрастанию)
+        self._buckets = self._merge(parts)  # SSID -> (начало, мин, макс, среднее)
+
+    def _add(self, records, times, parts):
+        """Свёртки одного участка журнала (целые сканирования)."""
+        if not len(records):
+            return
+        times.append(np.unique(records["timestamp"]))
+        ssid, scan_time, level = scan_levels(records)
+        start = np.floor(scan_time / self.interval) * self.interval
+        bounds = np.flatnonzero((np.diff(ssid) != 0) | (np.diff(start) != 0)) + 1
+        bounds = np.concatenate(([0], bounds))
+        parts.append(_reduce(ssid[bounds], start[bounds], level, bounds))
+
+    def _merge(self, parts):
+        """Объединяет свёртки участков: интервал может попасть в несколько блоков."""
+        if not parts:
+            return {}
+        ssid, start, low, high, total, count = (
+            np.concatenate(column) for column in zip(*parts)
+        )
+        order = np.lexsort((start, ssid))
+        ssid, start = ssid[order], start[order]
+        bounds = np.flatnonzero((np.diff(ssid) != 0) | (np.diff(start) != 0)) + 1
+        bounds = np.concatenate(([0], bounds))
+        low = np.fmin.reduceat(low[order], bounds)
+        high = np.fmax.reduceat(high[order], bounds)
+        total = np.add.reduceat(total[order], bounds)
+        count = np.add.reduceat(count[order], bounds)
+        ssid, start = ssid[bounds], start[bounds]
+
+        empty = count == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(empty, np.nan, total / count)
+        low = np.where(empty, np.nan, low)
+        high = np.where(empty, np.nan, high)
+        split = np.flatnonzero(np.diff(ssid)) + 1
+        result = {}
+        columns = (np.split(c, split) for c in (ssid, start, low, high, mean))
+        for group_ssid, *group in zip(*columns):
+            result[self._names[group_ssid[0]]] = tuple(group)
+        return result
+
+    def ssids(self):
+        """Сети, для которых есть свёртки."""
+        return self._buckets.keys()
+
+    def buckets(self, ssid, start, end):
+        """Свёрнутые интервалы сети, целиком лежащие в [start, end)."""
+        starts, low, high, mean = self._buckets[ssid]
+        first = np.searchsorted(starts, start, side="left")
+        last = np.searchsorted(starts, end - self.interval, side="right")
+        window = slice(first, max(first, last))
+        return starts[window], low[window], high[window], mean[window]
+
+
+def _reduce(ssid, start, level, bounds):
+    """Минимум, максимум, сумма и число известных уровней в группах bounds."""
+    valid = ~np.isnan(level)
+    return (
+        ssid,
+        start,
+        np.fmin.reduceat(np.where(valid, level, np.inf), bounds),
+        np.fmax.reduceat(np.where(valid, level, -np.inf), bounds),
+        np.add.reduceat(np.where(valid, level, 0.0).astype(np.float64), bounds),
+        np.add.reduceat(valid.astype(np.int64), bounds),
+    )
+
+
+class ReplaySession:
+    """
+    Воспроизведение записанного обследования (журнала сканирований).
+    Снимки читаются по одному через индекс блоков журнала; ряды графика
+    динамики при переходе восстанавливаются из предвычисленных свёрток.
+    """
+
+    def __init__(self, path, interval=60.0):
+        self.log = ScanLog(path)
+        self.index = SurveyIndex(self.log, interval)
+        self.scan_times = self.index.scan_times
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.scan_times)
+
+    def close(self):
+        self.log.close()
+
+    @property
+    def start(self):
+        """Время первого сканирования записи (None для пустой записи)."""
+        return float(self.scan_times[0]) if len(self.scan_times) else None
+
+    @property
+    def end(self):
+        """Время последнего сканирования записи."""
+        return float(self.scan_times[-1]) if len(self.scan_times) else None
+
+    def scan_time(self, moment):
+        """Время последнего сканирования не позже moment (или первого)."""
+        idx = np.searchsorted(self.scan_times, moment, side="right") - 1
+        return float(self.scan_times[max(0, idx)])
+
+    def snapshot_at(self, moment):
+        """Снимок, действовавший в момент moment (None для пустой записи)."""
+        if not len(self.scan_times):
+            return None
+        scan_time = self.scan_time(moment)
+        return next(self.log.snapshots(scan_time, scan_time), None)
+
+    def levels(self, after, until):
+        """
+        Уровни сетей по сканированиям в интервале (after, until]:
+        SSID -> (время, dBm). Используется при воспроизведении, чтобы ряды
+        графика не теряли сканирования, пропущенные между кадрами.
+        """
+        return self.log.ssid_series(np.nextafter(after, math.inf), until)
+
+    def fill_store(self, store, moment):
+        """
+        Заполняет хранилище рядов графика динамики состоянием на момент
+        moment: исходные отсчёты окна store.raw_window и предвычисленные
+        свёртки за остальное окно хранения. Объём чтения не зависит от
+        длины записи.
+        """
+        interval = self.index.interval
+        fine_start = math.floor((moment - store.raw_window) / interval) * interval
+        retention_start = moment - store.retention
+        series = self.log.ssid_series(fine_start, moment)
+        store.clear()
+        empty = np.empty(0)
+        for ssid in set(series) | set(self.index.ssids()):
+            times, values = series.get(ssid, (empty, empty))
+            if ssid in self.index.ssids():
+                buckets = self.index.buckets(ssid, retention_start, fine_start)
+            else:
+                buckets = None
+            if len(times) or (buckets is not None and len(buckets[0])):
+                store.load(ssid, times, values, buckets)
+
+
+class ReplayClock:
+    """
+    Часы воспроизведения: положение в записи (epoch записи, с), скорость
+    и пауза. Положение продвигается по монотонным часам системы.
+    """
+
+    def __init__(self, start, end, speed=1.0):
+        self.start = start
+        self.end = end
+        self.speed = speed
+        self.position = start
+        self.playing = False
+        self._last = None  # Монотонное время последнего продвижения
+
+    def play(self):
+        if self.position >= self.end:
+            self.position = self.start  # Повтор с начала
+        self.playing = True
+        self._last = time.monotonic()
+
+    def pause(self):
+        self.playing = False
+
+    def seek(self, position):
+        """Переходит к моменту записи (в пределах записи)."""
+        self.position = min(max(position, self.start), self.end)
+        self._last = time.monotonic()
+
+    def advance(self):
+        """Продвигает положение по прошедшему времени; возвращает его."""
+        if self.playing:
+            now = time.monotonic()
+            self.position += (now - self._last) * self.speed
+            self._last = now
+            if self.position >= self.end:
+                self.position = self.end
+                self.playing = False  # Запись закончилась
+        return self.position
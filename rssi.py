@@ -0,0 +1,119 @@
+import json
+from array import array
+from bisect import bisect_left
+
+LEVELS = 101  # Значения качества сигнала 0..100 %
+
+
+class RssiProfile:
+    """
+    Калибровочная таблица пересчёта качества сигнала (0-100 %) в dBm.
+    Таблица вычисляется один раз, поэтому пересчёт — одно обращение по индексу.
+    Компактная копия хранится в массиве float32 (table) и может быть
+    передана в NumPy без копирования: np.frombuffer(profile.table, np.float32).
+    """
+
+    def __init__(self, name, table):
+        if len(table) != LEVELS:
+            raise ValueError(f"Профиль {name}: нужно {LEVELS} значений уровня")
+        self.name = name
+        self.table = array("f", table)  # Уровень dBm для каждого процента (float32)
+        # Значения для быстрого пересчёта (без погрешности float32)
+        self._dbm = tuple(round(float(value), 1) for value in self.table)
+        if any(a > b for a, b in zip(self._dbm, self._dbm[1:])):
+            raise ValueError(f"Профиль {name}: уровни должны не убывать")
+
+    @classmethod
+    def from_points(cls, name, points):
+        """
+        Профиль по опорным точкам [(процент, dBm), ...] с линейной
+        интерполяцией между ними (за крайними точками значение постоянно).
+        """
+        points = sorted((float(p), float(dbm)) for p, dbm in points)
+        if not points:
+            raise ValueError(f"Профиль {name}: нет опорных точек")
+        positions = [p for p, _ in points]
+        table = []
+        for percentage in range(LEVELS):
+            idx = bisect_left(positions, percentage)
+            if idx == 0:
+                table.append(points[0][1])
+            elif idx == len(points):
+                table.append(points[-1][1])
+            else:
+                (p0, d0), (p1, d1) = points[idx - 1], points[idx]
+                table.append(d0 + (d1 - d0) * (percentage - p0) / (p1 - p0))
+        return cls(name, table)
+
+    def to_dbm(self, percentage):
+        """Уровень сигнала в dBm для качества в процентах."""
+        return self._dbm[min(LEVELS - 1, max(0, int(percentage)))]
+
+    def to_percentage(self, dbm):
+        """Обратный пересчёт: наименьший процент с уровнем не ниже dbm."""
+        return min(LEVELS - 1, bisect_left(self._dbm, dbm))
+
+
+# Встроенные профили
+PROFILES = {
+    # Документированное соответствие Windows (WLAN_BSS_ENTRY):
+    # 0 % = -100 dBm, 100 % = -50 dBm
+    "windows": RssiProfile.from_points("windows", [(0, -100), (100, -50)]),
+    # NetworkManager (nmcli): уровень ограничивается диапазоном -100..-40 dBm
+    "networkmanager": RssiProfile.from_points(
+        "networkmanager", [(0, -100), (100, -40)]
+    ),
+    # Прежняя линейная формула: -100..-30 dBm
+    "linear": RssiProfile.from_points("linear", [(0, -100), (100, -30)]),
+}
+DEFAULT_PROFILE = "windows"
+
+ADAPTER_PROFILES = {}  # Имя адаптера -> имя профиля
+
+
+def get_profile(name=None):
+    """Профиль по имени (по умолчанию — DEFAULT_PROFILE)."""
+    try:
+        return PROFILES[name or DEFAULT_PROFILE]
+    except KeyError:
+        raise ValueError(f"Неизвестный профиль RSSI: {name}") from None
+
+
+def profile_for(interface=None, default=None):
+    """Профиль, назначенный адаптеру (или профиль по умолчанию)."""
+    return get_profile(ADAPTER_PROFILES.get(interface, default))
+
+
+def load_profiles(path):
+    """
+    Загружает калибровочные профили из файла JSON:
+
+        {
+          "default": "my-adapter",
+          "profiles": {
+            "my-adapter": {"points": [[0, -95], [60, -67], [100, -35]]},
+            "other": {"table": [... 101 значение dBm ...]}
+          },
+          "adapters": {"Wi-Fi 2": "my-adapter"}
+        }
+
+    Возвращает имена загруженных профилей.
+    """
+    global DEFAULT_PROFILE
+    with open(path, "r", encoding="utf-8") as file:
+        config = json.load(file)
+
+    loaded = []
+    for name, spec in config.get("profiles", {}).items():
+        if "table" in spec:
+            PROFILES[name] = RssiProfile(name, spec["table"])
+        else:
+            PROFILES[name] = RssiProfile.from_points(name, spec["points"])
+        loaded.append(name)
+    for interface, name in config.get("adapters", {}).items():
+        get_profile(name)  # Проверяем, что профиль существует
+        ADAPTER_PROFILES[interface] = name
+    if "default" in config:
+        get_profile(config["default"])
+        DEFAULT_PROFILE = config["default"]
+    return loaded
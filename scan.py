@@ -2,8 +2,12 @@ import subprocess
 import re
 from collections import defaultdict
 import json
+from records import ScanSnapshot
+from rssi import get_profile
+from tracing import traced
 
 
+@traced()
 def scan_wifi_net():
     """
     Выполняет команду для сканирования Wi-Fi сетей в операционной системе Windows.
@@ -32,89 +36,155 @@ def scan_wifi_net():
         return None
 
 
-def percentage_to_dbm(percentage):
+def percentage_to_dbm(percentage, profile=None):
     """
     Преобразует процентное значение уровня сигнала в эквивалентное значение в единицах dBm.
-    Сигнал Wi-Fi измеряется в диапазоне примерно от -100 до -30 dBm.
+    Используется калибровочная таблица профиля (rssi.py), пересчёт — одно обращение
+    по индексу. По умолчанию — документированное соответствие Windows.
     """
-    min_signal = -100  # Нижний предел уровня сигнала в dBm
-    max_signal = -30  # Верхний предел уровня сигнала в dBm
-    dbm_value = min_signal + ((max_signal - min_signal) / 100) * percentage
-    return round(dbm_value, 2)
+    return (profile or get_profile()).to_dbm(percentage)
 
 
-def parse_windows_scan_results(lines):
+def dbm_to_percentage(dbm, profile=None):
     """
-    Анализирует строки результата сканирования Wi-Fi сетей и формирует структуру данных
-    в виде списка сетей с соответствующими параметрами.
+    Обратное преобразование: уровень сигнала в dBm -> проценты (0-100).
+    Используется сканерами, которые сообщают сигнал только в dBm.
     """
-    networks = defaultdict(list)  # Хранилище для списков сетей
-    current_network = {}  # Объект для сбора информации о текущей сети
+    return (profile or get_profile()).to_percentage(dbm)
+
+
+# Заголовки блоков "SSID X" и "BSSID Y" (левая часть строки до двоеточия)
+_BLOCK_HEADER_RE = re.compile(r"(B?SSID)\s+\d+$")
+
+# Таблица диспетчеризации: подпись поля -> ключ в словаре сети.
+# Подписи приведены для русской и английской локализации netsh.
+_NETWORK_FIELDS = {
+    "Тип сети": "тип_сети",  # Тип сети (WPA/WEP/Open)
+    "Network type": "тип_сети",
+    "Проверка подлинности": "проверка_подлинности",  # Аутентификация (PSK/EAP)
+    "Authentication": "проверка_подлинности",
+    "Шифрование": "шифрование",  # Алгоритм шифрования (AES/TKIP)
+    "Encryption": "шифрование",
+    "Тип радио": "тип_радио",  # Стандарт связи (802.11a/b/g/n/ac)
+    "Radio type": "тип_радио",
+    "Канал": "канал",  # Номер канала
+    "Channel": "канал",
+    "Диапазон": "диапазон",  # Диапазон частот (выводится в Windows 11)
+    "Band": "диапазон",
+}
+
+# Подписи строки с уровнем сигнала
+_SIGNAL_LABELS = frozenset(("Сигнал", "Signal"))
+
+# Поля, которые netsh выводит отдельно для каждого BSSID
+_BSSID_FIELDS = frozenset(("тип_радио", "канал", "диапазон"))
+
+
+def _decode_line(line, encoding):
+    """Приводит строку вывода к str (поддерживаются сырые байты)."""
+    if isinstance(line, bytes):
+        return line.decode(encoding, errors="replace")
+    return line
+
+
+def iter_windows_scan_results(lines, encoding="cp866", profile=None):
+    """
+    Потоковый разбор вывода `netsh wlan show networks mode=Bssid`.
+    Принимает любой итератор строк (str или bytes) и выдаёт словарь сети,
+    как только закрывается соответствующий блок SSID.
+    Параметры каждой точки доступа сохраняются в списке "access_points",
+    а поля верхнего уровня по-прежнему относятся к последнему BSSID.
+    profile — калибровочный профиль RSSI адаптера (rssi.RssiProfile).
+    """
+    to_dbm = (profile or get_profile()).to_dbm  # Таблица выбирается один раз
+    current_network = None  # Собираемая сеть
+    current_ap = None  # Собираемая точка доступа (BSSID) текущей сети
 
     for line in lines:
-        if not line.strip():
-            continue  # Пропускаем пустые строки
-
-        # Поиск блоков "SSID X:" и "BSSID Y:"
-        pattern = r"(SSID|BSSID)\s+\d+: (.+)"
-        match = re.search(pattern, line)
-        if match:
-            key, value = match.groups()
-            key = key.lower()  # Приводим ключ к нижнему регистру
-
-            if key == "ssid":
-                # Если нашли новую сеть, записываем предыдущую и начинаем сбор новой
-                if current_network:
-                    # Проверяем наличие обязательного поля 'ssid'
-                    if "ssid" in current_network:
-                        networks[current_network["ssid"]].append(current_network.copy())
-                    else:
-                        print(f"Предупреждение: пропущено имя сети ({value})")
-
-                current_network = {"ssid": value}  # Новая сеть начинается
-
-            elif key == "bssid":
-                # Добавляем MAC-адреса устройств данной сети
-                value = value.strip()
-                current_network.setdefault("bssid", []).append(value)
+        line = _decode_line(line, encoding)
+
+        # Делим строку по первому двоеточию: слева подпись, справа значение
+        label, sep, value = line.partition(":")
+        if not sep:
+            continue  # Пустые и служебные строки без значения
+        label = label.strip()
+        value = value.strip()
+
+        # Обычные поля сети ищем одним обращением к словарю
+        key = _NETWORK_FIELDS.get(label)
+        if key is not None:
+            if current_network is not None:
+                current_network[key] = value
+                if current_ap is not None and key in _BSSID_FIELDS:
+                    current_ap[key] = value
             continue
 
-        # Поиск уровня сигнала
-        if "Сигнал:" in line:
-            signal_match = re.search(r"Сигнал:\s+(\d+)%", line)
-            if signal_match:
-                signal_percentage = int(signal_match.group(1))
-                signal_dbm = percentage_to_dbm(signal_percentage)  # Преобразуем % в dBm
-                current_network["signal_strength"] = (
-                    signal_percentage  # Уровнь сигнала в %
-                )
-                current_network["signal_dbm"] = signal_dbm  # Уровень сигнала в dBm
-                continue
-
-        # Остальные параметры сети
-        additional_params_patterns = {
-            "Тип сети": r"Тип сети\s*:\s*(.*)",  # Тип сети (WPA/WEP/Open)
-            "Проверка подлинности": r"Проверка подлинности\s*:\s*(.*)",  # Аутентификация (PSK/EAP)
-            "Шифрование": r"Шифрование\s*:\s*(.*)",  # Алгоритм шифрования (AES/TKIP)
-            "Тип радио": r"Тип радио\s*:\s*(.*)",  # Стандарт связи (802.11a/b/g/n/ac)
-            "Канал": r"Канал\s*:\s*(.*)",  # Номер канала
-        }
-
-        # Поиск соответствующих параметров
-        for param_name, regex_pattern in additional_params_patterns.items():
-            match = re.search(regex_pattern, line)
-            if match:
-                value = match.group(1).strip()
-                current_network[param_name.lower().replace(" ", "_")] = value
-                break
-
-    # Последнюю сеть добавляем отдельно, если она осталась незакрытой
-    if current_network and "ssid" in current_network:
-        networks[current_network["ssid"]].append(current_network.copy())
+        if label in _SIGNAL_LABELS:
+            if current_network is not None and value.endswith("%"):
+                try:
+                    signal_percentage = int(value[:-1])
+                except ValueError:
+                    continue
+                signal_dbm = to_dbm(signal_percentage)  # Уровень в dBm
+                current_network["signal_strength"] = signal_percentage  # Уровень в %
+                current_network["signal_dbm"] = signal_dbm
+                if current_ap is not None:
+                    current_ap["signal_strength"] = signal_percentage
+                    current_ap["signal_dbm"] = signal_dbm
+            continue
+
+        # Заголовки блоков "SSID X :" и "BSSID Y :"
+        header = _BLOCK_HEADER_RE.match(label)
+        if header is None:
+            continue  # Неизвестное поле (скорости, имя интерфейса и т.п.)
+
+        if header.group(1) == "SSID":
+            # Новая сеть: отдаём предыдущую, если она была
+            if current_network is not None:
+                yield current_network
+            current_network = {"ssid": value}
+            current_ap = None
+        elif current_network is not None:
+            # Добавляем MAC-адрес устройства данной сети
+            current_network.setdefault("bssid", []).append(value)
+            current_ap = {"bssid": value}
+            current_network.setdefault("access_points", []).append(current_ap)
+
+    # Последнюю сеть отдаём отдельно, так как она осталась незакрытой
+    if current_network is not None:
+        yield current_network
+
+
+@traced()
+def parse_windows_scan_results(lines, profile=None):
+    """
+    Анализирует строки результата сканирования Wi-Fi сетей и формирует структуру данных
+    в виде списка сетей с соответствующими параметрами.
+    Обёртка над iter_windows_scan_results для совместимости.
+    """
+    networks = defaultdict(list)  # Хранилище для списков сетей
+    if lines is None:
+        return {}  # Сканирование не удалось
+
+    for network in iter_windows_scan_results(lines, profile=profile):
+        networks[network["ssid"]].append(network)
 
     return dict(networks)
 
 
+@traced()
+def parse_scan_snapshot(lines, timestamp=None, profile=None):
+    """
+    Разбирает вывод netsh сразу в снимок ScanSnapshot,
+    где каждая точка доступа (BSSID) хранится отдельным наблюдением.
+    """
+    if lines is None:
+        return ScanSnapshot(timestamp=timestamp)
+    return ScanSnapshot.from_networks(
+        iter_windows_scan_results(lines, profile=profile), timestamp=timestamp
+    )
+
+
 def print_results(networks):
     """
     Выводит информацию о сетях в консоль.
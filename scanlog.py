@@ -0,0 +1,404 @@
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections import OrderedDict
+import numpy as np
+from bands import BANDS
+from pipeline import HistorySink
+from records import BssidObservation, ScanSnapshot
+
+# Формат журнала сканирований (только дозапись):
+#   заголовок файла MAGIC, затем последовательность блоков.
+#   Блок = заголовок _BLOCK (тип, число записей, t_min, t_max, длина данных)
+#   и данные, сжатые zlib.
+#   Блок STRS — новые строки таблиц интернирования (JSON {таблица: [строки]}),
+#   блок DATA — записи фиксированной ширины, разложенные по столбцам.
+MAGIC = b"WIFILOG1"
+_BLOCK = struct.Struct("<4sIddI")
+_STRINGS = b"STRS"
+_DATA = b"DATA"
+
+# Таблицы интернированных строк; идентификатор 0 означает отсутствие значения
+STRING_TABLES = ("ssid", "authentication", "encryption", "radio_type", "network_type")
+
+# Запись журнала: одно наблюдение одной точки доступа
+RECORD_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),  # Время сканирования (epoch, с)
+        ("bssid", "<u8"),  # MAC-адрес как 48-битное число
+        ("channel", "<i2"),  # Номер канала (-1 — неизвестен)
+        ("signal_dbm", "<f4"),  # Уровень сигнала (NaN — неизвестен)
+        ("signal_strength", "u1"),  # Уровень сигнала в % (255 — неизвестен)
+        ("band", "u1"),  # Диапазон: 0 — неизвестен, иначе индекс в BANDS + 1
+        ("ssid", "<u4"),
+        ("authentication", "<u2"),
+        ("encryption", "<u2"),
+        ("radio_type", "<u2"),
+        ("network_type", "<u2"),
+    ]
+)
+
+_NO_CHANNEL = -1
+_NO_PERCENT = 255
+
+
+def bssid_to_int(bssid):
+    """MAC-адрес "aa:bb:cc:dd:ee:ff" в 48-битное число."""
+    value = int(bssid.replace(":", "").replace("-", ""), 16)
+    if value >> 48:
+        raise ValueError(f"Некорректный BSSID: {bssid}")
+    return value
+
+
+def int_to_bssid(value):
+    """48-битное число в MAC-адрес "aa:bb:cc:dd:ee:ff"."""
+    text = f"{int(value):012x}"
+    return ":".join(text[i : i + 2] for i in range(0, 12, 2))
+
+
+def scan_levels(records):
+    """
+    Уровень каждой сети в каждом сканировании — максимум по её точкам доступа.
+    Возвращает массивы (id SSID, время, dBm), упорядоченные по SSID и времени.
+    """
+    order = np.lexsort((records["timestamp"], records["ssid"]))
+    ssid = records["ssid"][order]
+    times = records["timestamp"][order]
+    dbm = records["signal_dbm"][order]
+    # Границы групп (SSID, время) и максимум уровня в каждой группе
+    bounds = np.flatnonzero((np.diff(ssid) != 0) | (np.diff(times) != 0)) + 1
+    bounds = np.concatenate(([0], bounds))
+    return ssid[bounds], times[bounds], np.fmax.reduceat(dbm, bounds)
+
+
+def _encode_columns(records):
+    """Записи блока, разложенные по столбцам: каждый столбец подряд."""
+    return b"".join(records[name].tobytes() for name in RECORD_DTYPE.names)
+
+
+def _decode_columns(payload, count):
+    """Обратное преобразование _encode_columns."""
+    records = np.empty(count, dtype=RECORD_DTYPE)
+    offset = 0
+    for name in RECORD_DTYPE.names:
+        dtype = RECORD_DTYPE.fields[name][0]
+        size = dtype.itemsize * count
+        records[name] = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+        offset += size
+    return records
+
+
+class ScanLogWriter:
+    """
+    Запись журнала сканирований. Наблюдения накапливаются в памяти и
+    записываются сжатыми блоками по chunk_records записей (или не реже
+    одного раза в max_chunk_age секунд времени сканирования).
+    """
+
+    def __init__(self, path, chunk_records=4096, max_chunk_age=60.0, level=6):
+        self.path = path
+        self.chunk_records = chunk_records  # Записей в одном блоке
+        self.max_chunk_age = max_chunk_age  # Максимальный охват блока по времени (с)
+        self.level = level  # Степень сжатия zlib
+
+        # Таблицы строк продолжают нумерацию существующего журнала
+        self._ids = {name: {None: 0} for name in STRING_TABLES}
+        self._new_strings = {name: [] for name in STRING_TABLES}
+        end = len(MAGIC)
+        if os.path.exists(path) and os.path.getsize(path) >= len(MAGIC):
+            with ScanLog(path) as log:
+                for name, strings in log.tables.items():
+                    self._ids[name] = {value: idx for idx, value in enumerate(strings)}
+                end = log.end
+        self._file = open(path, "r+b" if end > len(MAGIC) else "wb")
+        if end > len(MAGIC):
+            self._file.truncate(end)  # Отбрасываем недописанный блок после сбоя
+            self._file.seek(end)
+        else:
+            self._file.write(MAGIC)
+
+        self._buffer = np.empty(chunk_records, dtype=RECORD_DTYPE)
+        self._size = 0
+
+    def _intern(self, table, value):
+        ids = self._ids[table]
+        idx = ids.get(value)
+        if idx is None:
+            idx = ids[value] = len(ids)
+            self._new_strings[table].append(value)
+        return idx
+
+    def append(self, snapshot):
+        """Добавляет все наблюдения снимка."""
+        timestamp = snapshot.timestamp if snapshot.timestamp is not None else time.time()
+        if self._size and timestamp - self._buffer["timestamp"][0] >= self.max_chunk_age:
+            self.flush()
+        for observation in snapshot:
+            try:
+                bssid = bssid_to_int(observation.bssid)
+            except (AttributeError, ValueError):
+                continue  # Наблюдение без корректного MAC-адреса не записывается
+            self._buffer[self._size] = (
+                timestamp,
+                bssid,
+                _NO_CHANNEL if observation.channel is None else observation.channel,
+                np.nan if observation.signal_dbm is None else observation.signal_dbm,
+                (
+                    _NO_PERCENT
+                    if observation.signal_strength is None
+                    else observation.signal_strength
+                ),
+                BANDS.index(observation.band) + 1 if observation.band in BANDS else 0,
+                self._intern("ssid", observation.ssid),
+                self._intern("authentication", observation.authentication),
+                self._intern("encryption", observation.encryption),
+                self._intern("radio_type", observation.radio_type),
+                self._intern("network_type", observation.network_type),
+            )
+            self._size += 1
+            if self._size == self.chunk_records:
+                self.flush()
+
+    def _write_block(self, kind, count, t_min, t_max, payload):
+        payload = zlib.compress(payload, self.level)
+        self._file.write(_BLOCK.pack(kind, count, t_min, t_max, len(payload)))
+        self._file.write(payload)
+
+    def flush(self):
+        """Записывает накопленные наблюдения блоком (и новые строки перед ним)."""
+        if not self._size:
+            return
+        strings = {name: values for name, values in self._new_strings.items() if values}
+        if strings:
+            payload = json.dumps(strings, ensure_ascii=False).encode("utf-8")
+            self._write_block(_STRINGS, 0, 0.0, 0.0, payload)
+            self._new_strings = {name: [] for name in STRING_TABLES}
+
+        records = self._buffer[: self._size]
+        times = records["timestamp"]
+        self._write_block(
+            _DATA,
+            self._size,
+            float(times.min()),
+            float(times.max()),
+            _encode_columns(records),
+        )
+        self._file.flush()
+        self._size = 0
+
+    def close(self):
+        """Дописывает буфер и закрывает файл."""
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+
+class ScanLog:
+    """
+    Чтение журнала сканирований через отображение файла в память.
+    При открытии читаются только заголовки блоков: из них строится
+    разреженный индекс по времени (t_min/t_max каждого блока), поэтому
+    выборка интервала распаковывает только пересекающиеся с ним блоки.
+    """
+
+    def __init__(self, path, cache_blocks=8):
+        self.path = path
+        self.tables = {name: [None] for name in STRING_TABLES}  # id -> строка
+        self.end = len(MAGIC)  # Конец последнего целого блока
+        self._offsets = []  # Смещения данных блоков DATA
+        self._sizes = []  # Длины сжатых данных
+        self._counts = []  # Число записей в блоках
+        self._t_min = np.empty(0)
+        self._t_max = np.empty(0)
+        self._cache = OrderedDict()  # Номер блока -> распакованные записи
+        self._cache_blocks = cache_blocks
+        self._file = open(path, "rb")
+        self._map = None
+        self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return int(sum(self._counts))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def refresh(self):
+        """Индексирует блоки, дописанные после открытия (или предыдущего вызова)."""
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC):
+            return
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path}: не журнал сканирований")
+
+        t_min, t_max = [], []
+        offset = self.end
+        while offset + _BLOCK.size <= size:
+            kind, count, low, high, length = _BLOCK.unpack_from(self._map, offset)
+            start = offset + _BLOCK.size
+            if start + length > size:
+                break  # Недописанный блок в конце файла
+            if kind == _STRINGS:
+                strings = json.loads(zlib.decompress(self._map[start : start + length]))
+                for name, values in strings.items():
+                    self.tables[name].extend(values)
+            elif kind == _DATA:
+                self._offsets.append(start)
+                self._sizes.append(length)
+                self._counts.append(count)
+                t_min.append(low)
+                t_max.append(high)
+            else:
+                break  # Повреждённый заголовок: дальше читать нельзя
+            offset = start + length
+        self.end = offset
+        self._t_min = np.concatenate((self._t_min, t_min))
+        self._t_max = np.concatenate((self._t_max, t_max))
+
+    def time_range(self):
+        """Первое и последнее время в журнале (None, None для пустого журнала)."""
+        if not len(self._t_min):
+            return None, None
+        return float(self._t_min.min()), float(self._t_max.max())
+
+    def _decode_block(self, idx):
+        start = self._offsets[idx]
+        payload = zlib.decompress(self._map[start : start + self._sizes[idx]])
+        return _decode_columns(payload, self._counts[idx])
+
+    def _block(self, idx):
+        records = self._cache.get(idx)
+        if records is not None:
+            self._cache.move_to_end(idx)
+            return records
+        records = self._decode_block(idx)
+        self._cache[idx] = records
+        if len(self._cache) > self._cache_blocks:
+            self._cache.popitem(last=False)
+        return records
+
+    def read(self, start=None, end=None):
+        """
+        Записи с временем в интервале [start, end] (границы необязательны)
+        в виде структурированного массива RECORD_DTYPE.
+        """
+        low = -np.inf if start is None else start
+        high = np.inf if end is None else end
+        blocks = np.flatnonzero((self._t_max >= low) & (self._t_min <= high))
+        if not len(blocks):
+            return np.empty(0, dtype=RECORD_DTYPE)
+        records = np.concatenate([self._block(idx) for idx in blocks])
+        times = records["timestamp"]
+        return records[(times >= low) & (times <= high)]
+
+    def blocks(self):
+        """
+        Записи всех блоков по порядку, без кэширования: однопроходная
+        обработка всего журнала не вытесняет кэш выборок.
+        """
+        for idx in range(len(self._offsets)):
+            yield self._decode_block(idx)
+
+    def string(self, table, idx):
+        """Строка таблицы интернирования по идентификатору."""
+        return self.tables[table][idx]
+
+    def observations(self, records):
+        """Наблюдения BssidObservation для массива записей."""
+        tables = self.tables
+        for record in records.tolist():
+            (_, bssid, channel, dbm, percent, band, *ids) = record
+            ssid, authentication, encryption, radio_type, network_type = (
+                tables[name][idx] for name, idx in zip(STRING_TABLES, ids)
+            )
+            yield BssidObservation(
+                ssid=ssid,
+                bssid=int_to_bssid(bssid),
+                signal_strength=None if percent == _NO_PERCENT else percent,
+                signal_dbm=None if dbm != dbm else round(dbm, 2),
+                channel=None if channel == _NO_CHANNEL else channel,
+                band=BANDS[band - 1] if band else None,
+                radio_type=radio_type,
+                network_type=network_type,
+                authentication=authentication,
+                encryption=encryption,
+            )
+
+    def snapshots(self, start=None, end=None):
+        """Снимки сканирований интервала в порядке записи."""
+        records = self.read(start, end)
+        times = records["timestamp"]
+        bounds = np.flatnonzero(np.diff(times)) + 1
+        for group in np.split(records, bounds) if len(records) else ():
+            yield ScanSnapshot(
+                self.observations(group), timestamp=float(group["timestamp"][0])
+            )
+
+    def latest_snapshot(self):
+        """Последний записанный снимок (None для пустого журнала)."""
+        if not self._offsets:
+            return None
+        # Блок закрывается по числу записей и посреди сканирования, поэтому
+        # записи последнего сканирования собираются из всех блоков
+        last = float(self._block(len(self._offsets) - 1)["timestamp"][-1])
+        return ScanSnapshot(self.observations(self.read(last, last)), timestamp=last)
+
+    def ssid_series(self, start=None, end=None):
+        """
+        Уровень каждой сети по времени: SSID -> (время, dBm), где уровень
+        сети в сканировании — максимум по её точкам доступа.
+        Вычисляется векторно по всему интервалу.
+        """
+        records = self.read(start, end)
+        if not len(records):
+            return {}
+        group_ssid, group_times, best = scan_levels(records)
+        split = np.flatnonzero(np.diff(group_ssid)) + 1
+        result = {}
+        for idx, t, v in zip(
+            np.split(group_ssid, split), np.split(group_times, split), np.split(best, split)
+        ):
+            result[self.tables["ssid"][idx[0]]] = (t, v)
+        return result
+
+
+class ScanLogSink(HistorySink):
+    """Фоновая запись снимков в журнал сканирований (вместо JSON Lines)."""
+
+    def __init__(self, path, chunk_records=4096, max_chunk_age=60.0, **kwargs):
+        self._writer = ScanLogWriter(
+            path, chunk_records=chunk_records, max_chunk_age=max_chunk_age
+        )
+        super().__init__(path, **kwargs)
+
+    def encode(self, snapshot):
+        return snapshot  # Сериализация выполняется писателем журнала
+
+    def _write(self, batch):
+        try:
+            for snapshot in batch:
+                self._writer.append(snapshot)
+        except OSError as e:
+            print(f"Ошибка записи истории сканирований: {e}")
+
+    def close(self, timeout=5.0):
+        super().close(timeout)
+        try:
+            self._writer.close()
+        except OSError as e:
+            print(f"Ошибка записи истории сканирований: {e}")
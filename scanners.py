@@ -0,0 +1,488 @@
+import random
+import re
+import shutil
+import subprocess
+import sys
+import time
+from bands import BAND_24, channel_band, frequency_channel
+from records import BssidObservation, ScanSnapshot
+from rssi import get_profile, profile_for
+from scan import parse_scan_snapshot
+
+
+class ScanError(Exception):
+    """Ошибка выполнения команды сканирования."""
+
+
+class ScannerBackend:
+    """
+    Источник сканирований Wi-Fi. Каждая реализация знает команду сканирования,
+    кодировку её вывода и собственный парсер, возвращающий ScanSnapshot.
+    """
+
+    name = "base"
+    encoding = "utf-8"  # Кодировка вывода команды
+    rssi_profile = None  # Профиль пересчёта % <-> dBm (None — по умолчанию)
+
+    def __init__(self, interface=None):
+        self.interface = interface  # Имя беспроводного адаптера (None — по умолчанию)
+
+    def profile(self):
+        """
+        Калибровочный профиль RSSI адаптера: назначенный ему в файле профилей
+        или профиль источника по умолчанию.
+        """
+        return profile_for(self.interface, self.rssi_profile)
+
+    def command(self):
+        """Команда сканирования (список аргументов) или None, если команды нет."""
+        return None
+
+    def decode(self, output):
+        """Разбивает вывод команды (bytes) на строки."""
+        return output.decode(self.encoding, errors="replace").splitlines()
+
+    def parse(self, lines, timestamp=None):
+        """Преобразует строки вывода в снимок."""
+        raise NotImplementedError
+
+    def scan(self):
+        """Выполняет одно сканирование и возвращает снимок."""
+        command = self.command()
+        try:
+            result = subprocess.run(command, capture_output=True)
+        except OSError as e:
+            raise ScanError(f"Не удалось запустить {command[0]}: {e}") from e
+
+        # Проверяем успешность выполнения команды
+        if result.returncode != 0:
+            stderr = result.stderr.decode(self.encoding, errors="replace")
+            raise ScanError(f"Команда завершилась с ошибкой: {stderr}")
+        return self.parse(self.decode(result.stdout))
+
+
+class NetshScanner(ScannerBackend):
+    """Сканирование в Windows: netsh wlan show networks mode=Bssid."""
+
+    name = "netsh"
+    encoding = "cp866"  # Использование русской кодировки для Windows
+
+    def command(self):
+        command = ["netsh", "wlan", "show", "networks", "mode=Bssid"]
+        if self.interface:
+            command.append(f"interface={self.interface}")
+        return command
+
+    def parse(self, lines, timestamp=None):
+        return parse_scan_snapshot(lines, timestamp=timestamp, profile=self.profile())
+
+
+class IwScanner(ScannerBackend):
+    """
+    Сканирование в Linux через iw. По умолчанию читается кэш последнего
+    сканирования ядра (iw dev <if> scan dump), что не требует прав root.
+    """
+
+    name = "iw"
+    rssi_profile = "networkmanager"  # Проценты в Linux считаются как в NetworkManager
+
+    def __init__(self, interface="wlan0", trigger=False):
+        super().__init__(interface)
+        self.trigger = trigger  # Запускать новое сканирование (нужен root)
+
+    def command(self):
+        action = ["scan"] if self.trigger else ["scan", "dump"]
+        return ["iw", "dev", self.interface] + action
+
+    def parse(self, lines, timestamp=None):
+        return ScanSnapshot(
+            iter_iw_observations(lines, self.profile()), timestamp=timestamp
+        )
+
+
+class NmcliScanner(ScannerBackend):
+    """Сканирование в Linux через NetworkManager (nmcli в формате -t)."""
+
+    name = "nmcli"
+    rssi_profile = "networkmanager"  # Так nmcli переводит уровень в проценты
+    fields = "SSID,BSSID,CHAN,FREQ,SIGNAL,SECURITY"  # Порядок полей вывода
+
+    def command(self):
+        command = ["nmcli", "-t", "-f", self.fields, "device", "wifi", "list"]
+        if self.interface:
+            command += ["ifname", self.interface]
+        return command
+
+    def parse(self, lines, timestamp=None):
+        return ScanSnapshot(
+            iter_nmcli_observations(lines, self.profile()), timestamp=timestamp
+        )
+
+
+def default_scanner(interface=None):
+    """Сканер, подходящий для текущей операционной системы."""
+    if sys.platform.startswith("win"):
+        return NetshScanner(interface)
+    if shutil.which("nmcli"):
+        return NmcliScanner(interface)
+    return IwScanner(interface or "wlan0")
+
+
+# ---------------------------------------------------------------------------
+# Парсер вывода `iw dev <if> scan dump`
+# ---------------------------------------------------------------------------
+
+_IW_BSS_RE = re.compile(r"BSS ([0-9a-fA-F:]{17})")
+
+
+def _iw_security(info):
+    """Проверка подлинности и шифрование по разделам RSN/WPA и флагу Privacy."""
+    if info["rsn_auth"] is not None or info["wpa_auth"] is not None:
+        suites = info["rsn_auth"] or info["wpa_auth"] or ""
+        if "SAE" in suites:
+            auth = "WPA3-Personal"
+        elif "802.1X" in suites:
+            auth = "WPA2-Enterprise" if info["rsn_auth"] else "WPA-Enterprise"
+        else:
+            auth = "WPA2-Personal" if info["rsn_auth"] else "WPA-Personal"
+        cipher = (info["ciphers"] or "CCMP").split()[0]
+        return auth, cipher
+    if info["privacy"]:
+        return "WEP", "WEP"
+    return "Открыть", "Нет"
+
+
+def _iw_radio_type(info, band):
+    """Стандарт связи по наличию элементов HE/VHT/HT."""
+    if info["he"]:
+        return "802.11ax"
+    if info["vht"]:
+        return "802.11ac"
+    if info["ht"]:
+        return "802.11n"
+    return "802.11g" if band == BAND_24 else "802.11a"
+
+
+def _iw_observation(info, profile):
+    """Собирает наблюдение из полей одного блока BSS."""
+    channel, band = (None, None)
+    if info["freq"] is not None:
+        channel, band = frequency_channel(info["freq"])
+    if channel is None:
+        channel = info["ds_channel"]
+        band = channel_band(channel)
+    auth, cipher = _iw_security(info)
+    dbm = info["signal"]
+    return BssidObservation(
+        ssid=info["ssid"],
+        bssid=info["bssid"],
+        signal_strength=None if dbm is None else profile.to_percentage(dbm),
+        signal_dbm=dbm,
+        channel=channel,
+        band=band,
+        radio_type=_iw_radio_type(info, band),
+        network_type="Независимая" if info["ibss"] else "Инфраструктура",
+        authentication=auth,
+        encryption=cipher,
+    )
+
+
+def _new_iw_info(bssid):
+    return {
+        "bssid": bssid,
+        "ssid": "",
+        "freq": None,
+        "signal": None,
+        "ds_channel": None,
+        "privacy": False,
+        "ibss": False,
+        "rsn_auth": None,
+        "wpa_auth": None,
+        "ciphers": None,
+        "ht": False,
+        "vht": False,
+        "he": False,
+    }
+
+
+def iter_iw_observations(lines, profile=None):
+    """
+    Потоковый разбор вывода `iw dev <if> scan dump`.
+    Выдаёт BssidObservation, как только закрывается блок очередной точки доступа.
+    profile — профиль RSSI для пересчёта dBm в проценты.
+    """
+    profile = profile or get_profile("networkmanager")
+    info = None  # Поля собираемой точки доступа
+    section = None  # Текущий раздел с вложенными строками "* ..." (RSN/WPA)
+
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+
+        if line.startswith("BSS "):
+            match = _IW_BSS_RE.match(line)
+            if match is None:
+                continue
+            if info is not None:
+                yield _iw_observation(info, profile)
+            info = _new_iw_info(match.group(1).lower())
+            section = None
+            continue
+        if info is None:
+            continue
+
+        label, _, value = line.strip().partition(":")
+        value = value.strip()
+
+        if label.startswith("* "):
+            # Вложенные параметры раздела RSN/WPA
+            label = label[2:]
+            if label == "Authentication suites" and section in ("RSN", "WPA"):
+                info["rsn_auth" if section == "RSN" else "wpa_auth"] = value
+            elif label == "Pairwise ciphers" and section in ("RSN", "WPA"):
+                if section == "RSN" or info["ciphers"] is None:
+                    info["ciphers"] = value
+            continue
+
+        section = label
+        if label == "freq":
+            try:
+                info["freq"] = float(value)
+            except ValueError:
+                pass
+        elif label == "signal":
+            try:
+                info["signal"] = round(float(value.split()[0]), 2)
+            except (ValueError, IndexError):
+                pass
+        elif label == "SSID":
+            info["ssid"] = value
+        elif label == "DS Parameter set":
+            # "channel 6"
+            parts = value.split()
+            if len(parts) == 2 and parts[1].isdigit():
+                info["ds_channel"] = int(parts[1])
+        elif label == "capability":
+            flags = value.split()
+            info["privacy"] = "Privacy" in flags
+            info["ibss"] = "IBSS" in flags
+        elif label in ("RSN", "WPA"):
+            # Первый вложенный параметр может стоять в той же строке
+            info["rsn_auth" if label == "RSN" else "wpa_auth"] = ""
+        elif label == "HT operation":
+            info["ht"] = True
+        elif label == "VHT operation":
+            info["vht"] = True
+        elif label.startswith("HE "):
+            info["he"] = True
+
+    # Последнюю точку доступа отдаём отдельно
+    if info is not None:
+        yield _iw_observation(info, profile)
+
+
+# ---------------------------------------------------------------------------
+# Парсер вывода `nmcli -t -f SSID,BSSID,CHAN,FREQ,SIGNAL,SECURITY device wifi list`
+# ---------------------------------------------------------------------------
+
+
+def _split_terse(line):
+    """Делит строку nmcli -t по двоеточиям с учётом экранирования (\\: и \\\\)."""
+    fields, current = [], []
+    chars = iter(line)
+    for char in chars:
+        if char == "\\":
+            current.append(next(chars, ""))
+        elif char == ":":
+            fields.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    fields.append("".join(current))
+    return fields
+
+
+def _nmcli_security(security):
+    """Проверка подлинности и шифрование по полю SECURITY nmcli."""
+    tokens = security.replace("--", "").split()
+    if not tokens:
+        return "Открыть", "Нет"
+    enterprise = "802.1X" in tokens
+    if "WPA3" in tokens:
+        return ("WPA3-Enterprise" if enterprise else "WPA3-Personal"), "CCMP"
+    if "WPA2" in tokens:
+        return ("WPA2-Enterprise" if enterprise else "WPA2-Personal"), "CCMP"
+    if "WPA1" in tokens:
+        return ("WPA-Enterprise" if enterprise else "WPA-Personal"), "TKIP"
+    if "WEP" in tokens:
+        return "WEP", "WEP"
+    return tokens[0], None
+
+
+def iter_nmcli_observations(lines, profile=None):
+    """Потоковый разбор вывода nmcli в формате -t (одна точка доступа на строку)."""
+    profile = profile or get_profile("networkmanager")
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        if not line.strip():
+            continue
+        fields = _split_terse(line)
+        if len(fields) < 6:
+            continue
+        ssid, bssid, chan, freq, signal, security = fields[:6]
+
+        channel = int(chan) if chan.isdigit() else None
+        band = None
+        freq_value = freq.split()[0] if freq else ""
+        if freq_value.isdigit():
+            channel, band = frequency_channel(int(freq_value))
+        percentage = int(signal) if signal.isdigit() else None
+        auth, cipher = _nmcli_security(security)
+
+        yield BssidObservation(
+            ssid=ssid,
+            bssid=bssid.lower(),
+            signal_strength=percentage,
+            signal_dbm=None if percentage is None else profile.to_dbm(percentage),
+            channel=channel,
+            band=band or channel_band(channel),
+            radio_type=None,  # nmcli в кратком формате не сообщает стандарт
+            network_type="Инфраструктура",
+            authentication=auth,
+            encryption=cipher,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Воспроизведение записанных и синтетических сканирований
+# ---------------------------------------------------------------------------
+
+# Подписи полей netsh для синтетических дампов
+_NETSH_LABELS = {
+    "ru": {
+        "network_type": "Тип сети",
+        "auth": "Проверка подлинности",
+        "cipher": "Шифрование",
+        "signal": "Сигнал",
+        "radio": "Тип радио",
+        "channel": "Канал",
+        "interface": "Имя интерфейса",
+        "infrastructure": "Инфраструктура",
+    },
+    "en": {
+        "network_type": "Network type",
+        "auth": "Authentication",
+        "cipher": "Encryption",
+        "signal": "Signal",
+        "radio": "Radio type",
+        "channel": "Channel",
+        "interface": "Interface name",
+        "infrastructure": "Infrastructure",
+    },
+}
+
+_SYNTHETIC_CHANNELS = (1, 6, 11, 3, 9, 36, 40, 44, 48, 52, 100, 149)
+
+
+def generate_netsh_dump(
+    n_bssids, locale="ru", seed=None, bssids_per_ssid=3, scan=None
+):
+    """
+    Синтетический вывод `netsh wlan show networks mode=Bssid` с n_bssids
+    точками доступа (по bssids_per_ssid на сеть) для тестов и нагрузочных замеров.
+    scan — номер сканирования той же обстановки: сети, каналы и стандарты
+    определяются seed, а уровни сигнала немного меняются от сканирования
+    к сканированию.
+    """
+    labels = _NETSH_LABELS[locale]
+    rng = random.Random(seed)
+    drift = None if scan is None else random.Random(f"{seed}:{scan}")
+    lines = ["", f"{labels['interface']} : Wi-Fi"]
+    for index in range(n_bssids):
+        if index % bssids_per_ssid == 0:
+            ssid_number = index // bssids_per_ssid + 1
+            lines += [
+                "",
+                f"SSID {ssid_number} : Network_{ssid_number:04d}",
+                f"    {labels['network_type']:<24}: {labels['infrastructure']}",
+                f"    {labels['auth']:<24}: WPA2-Personal",
+                f"    {labels['cipher']:<24}: CCMP",
+            ]
+        mac = ":".join(f"{(index >> shift) & 0xFF:02x}" for shift in (40, 32, 24, 16, 8, 0))
+        signal = rng.randint(5, 99)
+        if drift is not None:
+            signal = min(99, max(5, signal + drift.randint(-5, 5)))
+        lines += [
+            f"    BSSID {index % bssids_per_ssid + 1:<18}: {mac}",
+            f"         {labels['signal']:<19}: {signal}%",
+            f"         {labels['radio']:<19}: 802.11{rng.choice(('n', 'ac', 'ax'))}",
+            f"         {labels['channel']:<19}: {rng.choice(_SYNTHETIC_CHANNELS)}",
+        ]
+    return lines
+
+
+class ReplayScanner(ScannerBackend):
+    """
+    Воспроизводит записанные или синтетические дампы с заданной частотой.
+    Позволяет нагружать конвейер без реальных радиомодулей.
+    """
+
+    name = "replay"
+
+    def __init__(self, dumps, parser=parse_scan_snapshot, rate=None, loop=True):
+        super().__init__()
+        self.dumps = [list(dump) for dump in dumps]  # Списки строк каждого дампа
+        self.parser = parser  # Парсер формата дампов
+        self.rate = rate  # Сканирований в секунду (None — без ограничения)
+        self.loop = loop  # Начинать сначала после последнего дампа
+        self._position = 0
+        self._next_time = None
+
+    @classmethod
+    def from_files(cls, paths, encoding="cp866", **kwargs):
+        """Дампы из файлов (по одному сканированию в файле)."""
+        dumps = []
+        for path in paths:
+            with open(path, "r", encoding=encoding, errors="replace") as file:
+                dumps.append(file.read().splitlines())
+        return cls(dumps, **kwargs)
+
+    @classmethod
+    def synthetic(cls, n_bssids, count=10, locale="ru", seed=0, **kwargs):
+        """
+        count синтетических сканирований одной обстановки с n_bssids точками
+        доступа (меняются только уровни сигнала).
+        """
+        dumps = [
+            generate_netsh_dump(n_bssids, locale=locale, seed=seed, scan=i)
+            for i in range(count)
+        ]
+        return cls(dumps, **kwargs)
+
+    def parse(self, lines, timestamp=None):
+        return self.parser(lines, timestamp=timestamp)
+
+    def next_lines(self):
+        """Строки следующего дампа (ScanError, если дампы закончились)."""
+        if self._position >= len(self.dumps):
+            if not self.loop or not self.dumps:
+                raise ScanError("Записанные сканирования закончились")
+            self._position = 0
+        lines = self.dumps[self._position]
+        self._position += 1
+        return lines
+
+    def wait(self):
+        """Выдерживает заданную частоту воспроизведения."""
+        if not self.rate:
+            return
+        now = time.monotonic()
+        if self._next_time is not None and self._next_time > now:
+            time.sleep(self._next_time - now)
+            now = self._next_time
+        self._next_time = now + 1.0 / self.rate
+
+    def scan(self):
+        self.wait()
+        return self.parse(self.next_lines())
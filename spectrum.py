@@ -0,0 +1,195 @@
+import numpy as np
+from bands import (
+    BAND_24,
+    BAND_5,
+    BAND_6,
+    BANDS,
+    DFS_CHANNELS,
+    channel_band,
+    channel_frequency,
+)
+
+# Предполагаемая ширина канала (МГц) по стандарту и диапазону.
+# netsh не сообщает ширину канала, поэтому берётся типичная для стандарта
+RADIO_WIDTHS = {
+    BAND_24: {"802.11b": 22, "802.11g": 20, "802.11n": 20, "802.11ax": 20},
+    BAND_5: {"802.11a": 20, "802.11n": 40, "802.11ac": 80, "802.11ax": 80},
+    BAND_6: {"802.11ax": 80, "802.11be": 160},
+}
+DEFAULT_WIDTH = 20  # Ширина канала, если стандарт неизвестен (МГц)
+
+# Спектральная маска OFDM: (отстройка от центра в долях ширины канала, дБ)
+# 0 дБ в пределах полосы, -20 дБ на краю, -28 дБ на W, -40 дБ на 1.5 W
+MASK_OFFSETS = np.array([0.0, 0.45, 0.55, 1.0, 1.5])
+MASK_LEVELS = np.array([0.0, 0.0, -20.0, -28.0, -40.0])
+
+# Точки внутри 20-МГц канала, по которым усредняется мощность (МГц от центра)
+_CHANNEL_SAMPLES = np.array([-8.0, -4.0, 0.0, 4.0, 8.0])
+
+# Каналы-кандидаты для рекомендации (20 МГц)
+CANDIDATE_CHANNELS = {
+    BAND_24: (1, 6, 11),  # Непересекающиеся каналы 2.4 ГГц
+    BAND_5: tuple(range(36, 65, 4))
+    + tuple(range(100, 145, 4))
+    + tuple(range(149, 166, 4)),
+    BAND_6: tuple(range(5, 230, 16)),  # Предпочтительные каналы 6 ГГц (PSC)
+}
+
+# Все 20-МГц каналы диапазона, для которых считается занятость
+BAND_CHANNELS = {
+    BAND_24: tuple(range(1, 14)),
+    BAND_5: CANDIDATE_CHANNELS[BAND_5],
+    BAND_6: tuple(range(1, 234, 4)),
+}
+
+# Сдвиг каналов диапазона на общей оси графика. Номера каналов 6 ГГц (1–233)
+# совпадают с номерами 2.4 и 5 ГГц, поэтому 6 ГГц располагается правее
+# последнего канала 5 ГГц
+BAND_AXIS_OFFSETS = {BAND_24: 0, BAND_5: 0, BAND_6: 200}
+BAND_6_DIVIDER = 190  # Граница 5 и 6 ГГц на оси графика
+
+
+def axis_position(channel, band):
+    """Положение канала диапазона на общей оси графика каналов."""
+    return channel + BAND_AXIS_OFFSETS.get(band, 0)
+
+
+def channel_width(observation):
+    """Предполагаемая ширина канала точки доступа (МГц)."""
+    band = channel_band(observation.channel, observation.band)
+    return RADIO_WIDTHS.get(band, {}).get(observation.radio_type, DEFAULT_WIDTH)
+
+
+def center_channel(channel, band, width):
+    """
+    Номер центрального канала объединённого канала шириной width.
+    В 5 и 6 ГГц объединение выполняется фиксированными блоками; в 2.4 ГГц
+    вторичный канал 40 МГц неизвестен и берётся в сторону середины диапазона.
+    """
+    if width <= 22:
+        return channel
+    if band == BAND_24:
+        return channel + 2 if channel <= 7 else channel - 2
+    step = 4 * (width // 20)  # Блок объединения в номерах каналов
+    if band == BAND_5:
+        base = 149 if channel >= 149 else 36
+    elif band == BAND_6:
+        base = 1
+    else:
+        return channel
+    return base + (channel - base) // step * step + (step - 4) // 2
+
+
+class Occupancy:
+    """Занятость каналов одного диапазона."""
+
+    def __init__(self, band, channels, power_dbm, overlap):
+        self.band = band
+        self.channels = channels  # Номера 20-МГц каналов
+        self.power_dbm = power_dbm  # Суммарная мощность помех в канале (dBm)
+        self.overlap = overlap  # Число точек доступа, перекрывающих канал
+        self.recommended = self._recommend()  # Наименее загруженный канал
+
+    def _recommend(self):
+        candidates = CANDIDATE_CHANNELS[self.band]
+        mask = np.isin(self.channels, candidates)
+        if not mask.any():
+            return None
+        channels = self.channels[mask]
+        # Сначала наименьшая мощность, затем меньше перекрытий, затем не DFS
+        dfs = np.isin(channels, tuple(DFS_CHANNELS)) & (self.band == BAND_5)
+        power = np.round(self.power_dbm[mask], 1)
+        order = np.lexsort((channels, dfs, self.overlap[mask], power))
+        return int(channels[order[0]])
+
+
+def spectrum_arrays(observations):
+    """
+    Параметры точек доступа в виде массивов NumPy по диапазонам:
+    диапазон -> (центральная частота МГц, ширина МГц, уровень dBm).
+    """
+    columns = {band: ([], [], []) for band in BANDS}
+    for observation in observations:
+        band = channel_band(observation.channel, observation.band)
+        if band is None or observation.signal_dbm is None:
+            continue
+        width = channel_width(observation)
+        center = center_channel(observation.channel, band, width)
+        freqs, widths, levels = columns[band]
+        freqs.append(channel_frequency(center, band))
+        widths.append(width)
+        levels.append(observation.signal_dbm)
+    return {
+        band: tuple(np.asarray(column, dtype=np.float64) for column in values)
+        for band, values in columns.items()
+        if values[0]
+    }
+
+
+def mask_attenuation(offset, width):
+    """Ослабление маски (дБ) при отстройке offset (МГц) для ширины канала width."""
+    return np.interp(np.abs(offset) / width, MASK_OFFSETS, MASK_LEVELS)
+
+
+def band_occupancy(band, freqs, widths, levels, channels=None):
+    """
+    Занятость 20-МГц каналов диапазона. Маска каждой точки доступа
+    вычисляется в нескольких точках внутри каждого канала, мощности
+    складываются в линейной шкале (мВт) и переводятся обратно в dBm.
+    Вычисление полностью векторное: массив (точки доступа, каналы, отсчёты).
+    """
+    channels = np.asarray(channels if channels is not None else BAND_CHANNELS[band])
+    centers = np.array([channel_frequency(ch, band) for ch in channels], dtype=float)
+    if not len(freqs):
+        empty = np.full(len(channels), -np.inf)
+        return Occupancy(band, channels, empty, np.zeros(len(channels), dtype=int))
+
+    # Отстройка каждого отсчёта каждого канала от центра каждой точки доступа
+    samples = centers[:, None] + _CHANNEL_SAMPLES[None, :]  # (каналы, отсчёты)
+    offset = samples[None, :, :] - freqs[:, None, None]  # (AP, каналы, отсчёты)
+    attenuation = mask_attenuation(offset, widths[:, None, None])
+
+    # Мощность в линейной шкале, усреднённая по полосе канала
+    power_mw = 10.0 ** ((levels[:, None, None] + attenuation) / 10.0)
+    per_ap = power_mw.mean(axis=2)  # (AP, каналы)
+    with np.errstate(divide="ignore"):
+        power_dbm = 10.0 * np.log10(per_ap.sum(axis=0))
+
+    # Перекрытие: канал попадает в основную полосу точки доступа
+    in_band = np.abs(centers[None, :] - freqs[:, None]) < (widths[:, None] / 2 + 10)
+    overlap = in_band.sum(axis=0)
+    return Occupancy(band, channels, power_dbm, overlap)
+
+
+def channel_occupancy(observations, bands=None):
+    """
+    Занятость каналов по диапазонам, в которых есть точки доступа:
+    диапазон -> Occupancy. bands ограничивает список диапазонов.
+    """
+    result = {}
+    for band, (freqs, widths, levels) in spectrum_arrays(observations).items():
+        if bands is None or band in bands:
+            result[band] = band_occupancy(band, freqs, widths, levels)
+    return result
+
+
+def ssid_spans(observations):
+    """
+    Полосы, занимаемые сетями: SSID -> {(центр на оси, ширина в каналах): dBm}
+    (максимум по точкам доступа сети с одинаковой полосой). Центр — номер
+    центрального канала, сдвинутый по axis_position, чтобы каналы 6 ГГц
+    не совпадали с каналами 2.4 и 5 ГГц.
+    """
+    spans = {}
+    for observation in observations:
+        band = channel_band(observation.channel, observation.band)
+        if band is None or observation.signal_dbm is None:
+            continue
+        width = channel_width(observation)
+        center = center_channel(observation.channel, band, width)
+        key = (axis_position(center, band), width / 5)
+        per_span = spans.setdefault(observation.ssid, {})
+        dbm = float(observation.signal_dbm)
+        if per_span.get(key, -1000.0) < dbm:
+            per_span[key] = dbm
+    return spans
@@ -0,0 +1,201 @@
+import math
+from collections import deque, namedtuple
+
+# Сводка по точке доступа на момент сканирования
+StatsSummary = namedtuple(
+    "StatsSummary",
+    (
+        "ewma",  # Экспоненциально сглаженный уровень (dBm)
+        "minimum",  # Минимум в скользящем окне (dBm)
+        "maximum",  # Максимум в скользящем окне (dBm)
+        "median",  # Медиана в скользящем окне (dBm)
+        "p90",  # 90-й перцентиль в скользящем окне (dBm)
+        "jitter",  # Сглаженное изменение уровня между сканированиями (дБ)
+        "visibility",  # Доля сканирований окна, в которых точка доступа видна
+    ),
+)
+
+# Гистограмма для перцентилей: интервалы по 0.5 дБ от -110 до 0 dBm
+HIST_LOW = -110.0
+HIST_STEP = 0.5
+HIST_BINS = int(-HIST_LOW / HIST_STEP) + 1
+
+
+def _bin(value):
+    """Номер интервала гистограммы для уровня value (dBm)."""
+    idx = int(round((value - HIST_LOW) / HIST_STEP))
+    return min(max(idx, 0), HIST_BINS - 1)
+
+
+class BssidStats:
+    """
+    Статистика уровня сигнала одной точки доступа в скользящем окне
+    из window сканирований. Каждое сканирование обрабатывается за O(1):
+    минимум и максимум — монотонные очереди, перцентили — гистограмма
+    с фиксированным числом интервалов, видимость — счётчик пропусков в окне.
+    """
+
+    __slots__ = (
+        "window",
+        "alpha",
+        "ewma",
+        "jitter",
+        "last",
+        "seen",
+        "samples",
+        "histogram",
+        "count",
+        "mins",
+        "maxs",
+        "scans",
+    )
+
+    def __init__(self, window, alpha):
+        self.window = window  # Размер окна (сканирований)
+        self.alpha = alpha  # Коэффициент сглаживания EWMA
+        self.ewma = None
+        self.jitter = 0.0
+        self.last = None  # Предыдущий отсчёт (dBm)
+        self.seen = 0  # Сканирований окна, в которых точка доступа видна
+        self.samples = deque()  # Отсчёты окна: (номер сканирования, dBm или None)
+        self.histogram = [0] * HIST_BINS  # Распределение отсчётов окна
+        self.count = 0  # Отсчётов в гистограмме
+        self.mins = deque()  # Монотонная очередь для минимума: (номер, dBm)
+        self.maxs = deque()  # Монотонная очередь для максимума
+        self.scans = 0  # Сканирований с момента первого появления (не больше окна)
+
+    def add(self, scan, value):
+        """Отсчёт сканирования scan: уровень dBm или None (точка доступа не видна)."""
+        self.samples.append((scan, value))
+        self.scans = min(self.scans + 1, self.window)
+        if value is not None:
+            self.seen += 1
+            self.histogram[_bin(value)] += 1
+            self.count += 1
+            if self.ewma is None:
+                self.ewma = value
+            else:
+                self.ewma += self.alpha * (value - self.ewma)
+            if self.last is not None:
+                # Оценка джиттера как в RFC 3550: J += (|D| - J) / 16
+                self.jitter += (abs(value - self.last) - self.jitter) / 16
+            self.last = value
+            while self.mins and self.mins[-1][1] >= value:
+                self.mins.pop()
+            self.mins.append((scan, value))
+            while self.maxs and self.maxs[-1][1] <= value:
+                self.maxs.pop()
+            self.maxs.append((scan, value))
+
+        # Вытесняем отсчёт, вышедший за пределы окна
+        oldest = scan - self.window
+        while self.samples and self.samples[0][0] <= oldest:
+            _, old = self.samples.popleft()
+            if old is not None:
+                self.seen -= 1
+                self.histogram[_bin(old)] -= 1
+                self.count -= 1
+        while self.mins and self.mins[0][0] <= oldest:
+            self.mins.popleft()
+        while self.maxs and self.maxs[0][0] <= oldest:
+            self.maxs.popleft()
+
+    def percentiles(self, *qs):
+        """
+        Перцентили qs (0..100, по возрастанию) уровня в окне с точностью
+        интервала гистограммы; вычисляются за один проход по гистограмме.
+        """
+        if not self.count:
+            return [None] * len(qs)
+        ranks = [max(1, math.ceil(q / 100 * self.count)) for q in qs]
+        result = []
+        total = 0
+        histogram = self.histogram
+        # Проход только по интервалам между минимумом и максимумом окна
+        for idx in range(_bin(self.mins[0][1]), _bin(self.maxs[0][1]) + 1):
+            hits = histogram[idx]
+            if not hits:
+                continue
+            total += hits
+            while total >= ranks[len(result)]:
+                result.append(HIST_LOW + idx * HIST_STEP)
+                if len(result) == len(ranks):
+                    return result
+        return result + [None] * (len(ranks) - len(result))
+
+    def summary(self):
+        median, p90 = self.percentiles(50, 90)
+        return StatsSummary(
+            ewma=None if self.ewma is None else round(self.ewma, 1),
+            minimum=self.mins[0][1] if self.mins else None,
+            maximum=self.maxs[0][1] if self.maxs else None,
+            median=median,
+            p90=p90,
+            jitter=round(self.jitter, 1),
+            visibility=self.seen / self.scans if self.scans else 0.0,
+        )
+
+
+class SignalStats:
+    """
+    Потоковая статистика по всем точкам доступа. update() вызывается на
+    каждое сканирование и возвращает неизменяемые сводки, которые можно
+    передать в другой поток вместе со снимком. Точки доступа, не видимые
+    дольше окна, забываются.
+    """
+
+    def __init__(self, window=60, alpha=0.3):
+        self.window = window  # Окно статистики (сканирований)
+        self.alpha = alpha  # Коэффициент сглаживания EWMA
+        self._stats = {}  # BSSID -> BssidStats
+        self._scan = 0  # Номер текущего сканирования
+
+    def __len__(self):
+        return len(self._stats)
+
+    def __contains__(self, bssid):
+        return bssid in self._stats
+
+    def update(self, snapshot):
+        """Учитывает сканирование; возвращает словарь BSSID -> StatsSummary."""
+        self._scan += 1
+        scan = self._scan
+        for observation in snapshot:
+            stats = self._stats.get(observation.bssid)
+            if stats is None:
+                stats = self._stats[observation.bssid] = BssidStats(
+                    self.window, self.alpha
+                )
+            stats.add(scan, observation.signal_dbm)
+
+        # Пропуск сканирования для невидимых точек доступа
+        summaries = {}
+        for bssid in list(self._stats):
+            stats = self._stats[bssid]
+            if bssid not in snapshot:
+                stats.add(scan, None)
+                if not stats.seen:
+                    del self._stats[bssid]  # Не видна всё окно
+                    continue
+            summaries[bssid] = stats.summary()
+        return summaries
+
+
+def ssid_levels(snapshot, stats=None):
+    """
+    Уровень каждой сети для графика: наибольшее сглаженное значение
+    среди её точек доступа (без сводок — уровень самой сильной точки доступа).
+    """
+    if not stats:
+        return {
+            ssid: best.signal_dbm for ssid, best in snapshot.best_by_ssid().items()
+        }
+    levels = {}
+    for ssid in snapshot.ssids():
+        values = [
+            stats[obs.bssid].ewma
+            for obs in snapshot.for_ssid(ssid)
+            if obs.bssid in stats and stats[obs.bssid].ewma is not None
+        ]
+        levels[ssid] = max(values) if values else None
+    return levels
@@ -0,0 +1,255 @@
+import json
+import math
+from collections import namedtuple
+import numpy as np
+
+# Точка обследования: положение на плане (пиксели изображения), время
+# сканирования и уровни точек доступа {BSSID: dBm}
+SurveyPoint = namedtuple("SurveyPoint", ("x", "y", "timestamp", "levels"))
+
+MISSING_DBM = -100.0  # Уровень точки доступа, не услышанной в точке обследования
+
+
+def snapshot_levels(snapshot):
+    """Уровни точек доступа снимка: {BSSID: dBm} (без неизвестных уровней)."""
+    return {
+        observation.bssid: observation.signal_dbm
+        for observation in snapshot
+        if observation.signal_dbm is not None
+    }
+
+
+class HeatmapBuilder:
+    """
+    Карты уровня сигнала на сетке плана, интерполированные методом
+    обратно взвешенных расстояний (IDW):
+
+        уровень(ячейка) = Σ wᵢ·vᵢ / Σ wᵢ,  wᵢ = 1 / (dᵢ² + s²)^(power/2)
+
+    Числитель и знаменатель — суммы по точкам, поэтому хранятся как
+    накопители и новая точка лишь добавляет к ним свой вклад: карты
+    не пересчитываются с нуля. Знаменатель общий для всех точек доступа;
+    не услышанная точка доступа даёт в точке обследования missing_dbm,
+    так что для каждой точки доступа хранится только Σ wᵢ·(vᵢ − missing_dbm)
+    по точкам, где она слышна.
+
+    Сетка обрабатывается плитками по tile×tile ячеек, чтобы промежуточные
+    массивы не зависели от размера плана; при заданном radius (пиксели)
+    точка влияет только на ячейки в этом радиусе и плитки вне его
+    пропускаются.
+    """
+
+    def __init__(
+        self,
+        width,
+        height,
+        cell=None,
+        max_cells=200,
+        power=2.0,
+        radius=None,
+        missing_dbm=MISSING_DBM,
+        tile=64,
+        chunk=256,
+    ):
+        self.width = width  # Размер плана (пиксели)
+        self.height = height
+        # Размер ячейки сетки (пиксели): по умолчанию не больше max_cells
+        # ячеек по длинной стороне плана
+        self.cell = cell or max(1, math.ceil(max(width, height) / max_cells))
+        self.power = power  # Степень убывания веса с расстоянием
+        self.radius = radius  # Радиус влияния точки (пиксели) или None
+        self.missing_dbm = missing_dbm
+        self.tile = tile  # Размер плитки (ячеек)
+        self.chunk = chunk  # Точек в одной векторной операции
+        self.cols = math.ceil(width / self.cell)
+        self.rows = math.ceil(height / self.cell)
+        # Центры ячеек (пиксели плана)
+        self.xs = ((np.arange(self.cols) + 0.5) * self.cell).astype(np.float32)
+        self.ys = ((np.arange(self.rows) + 0.5) * self.cell).astype(np.float32)
+        # Сглаживание: вес точки в её собственной ячейке остаётся конечным
+        self._smooth = (self.cell / 2) ** 2
+        self.weight = np.zeros((self.rows, self.cols), np.float32)  # Σ wᵢ
+        self.bssids = []  # Индекс в накопителях -> BSSID
+        self._index = {}  # BSSID -> индекс
+        self._excess = np.zeros((0, self.rows, self.cols), np.float32)
+        self.points = 0  # Число учтённых точек обследования
+
+    @property
+    def extent(self):
+        """Границы сетки для imshow: (слева, справа, снизу, сверху)."""
+        return (0, self.cols * self.cell, self.rows * self.cell, 0)
+
+    def _ensure(self, bssids):
+        """Выделяет накопители для новых BSSID (ёмкость растёт удвоением)."""
+        for bssid in bssids:
+            if bssid in self._index:
+                continue
+            if len(self.bssids) == len(self._excess):
+                grown = np.zeros(
+                    (max(8, 2 * len(self._excess)), self.rows, self.cols), np.float32
+                )
+                grown[: len(self._excess)] = self._excess
+                self._excess = grown
+            self._index[bssid] = len(self.bssids)
+            self.bssids.append(bssid)
+
+    def add(self, x, y, levels):
+        """Добавляет точку обследования: положение и уровни {BSSID: dBm}."""
+        self.add_many([(x, y, levels)])
+
+    def add_many(self, points):
+        """Добавляет точки [(x, y, {BSSID: dBm}), ...] одним векторным проходом."""
+        points = list(points)
+        for start in range(0, len(points), self.chunk):
+            self._add_chunk(points[start : start + self.chunk])
+
+    def _add_chunk(self, points):
+        if not points:
+            return
+        self._ensure({bssid for _, _, levels in points for bssid in levels})
+        px = np.array([p[0] for p in points], np.float32)
+        py = np.array([p[1] for p in points], np.float32)
+        # Превышение уровня над missing_dbm: строки — точки, столбцы — BSSID
+        # (только BSSID, услышанные хотя бы в одной точке пачки)
+        heard = sorted({self._index[b] for _, _, levels in points for b in levels})
+        column = {idx: pos for pos, idx in enumerate(heard)}
+        excess = np.zeros((len(points), len(heard)), np.float32)
+        for row, (_, _, levels) in enumerate(points):
+            for bssid, dbm in levels.items():
+                excess[row, column[self._index[bssid]]] = dbm - self.missing_dbm
+        heard = np.array(heard, np.intp)
+
+        tile = self.tile
+        for r0 in range(0, self.rows, tile):
+            ys = self.ys[r0 : r0 + tile]
+            for c0 in range(0, self.cols, tile):
+                xs = self.xs[c0 : c0 + tile]
+                near = self._near(px, py, xs, ys)
+                if not near.any():
+                    continue  # Плитка вне радиуса влияния всех точек
+                dy = ys[None, :, None] - py[near, None, None]
+                dx = xs[None, None, :] - px[near, None, None]
+                d2 = dx * dx + dy * dy
+                w = (d2 + self._smooth) ** (-self.power / 2)
+                if self.radius is not None:
+                    w[d2 > self.radius**2] = 0.0
+                window = (slice(r0, r0 + tile), slice(c0, c0 + tile))
+                self.weight[window] += w.sum(axis=0)
+                if len(heard):
+                    # Σ по точкам wᵢ·превышениеᵢ сразу для всех BSSID
+                    contrib = np.tensordot(excess[near], w, axes=(0, 0))
+                    self._excess[(heard,) + window] += contrib
+        self.points += len(points)
+
+    def _near(self, px, py, xs, ys):
+        """Точки, влияющие на плитку с центрами ячеек xs × ys."""
+        if self.radius is None:
+            return np.ones(len(px), bool)
+        half = self.cell / 2
+        # Расстояние от точки до прямоугольника плитки
+        dx = np.maximum(0, np.maximum(xs[0] - half - px, px - xs[-1] - half))
+        dy = np.maximum(0, np.maximum(ys[0] - half - py, py - ys[-1] - half))
+        return dx * dx + dy * dy <= self.radius**2
+
+    def heatmap(self, bssid):
+        """
+        Карта уровня точки доступа (dBm, rows × cols); NaN — ячейки вне
+        радиуса влияния точек. None, если BSSID ни разу не был услышан.
+        """
+        idx = self._index.get(bssid)
+        if idx is None:
+            return None
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.missing_dbm + self._excess[idx] / self.weight
+
+    def best_server(self):
+        """
+        Лучшая точка доступа в каждой ячейке: (уровень dBm, индекс в bssids).
+        Знаменатель у всех карт общий, поэтому лучшая точка доступа —
+        с наибольшим накопителем. None, если точек доступа нет.
+        """
+        if not self.bssids:
+            return None
+        excess = self._excess[: len(self.bssids)]
+        best = np.argmax(excess, axis=0)
+        top = np.take_along_axis(excess, best[None], axis=0)[0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            level = self.missing_dbm + top / self.weight
+        return level, best
+
+
+class Survey:
+    """
+    Обследование помещения: план (изображение), точки с уровнями сигнала
+    и карты покрытия. Точки дописываются в файл JSON Lines по мере
+    добавления, поэтому прерванное обследование не теряется.
+    """
+
+    def __init__(self, width, height, plan=None, path=None, **heatmap):
+        self.plan = plan  # Путь к изображению плана
+        self.points = []  # SurveyPoint по порядку добавления
+        self.ssids = {}  # BSSID -> SSID (для подписей)
+        self.builder = HeatmapBuilder(width, height, **heatmap)
+        self.path = path  # Файл обследования (или None)
+        if path is not None:
+            with open(path, "a", encoding="utf-8") as file:
+                if file.tell() == 0:
+                    header = {"plan": plan, "width": width, "height": height}
+                    file.write(json.dumps(header, ensure_ascii=False) + "\n")
+
+    def __len__(self):
+        return len(self.points)
+
+    def add(self, x, y, snapshot):
+        """Привязывает снимок сканирования к точке (x, y) плана."""
+        for observation in snapshot:
+            self.ssids[observation.bssid] = observation.ssid
+        point = SurveyPoint(x, y, snapshot.timestamp, snapshot_levels(snapshot))
+        self._append([point])
+        return point
+
+    def _append(self, points, write=True):
+        self.points.extend(points)
+        self.builder.add_many((p.x, p.y, p.levels) for p in points)
+        if write and self.path is not None:
+            with open(self.path, "a", encoding="utf-8") as file:
+                for p in points:
+                    record = {
+                        "x": p.x,
+                        "y": p.y,
+                        "timestamp": p.timestamp,
+                        "levels": p.levels,
+                        "ssids": {b: self.ssids.get(b) for b in p.levels},
+                    }
+                    file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def label(self, bssid):
+        """Подпись точки доступа: "SSID (BSSID)"."""
+        ssid = self.ssids.get(bssid)
+        return f"{ssid} ({bssid})" if ssid else bssid
+
+    @classmethod
+    def load(cls, path, **heatmap):
+        """
+        Открывает сохранённое обследование; все точки учитываются в картах
+        одним векторным проходом, новые точки дописываются в тот же файл.
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            records = [json.loads(line) for line in file if line.strip()]
+        survey = cls(
+            header["width"], header["height"], plan=header.get("plan"), **heatmap
+        )
+        for record in records:
+            survey.ssids.update(
+                (b, s) for b, s in record.get("ssids", {}).items() if s is not None
+            )
+        survey._append(
+            [
+                SurveyPoint(r["x"], r["y"], r["timestamp"], r["levels"])
+                for r in records
+            ],
+            write=False,
+        )
+        survey.path = path
+        return survey
@@ -0,0 +1,255 @@
+# Колонки таблицы сетей
+COLUMNS = (
+    "№",
+    "Имя сети (SSID)",
+    "BSSID",
+    "Канал",
+    "Сила сигнала (%)",
+    "Сила сигнала (dBm)",
+    "Тип сети",
+    "Проверка подлинности",
+    "Шифрование",
+    "Тип радио",
+    # Статистика за окно сканирований (stats.SignalStats)
+    "Сглаженный (dBm)",
+    "Мин (dBm)",
+    "Макс (dBm)",
+    "Медиана (dBm)",
+    "Джиттер (дБ)",
+    "Видимость (%)",
+)
+
+SSID_COLUMN = 1  # Колонка сортировки по умолчанию
+
+_MISSING = (1, 0)  # Ключ пустой ячейки: такие строки всегда оказываются в конце
+
+
+def _text(value):
+    """Значение ячейки в том виде, в каком его хранит Treeview."""
+    return "" if value is None else str(value)
+
+
+def _visibility(summary):
+    """Доля видимости в процентах (None без статистики)."""
+    return None if summary is None else round(summary.visibility * 100)
+
+
+def row_values(number, observation, summary=None):
+    """
+    Значения строки таблицы для одной точки доступа;
+    summary — сводка статистики точки доступа (StatsSummary или None).
+    """
+    return (
+        str(number),
+        _text(observation.ssid),
+        _text(observation.bssid),
+        _text(observation.channel),
+        f"{_text(observation.signal_strength)}%",
+        _text(observation.signal_dbm),
+        _text(observation.network_type),
+        _text(observation.authentication),
+        _text(observation.encryption),
+        _text(observation.radio_type),
+        _text(getattr(summary, "ewma", None)),
+        _text(getattr(summary, "minimum", None)),
+        _text(getattr(summary, "maximum", None)),
+        _text(getattr(summary, "median", None)),
+        _text(getattr(summary, "jitter", None)),
+        _text(_visibility(summary)),
+    )
+
+
+def _number_key(value):
+    """Числовой ключ сортировки."""
+    if value is None or value == "":
+        return _MISSING
+    try:
+        return (0, float(value))
+    except (TypeError, ValueError):
+        return _MISSING
+
+
+def _text_key(value):
+    """Строковый ключ сортировки без учёта регистра."""
+    if value is None:
+        return _MISSING
+    return (0, str(value).casefold())
+
+
+def row_keys(number, observation, summary=None):
+    """Типизированные ключи сортировки строки (по одному на колонку)."""
+    return (
+        (0, number),
+        _text_key(observation.ssid),
+        _text_key(observation.bssid),
+        _number_key(observation.channel),
+        _number_key(observation.signal_strength),
+        _number_key(observation.signal_dbm),
+        _text_key(observation.network_type),
+        _text_key(observation.authentication),
+        _text_key(observation.encryption),
+        _text_key(observation.radio_type),
+        _number_key(getattr(summary, "ewma", None)),
+        _number_key(getattr(summary, "minimum", None)),
+        _number_key(getattr(summary, "maximum", None)),
+        _number_key(getattr(summary, "median", None)),
+        _number_key(getattr(summary, "jitter", None)),
+        _number_key(_visibility(summary)),
+    )
+
+
+class TableModel:
+    """
+    Модель таблицы сетей, ключ строки — BSSID.
+    Хранит отображаемые значения и вычисляет разницу с новым снимком,
+    чтобы в Treeview изменялись только добавленные, изменённые и исчезнувшие строки.
+    """
+
+    def __init__(self, number_retention=600):
+        self.rows = {}  # BSSID -> кортеж значений строки
+        self.keys = {}  # BSSID -> кортеж ключей сортировки (вычисляются один раз)
+        self.order = []  # Порядок строк в Treeview
+        self.sort_column = SSID_COLUMN  # Колонка текущей сортировки
+        self.sort_descending = False  # Направление сортировки
+        self.needs_sort = False  # Изменились ли данные, влияющие на порядок строк
+        self._numbers = {}  # BSSID -> постоянный номер строки "№"
+        self._next_number = 1
+        # Номер исчезнувшей строки хранится number_retention обновлений,
+        # чтобы вернувшаяся точка доступа получила прежний номер; затем
+        # освобождается (иначе словарь растёт со случайными BSSID)
+        self.number_retention = number_retention
+        self._gone = {}  # BSSID -> номер обновления, в котором строка исчезла
+        self._updates = 0  # Число вызовов diff
+        self._refresh_cursor = 0  # Позиция обхода строк в refresh_batch
+
+    def _number(self, bssid):
+        """Номер строки, присвоенный точке доступа при первом появлении."""
+        number = self._numbers.get(bssid)
+        if number is None:
+            number = self._numbers[bssid] = self._next_number
+            self._next_number += 1
+        return number
+
+    def diff(self, snapshot, stats=None, only=None):
+        """
+        Сравнивает модель со снимком и применяет изменения к модели.
+        stats — сводки статистики по BSSID (необязательно);
+        only — BSSID, затронутые событиями изменений: если задано,
+        проверяются только эти строки, остальные считаются неизменными.
+        Возвращает (добавленные, изменённые, удалённые): списки пар
+        (BSSID, значения) для первых двух и список BSSID для последнего.
+        """
+        stats = stats or {}
+        self._updates += 1
+        if only is None:
+            observations = snapshot
+        else:
+            observations = [snapshot.get(b) for b in only if b in snapshot]
+        added, changed = [], []
+        for observation in observations:
+            bssid = observation.bssid
+            summary = stats.get(bssid)
+            values = row_values(self._number(bssid), observation, summary)
+            previous = self.rows.get(bssid)
+            if previous is None:
+                self._gone.pop(bssid, None)  # Вернулась до истечения срока
+                added.append((bssid, values))
+                self.needs_sort = True
+            elif previous != values:
+                changed.append((bssid, values))
+                if previous[self.sort_column] != values[self.sort_column]:
+                    self.needs_sort = True
+            else:
+                continue
+            self.rows[bssid] = values
+            self.keys[bssid] = row_keys(self._number(bssid), observation, summary)
+
+        candidates = self.rows if only is None else [b for b in only if b in self.rows]
+        removed = [bssid for bssid in candidates if bssid not in snapshot]
+        for bssid in removed:
+            del self.rows[bssid]
+            del self.keys[bssid]
+            self._gone[bssid] = self._updates
+        self._release_numbers()
+        if removed:
+            gone = set(removed)
+            self.order = [bssid for bssid in self.order if bssid not in gone]
+        return added, changed, removed
+
+    def refresh_batch(self, parts):
+        """
+        Очередная 1/parts часть строк модели (обход по кругу): за parts
+        вызовов каждая строка возвращается хотя бы один раз. Так обновляются
+        строки, не затронутые событиями: уровень в пределах гистерезиса
+        и колонки статистики.
+        """
+        rows = list(self.rows)
+        if not rows:
+            return []
+        size = -(-len(rows) // max(1, parts))  # Округление вверх
+        start = self._refresh_cursor % len(rows)
+        batch = rows[start : start + size] + rows[: max(0, start + size - len(rows))]
+        self._refresh_cursor = start + size
+        return batch
+
+    def _release_numbers(self):
+        """Забывает номера строк, отсутствующих дольше number_retention обновлений."""
+        # Словарь упорядочен по времени исчезновения: просроченные — в начале
+        expired = self._updates - self.number_retention
+        while self._gone:
+            bssid, since = next(iter(self._gone.items()))
+            if since > expired:
+                break
+            del self._gone[bssid]
+            self._numbers.pop(bssid, None)
+
+    def set_sort(self, col_idx):
+        """
+        Выбирает колонку сортировки; повторный выбор той же колонки
+        меняет направление сортировки на противоположное.
+        """
+        if col_idx == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = col_idx
+            self.sort_descending = False
+        self.needs_sort = True
+
+    def sort_key(self, bssid):
+        """Ключ сортировки строки по текущей колонке."""
+        return self.keys[bssid][self.sort_column]
+
+    def sorted_order(self):
+        """
+        Порядок строк, соответствующий текущей сортировке.
+        Сортируется текущий порядок строк, поэтому почти упорядоченные данные
+        обрабатываются за линейное время, а равные строки не меняются местами.
+        """
+        placed = set(self.order)
+        rows = self.order + [bssid for bssid in self.rows if bssid not in placed]
+        # Пустые ячейки остаются в конце при любом направлении сортировки
+        present = [bssid for bssid in rows if self.sort_key(bssid) != _MISSING]
+        missing = [bssid for bssid in rows if self.sort_key(bssid) == _MISSING]
+        return (
+            sorted(present, key=self.sort_key, reverse=self.sort_descending)
+            + missing
+        )
+
+    def moves(self, target):
+        """
+        Минимальный набор перемещений (BSSID, позиция), переводящий
+        текущий порядок строк в target. Модель запоминает новый порядок.
+        """
+        # Строки, оставшиеся на своих местах, и новые строки в конце таблицы
+        current = list(self.order)
+        placed = set(current)
+        current += [bssid for bssid in self.rows if bssid not in placed]
+        result = []
+        for idx, bssid in enumerate(target):
+            if current[idx] != bssid:
+                current.remove(bssid)
+                current.insert(idx, bssid)
+                result.append((bssid, idx))
+        self.order = list(target)
+        self.needs_sort = False
+        return result
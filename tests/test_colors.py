@@ -0,0 +1,24 @@
+from colors import PALETTE, ColorRegistry
+
+
+def test_colors_stable_when_palette_exhausted():
+    registry = ColorRegistry()
+    ssids = [f"Network_{i:03d}" for i in range(len(PALETTE) + 20)]
+    first = {ssid: registry.color(ssid, "bars") for ssid in ssids}
+    for _ in range(3):
+        for ssid in ssids:
+            assert registry.color(ssid, "bars") == first[ssid]
+            assert registry.color(ssid, "lines") == first[ssid]
+    # Первые сети палитры получили разные цвета
+    assert len({first[ssid] for ssid in ssids[: len(PALETTE)]}) == len(PALETTE)
+
+
+def test_release_after_all_graphs():
+    registry = ColorRegistry(palette=("red", "green"))
+    registry.color("a", "bars")
+    registry.color("a", "lines")
+    registry.release("a", "bars")
+    assert "a" in registry  # Линия сети ещё на графике
+    registry.release("a", "lines")
+    assert "a" not in registry
+    assert len(registry) == 0
@@ -0,0 +1,104 @@
+import pytest
+from bands import BAND_24, BAND_5, BAND_6, BANDS
+from classifier import classify_networks
+from scan import parse_scan_snapshot, parse_windows_scan_results
+from scanners import generate_netsh_dump
+
+# Вывод netsh Windows 11 с явным диапазоном: каналы 1 и 5 есть и в 6 ГГц
+NETSH_RU = """
+Имя интерфейса : Wi-Fi
+Имеется 2 сетей.
+
+SSID 1 : Home
+    Тип сети                : Инфраструктура
+    Проверка подлинности    : WPA2-Personal
+    Шифрование              : CCMP
+    BSSID 1                 : aa:bb:cc:00:00:01
+         Сигнал             : 80%
+         Тип радио          : 802.11ax
+         Диапазон           : 2,4 ГГц
+         Канал              : 1
+    BSSID 2                 : aa:bb:cc:00:00:02
+         Сигнал             : 60%
+         Тип радио          : 802.11ax
+         Диапазон           : 6 ГГц
+         Канал              : 5
+    BSSID 3                 : aa:bb:cc:00:00:03
+         Сигнал             : 40%
+         Тип радио          : 802.11ac
+         Канал              : 36
+
+SSID 2 : Guest
+    Тип сети                : Инфраструктура
+    Проверка подлинности    : Открытая
+    Шифрование              : Нет
+    BSSID 1                 : aa:bb:cc:00:01:01
+         Сигнал             : 30%
+         Тип радио          : 802.11n
+         Канал              : нет
+""".splitlines()
+
+
+def test_bssids_keep_own_fields():
+    networks = parse_windows_scan_results(NETSH_RU)
+    assert sorted(networks) == ["Guest", "Home"]
+    home = networks["Home"][0]
+    assert home["bssid"] == [f"aa:bb:cc:00:00:0{i}" for i in (1, 2, 3)]
+    channels = [ap["канал"] for ap in home["access_points"]]
+    signals = [ap["signal_strength"] for ap in home["access_points"]]
+    assert channels == ["1", "5", "36"]
+    assert signals == [80, 60, 40]
+    assert home["проверка_подлинности"] == "WPA2-Personal"
+
+
+def test_band_assignment():
+    snapshot = parse_scan_snapshot(NETSH_RU)
+    assert len(snapshot) == 4
+    index = snapshot.band_index
+    assert index.band_of == {
+        "aa:bb:cc:00:00:01": BAND_24,
+        "aa:bb:cc:00:00:02": BAND_6,  # Явный диапазон важнее номера канала
+        "aa:bb:cc:00:00:03": BAND_5,
+    }
+    assert [obs.bssid for obs in index.invalid] == ["aa:bb:cc:00:01:01"]
+    assert index.channels(BAND_6) == [5]
+
+    classified = classify_networks(snapshot)
+    assert set(classified) == set(BANDS)
+    assert [obs["bssid"] for obs in classified[BAND_5]] == ["aa:bb:cc:00:00:03"]
+    assert classified[BAND_6][0]["канал"] == "5"
+
+
+@pytest.mark.parametrize("locale", ["ru", "en"])
+def test_synthetic_dump_locales(locale):
+    lines = generate_netsh_dump(30, locale=locale, seed=7, bssids_per_ssid=3)
+    snapshot = parse_scan_snapshot(lines)
+    assert len(snapshot) == 30
+    assert len(snapshot.ssids()) == 10
+    for ssid in snapshot.ssids():
+        assert len(snapshot.for_ssid(ssid)) == 3
+    for observation in snapshot:
+        assert 5 <= observation.signal_strength <= 99
+        assert observation.signal_dbm is not None
+        assert observation.authentication == "WPA2-Personal"
+        assert observation.channel is not None
+
+    # Обе локализации одного seed дают одинаковые наблюдения
+    other = parse_scan_snapshot(
+        generate_netsh_dump(30, locale="en" if locale == "ru" else "ru", seed=7)
+    )
+    assert [(o.bssid, o.channel, o.signal_dbm) for o in snapshot] == [
+        (o.bssid, o.channel, o.signal_dbm) for o in other
+    ]
+
+
+def test_observation_dict_access():
+    observation = parse_scan_snapshot(NETSH_RU).get("aa:bb:cc:00:00:03")
+    assert observation["ssid"] == "Home"
+    assert observation["signal_strength"] == 40
+    assert observation["канал"] == "36"
+    assert observation["тип_радио"] == "802.11ac"
+    assert observation.get("диапазон") is None
+    assert observation.get("unknown", "-") == "-"
+    with pytest.raises(KeyError):
+        observation["unknown"]
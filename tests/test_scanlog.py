@@ -0,0 +1,51 @@
+import pytest
+from scan import parse_scan_snapshot
+from scanlog import ScanLog, ScanLogWriter
+from scanners import generate_netsh_dump
+
+
+def _scans(count, n_bssids):
+    return [
+        parse_scan_snapshot(
+            generate_netsh_dump(n_bssids, seed=3, scan=scan), timestamp=1000.0 + scan
+        )
+        for scan in range(count)
+    ]
+
+
+def _levels(snapshot):
+    return sorted((o.bssid, o.channel, o.signal_dbm) for o in snapshot)
+
+
+@pytest.mark.parametrize(
+    "count, n_bssids, chunk_records",
+    [(14, 300, 4096), (2, 60, 100), (5, 30, 7), (3, 20, 20), (4, 12, 1)],
+)
+def test_round_trip(tmp_path, count, n_bssids, chunk_records):
+    path = tmp_path / "scan_history.scanlog"
+    scans = _scans(count, n_bssids)
+    writer = ScanLogWriter(str(path), chunk_records=chunk_records)
+    for snapshot in scans:
+        writer.append(snapshot)
+    writer.close()
+
+    with ScanLog(str(path)) as log:
+        assert len(log) == count * n_bssids
+        latest = log.latest_snapshot()
+        assert latest.timestamp == scans[-1].timestamp
+        assert _levels(latest) == _levels(scans[-1])
+
+        last = scans[-1].timestamp
+        assert len(log.read(last, last)) == n_bssids
+        restored = list(log.snapshots())
+        assert [s.timestamp for s in restored] == [s.timestamp for s in scans]
+        for got, expected in zip(restored, scans):
+            assert _levels(got) == _levels(expected)
+
+
+def test_empty_log(tmp_path):
+    path = tmp_path / "empty.scanlog"
+    ScanLogWriter(str(path)).close()
+    with ScanLog(str(path)) as log:
+        assert log.latest_snapshot() is None
+        assert list(log.snapshots()) == []
@@ -0,0 +1,39 @@
+from interface import WifiAnalyzerInterface
+from scan import parse_scan_snapshot
+from scanners import ReplayScanner, generate_netsh_dump
+
+
+class Window:
+    """Состояние анализа окна без создания окна Tk."""
+
+    publish_snapshot = WifiAnalyzerInterface.publish_snapshot
+    analyze = WifiAnalyzerInterface.analyze
+    reset_analysis = WifiAnalyzerInterface.reset_analysis
+
+    def __init__(self):
+        WifiAnalyzerInterface.init_state(
+            self, history_path=None, scanners=[ReplayScanner([])], rssi_profiles=None
+        )
+
+
+def _snapshot(scan):
+    lines = generate_netsh_dump(12, seed=9, scan=scan)
+    return parse_scan_snapshot(lines, timestamp=1000.0 + scan)
+
+
+def test_late_snapshot_of_old_session_is_dropped():
+    window = Window()
+    session = window.session
+    window.publish_snapshot(_snapshot(0), session)
+    assert window.results.latest() is not None
+    assert len(window.stats) == 12 and window.grouper is not None
+
+    # Переход к воспроизведению: поток сканирования прежнего запуска
+    # публикует снимок уже после сброса состояния
+    window.reset_analysis()
+    window.publish_snapshot(_snapshot(1), session)
+    assert window.results.latest() is None
+    assert len(window.stats) == 0 and window.grouper is None
+
+    window.publish_snapshot(_snapshot(2), window.session)
+    assert window.results.latest().timestamp == 1002.0
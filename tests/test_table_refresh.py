@@ -0,0 +1,98 @@
+import pytest
+from interface import WifiAnalyzerInterface
+from scan import parse_scan_snapshot
+from scanners import ReplayScanner, generate_netsh_dump
+from stats import SignalStats
+from table_model import row_values
+
+
+class MemoryTree:
+    """Treeview в памяти: значения строк по iid."""
+
+    def __init__(self):
+        self.values = {}
+
+    def insert(self, parent, index, iid, values):
+        self.values[iid] = values
+
+    def item(self, iid, values):
+        self.values[iid] = values
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.values[iid]
+
+    def move(self, iid, parent, index):
+        pass
+
+
+class Window:
+    """Методы окна, отвечающие за таблицу, без создания окна Tk."""
+
+    apply_snapshot = WifiAnalyzerInterface.apply_snapshot
+    populate_table = WifiAnalyzerInterface.populate_table
+    filtered_data = WifiAnalyzerInterface.filtered_data
+    apply_table_order = WifiAnalyzerInterface.apply_table_order
+    report_events = WifiAnalyzerInterface.report_events
+    report_roaming = WifiAnalyzerInterface.report_roaming
+
+    def __init__(self, full_refresh):
+        WifiAnalyzerInterface.init_state(
+            self,
+            history_path=None,
+            scanners=[ReplayScanner([])],
+            rssi_profiles=None,
+            full_refresh=full_refresh,
+        )
+        self.tree = MemoryTree()
+        self.update_signal_level = lambda data: None
+        self.update_temporal = lambda data, now=None: None
+
+
+def _scans(count, n_bssids=45):
+    stats = SignalStats()
+    snapshots = []
+    for scan in range(count):
+        snapshot = parse_scan_snapshot(
+            generate_netsh_dump(n_bssids, seed=5, scan=scan), timestamp=1000.0 + scan
+        )
+        snapshot.stats = stats.update(snapshot)
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def _stale_rows(window, snapshot):
+    """BSSID строк, значения которых не совпадают со снимком."""
+    numbers = window.table._numbers
+    return [
+        o.bssid
+        for o in snapshot
+        if window.tree.values.get(o.bssid)
+        != row_values(numbers[o.bssid], o, snapshot.stats.get(o.bssid))
+    ]
+
+
+@pytest.mark.parametrize("full_refresh", [0, 1, None])
+def test_refresh_every_scan(full_refresh):
+    window = Window(full_refresh)
+    for snapshot in _scans(4):
+        window.apply_snapshot(snapshot)
+        assert _stale_rows(window, snapshot) == []
+
+
+def test_rows_without_events_catch_up():
+    full_refresh = 4
+    window = Window(full_refresh)
+    first, *rest = _scans(6)
+    window.apply_snapshot(first)
+    assert _stale_rows(window, first) == []
+
+    # Уровни меняются меньше порога гистерезиса, статистика — на каждом
+    # сканировании: без событий строки обновляются по кругу
+    for snapshot in rest:
+        window.apply_snapshot(snapshot)
+    last = rest[-1]
+    assert _stale_rows(window, last)  # Часть строк ещё не обновлена
+    for _ in range(full_refresh):
+        window.apply_snapshot(last)
+    assert _stale_rows(window, last) == []
@@ -0,0 +1,318 @@
+import math
+import numpy as np
+
+
+class SignalSeries:
+    """
+    Временной ряд уровня сигнала одного SSID с ограниченным объёмом памяти.
+    Свежие отсчёты хранятся полностью в кольцевом буфере, более старые
+    сворачиваются в интервалы (минимум/максимум/среднее на интервал).
+    """
+
+    def __init__(self, raw_capacity, bucket_capacity, bucket_seconds):
+        self.bucket_seconds = bucket_seconds  # Длительность интервала свёртки (с)
+
+        # Кольцевой буфер исходных отсчётов: время (epoch, с) и уровень (dBm)
+        self._t = np.empty(raw_capacity, dtype=np.float64)
+        self._v = np.empty(raw_capacity, dtype=np.float32)
+        self._head = 0  # Индекс самого старого отсчёта
+        self._size = 0  # Количество отсчётов в буфере
+
+        # Кольцевой буфер свёрнутых интервалов
+        self._bt = np.empty(bucket_capacity, dtype=np.float64)  # Начало интервала
+        self._bmin = np.empty(bucket_capacity, dtype=np.float32)
+        self._bmax = np.empty(bucket_capacity, dtype=np.float32)
+        self._bmean = np.empty(bucket_capacity, dtype=np.float32)
+        self._bhead = 0
+        self._bsize = 0
+
+        # Незавершённый интервал, в который сейчас сворачиваются отсчёты
+        self._pending = None  # [начало, минимум, максимум, сумма, количество]
+
+    def __len__(self):
+        return self._size + self._bsize + (self._pending is not None)
+
+    @property
+    def last_time(self):
+        """Время последнего отсчёта (None, если ряд пуст)."""
+        if self._size:
+            return float(self._t[(self._head + self._size - 1) % len(self._t)])
+        if self._pending is not None:
+            return self._pending[0] + self.bucket_seconds
+        if self._bsize:
+            last = (self._bhead + self._bsize - 1) % len(self._bt)
+            return float(self._bt[last]) + self.bucket_seconds
+        return None
+
+    def append(self, timestamp, value):
+        """Добавляет отсчёт; при переполнении старейший отсчёт сворачивается."""
+        capacity = len(self._t)
+        if self._size == capacity:
+            self._roll_oldest()
+        idx = (self._head + self._size) % capacity
+        self._t[idx] = timestamp
+        self._v[idx] = np.nan if value is None else value
+        self._size += 1
+
+    def load(self, times, values, buckets=None):
+        """
+        Загружает в пустой ряд массив отсчётов (например, из журнала сканирований).
+        Последние отсчёты попадают в буфер исходных значений, более ранние
+        сворачиваются в интервалы векторно, без поштучного добавления.
+        buckets — уже свёрнутые интервалы, предшествующие первому отсчёту:
+        (начало, минимум, максимум, среднее).
+        """
+        if len(self):
+            raise ValueError("Загрузка возможна только в пустой ряд")
+        times = np.asarray(times, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float32)
+        raw = min(len(times), len(self._t))
+        split = len(times) - raw
+
+        # Исходные отсчёты: начало кольцевого буфера
+        self._t[:raw] = times[split:]
+        self._v[:raw] = values[split:]
+        self._head, self._size = 0, raw
+
+        starts = low = high = mean = np.empty(0)
+        if split:
+            # Более ранние отсчёты: минимум/максимум/сумма/количество по интервалам
+            old_t, old_v = times[:split], values[:split]
+            starts = np.floor(old_t / self.bucket_seconds) * self.bucket_seconds
+            edges = np.flatnonzero(np.diff(starts)) + 1
+            bounds = np.concatenate(([0], edges))
+            valid = ~np.isnan(old_v)
+            low = np.fmin.reduceat(np.where(valid, old_v, np.inf), bounds)
+            high = np.fmax.reduceat(np.where(valid, old_v, -np.inf), bounds)
+            total = np.add.reduceat(
+                np.where(valid, old_v, 0.0).astype(np.float64), bounds
+            )
+            count = np.add.reduceat(valid.astype(np.int64), bounds)
+            starts = starts[bounds]
+
+            # Последний интервал остаётся незавершённым: в него продолжат
+            # сворачиваться отсчёты из буфера исходных значений
+            self._pending = [
+                float(starts[-1]),
+                float(low[-1]),
+                float(high[-1]),
+                float(total[-1]),
+                int(count[-1]),
+            ]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = total[:-1] / count[:-1]
+            empty = count[:-1] == 0
+            starts = starts[:-1]
+            low = np.where(empty, np.nan, low[:-1])
+            high = np.where(empty, np.nan, high[:-1])
+            mean = np.where(empty, np.nan, mean)
+
+        if buckets is not None:
+            # Готовые интервалы (например, предвычисленные по записи обследования)
+            starts, low, high, mean = (
+                np.concatenate((np.asarray(before, dtype=np.float64), after))
+                for before, after in zip(buckets, (starts, low, high, mean))
+            )
+
+        # В буфер интервалов попадают самые поздние интервалы
+        n = min(len(starts), len(self._bt))
+        keep = slice(len(starts) - n, len(starts))
+        self._bt[:n] = starts[keep]
+        self._bmin[:n] = low[keep]
+        self._bmax[:n] = high[keep]
+        self._bmean[:n] = mean[keep]
+        self._bhead, self._bsize = 0, n
+
+    def evict(self, raw_cutoff, retention_cutoff):
+        """
+        Сворачивает исходные отсчёты старше raw_cutoff и удаляет интервалы
+        старше retention_cutoff.
+        """
+        while self._size and self._t[self._head] < raw_cutoff:
+            self._roll_oldest()
+
+        if self._pending is not None and self._pending[0] + self.bucket_seconds <= (
+            retention_cutoff
+        ):
+            self._pending = None
+        while self._bsize and self._bt[self._bhead] + self.bucket_seconds <= (
+            retention_cutoff
+        ):
+            self._bhead = (self._bhead + 1) % len(self._bt)
+            self._bsize -= 1
+
+    def _roll_oldest(self):
+        """Переносит самый старый исходный отсчёт в свёрнутые интервалы."""
+        timestamp = float(self._t[self._head])
+        value = float(self._v[self._head])
+        self._head = (self._head + 1) % len(self._t)
+        self._size -= 1
+
+        start = math.floor(timestamp / self.bucket_seconds) * self.bucket_seconds
+        pending = self._pending
+        if pending is not None and pending[0] != start:
+            self._flush_pending()
+            pending = None
+        if pending is None:
+            pending = self._pending = [start, math.inf, -math.inf, 0.0, 0]
+        if not math.isnan(value):
+            pending[1] = min(pending[1], value)
+            pending[2] = max(pending[2], value)
+            pending[3] += value
+            pending[4] += 1
+
+    def _flush_pending(self):
+        """Записывает завершённый интервал в кольцевой буфер интервалов."""
+        start, low, high, total, count = self._pending
+        self._pending = None
+        capacity = len(self._bt)
+        if self._bsize == capacity:
+            # Буфер интервалов заполнен: вытесняем самый старый
+            self._bhead = (self._bhead + 1) % capacity
+            self._bsize -= 1
+        idx = (self._bhead + self._bsize) % capacity
+        self._bt[idx] = start
+        if count:
+            self._bmin[idx], self._bmax[idx] = low, high
+            self._bmean[idx] = total / count
+        else:
+            self._bmin[idx] = self._bmax[idx] = self._bmean[idx] = np.nan
+        self._bsize += 1
+
+    @staticmethod
+    def _ordered(array, head, size):
+        """Содержимое кольцевого буфера в хронологическом порядке."""
+        end = head + size
+        if end <= len(array):
+            return array[head:end].copy()
+        return np.concatenate((array[head:], array[: end - len(array)]))
+
+    def raw_view(self):
+        """Исходные отсчёты: (время, уровень dBm)."""
+        return (
+            self._ordered(self._t, self._head, self._size),
+            self._ordered(self._v, self._head, self._size),
+        )
+
+    def bucket_view(self):
+        """
+        Свёрнутые интервалы: (середина интервала, минимум, максимум, среднее).
+        Включает незавершённый интервал.
+        """
+        t = self._ordered(self._bt, self._bhead, self._bsize)
+        low = self._ordered(self._bmin, self._bhead, self._bsize)
+        high = self._ordered(self._bmax, self._bhead, self._bsize)
+        mean = self._ordered(self._bmean, self._bhead, self._bsize)
+        if self._pending is not None:
+            start, p_low, p_high, total, count = self._pending
+            p_mean = total / count if count else np.nan
+            if not count:
+                p_low = p_high = np.nan
+            t = np.append(t, start)
+            low = np.append(low, np.float32(p_low))
+            high = np.append(high, np.float32(p_high))
+            mean = np.append(mean, np.float32(p_mean))
+        return t + self.bucket_seconds / 2, low, high, mean
+
+    def view(self):
+        """
+        Полный ряд для отрисовки: средние значения свёрнутых интервалов,
+        за которыми следуют исходные отсчёты (время не убывает).
+        Размер ограничен ёмкостью буферов.
+        """
+        bucket_t, _, _, bucket_mean = self.bucket_view()
+        raw_t, raw_v = self.raw_view()
+        if not len(bucket_t):
+            return raw_t, raw_v
+        if len(raw_t):
+            # Середина незавершённого интервала может оказаться позже первых
+            # исходных отсчётов: время ряда должно возрастать
+            bucket_t = np.minimum(bucket_t, raw_t[0])
+        return np.concatenate((bucket_t, raw_t)), np.concatenate((bucket_mean, raw_v))
+
+
+class TimeSeriesStore:
+    """
+    Хранилище временных рядов уровня сигнала с ограниченным окном хранения.
+    Память под каждый ряд выделяется заранее и не растёт со временем.
+    """
+
+    def __init__(
+        self,
+        retention=24 * 3600,  # Общее окно хранения (с)
+        raw_window=15 * 60,  # Окно хранения исходных отсчётов (с)
+        bucket_seconds=60,  # Длительность интервала свёртки (с)
+        sample_period=1.0,  # Ожидаемый период сканирования (с)
+    ):
+        if raw_window > retention:
+            raise ValueError("Окно исходных отсчётов больше окна хранения")
+        self.retention = retention
+        self.raw_window = raw_window
+        self.bucket_seconds = bucket_seconds
+        self.raw_capacity = int(math.ceil(raw_window / sample_period)) + 1
+        self.bucket_capacity = int(math.ceil(retention / bucket_seconds)) + 1
+        self._series = {}  # Ключ (SSID) -> SignalSeries
+        self.last_time = None  # Время последнего добавленного отсчёта (epoch, с)
+
+    def __len__(self):
+        return len(self._series)
+
+    def __contains__(self, key):
+        return key in self._series
+
+    def __getitem__(self, key):
+        return self._series[key]
+
+    def items(self):
+        return self._series.items()
+
+    def keys(self):
+        return self._series.keys()
+
+    def clear(self):
+        """Удаляет все ряды (например, перед загрузкой другого участка записи)."""
+        self._series.clear()
+        self.last_time = None
+
+    def _touch(self, timestamp):
+        if self.last_time is None or timestamp > self.last_time:
+            self.last_time = timestamp
+
+    def append(self, key, timestamp, value):
+        """Добавляет отсчёт в ряд key, создавая ряд при первом появлении."""
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = SignalSeries(
+                self.raw_capacity, self.bucket_capacity, self.bucket_seconds
+            )
+        series.append(timestamp, value)
+        self._touch(timestamp)
+
+    def load(self, key, times, values, buckets=None):
+        """
+        Заполняет новый ряд key массивами времени и уровней (по возрастанию
+        времени); buckets — предшествующие им свёрнутые интервалы.
+        """
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = SignalSeries(
+                self.raw_capacity, self.bucket_capacity, self.bucket_seconds
+            )
+        series.load(times, values, buckets)
+        if series.last_time is not None:
+            self._touch(series.last_time)
+
+    def append_many(self, timestamp, values):
+        """Добавляет отсчёты одного сканирования: словарь ключ -> уровень dBm."""
+        for key, value in values.items():
+            self.append(key, timestamp, value)
+
+    def evict(self, now):
+        """Применяет окна хранения и удаляет ряды, не обновлявшиеся дольше retention."""
+        raw_cutoff = now - self.raw_window
+        retention_cutoff = now - self.retention
+        for key in list(self._series):
+            series = self._series[key]
+            series.evict(raw_cutoff, retention_cutoff)
+            if not len(series):
+                del self._series[key]
@@ -0,0 +1,254 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from functools import wraps
+
+# Сводка по участку кода за скользящее окно (длительности в миллисекундах)
+SpanSummary = namedtuple(
+    "SpanSummary", ("count", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "last_ms")
+)
+
+# Гистограмма длительностей: логарифмические интервалы по четверти октавы
+# (точность около 19 %) от 1 нс до ~10 минут
+BINS_PER_OCTAVE = 4
+HIST_BINS = 40 * BINS_PER_OCTAVE
+
+
+def _bin(duration_ns):
+    """Номер интервала гистограммы для длительности (нс)."""
+    if duration_ns < 1:
+        return 0
+    return min(HIST_BINS - 1, int(math.log2(duration_ns) * BINS_PER_OCTAVE))
+
+
+def _bin_ms(idx):
+    """Середина интервала гистограммы (мс, среднее геометрическое границ)."""
+    return 2 ** ((idx + 0.5) / BINS_PER_OCTAVE) / 1e6
+
+
+class RollingHistogram:
+    """
+    Распределение длительностей последних window замеров участка кода.
+    Добавление замера — O(1); перцентили вычисляются по интервалам
+    гистограммы только при отображении.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.samples = deque()  # (интервал, длительность нс) в порядке поступления
+        self.counts = [0] * HIST_BINS
+        self.total_ns = 0  # Сумма длительностей окна
+        self.last_ns = 0  # Последняя длительность
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, duration_ns):
+        idx = _bin(duration_ns)
+        self.samples.append((idx, duration_ns))
+        self.counts[idx] += 1
+        self.total_ns += duration_ns
+        self.last_ns = duration_ns
+        if len(self.samples) > self.window:
+            old_idx, old_ns = self.samples.popleft()
+            self.counts[old_idx] -= 1
+            self.total_ns -= old_ns
+
+    def percentiles(self, *qs):
+        """Перцентили qs (0..100, по возрастанию) в миллисекундах."""
+        count = len(self.samples)
+        if not count:
+            return [None] * len(qs)
+        ranks = [max(1, math.ceil(q / 100 * count)) for q in qs]
+        result = []
+        total = 0
+        for idx, hits in enumerate(self.counts):
+            if not hits:
+                continue
+            total += hits
+            while len(result) < len(ranks) and total >= ranks[len(result)]:
+                result.append(_bin_ms(idx))
+            if len(result) == len(ranks):
+                break
+        return result
+
+    def summary(self):
+        count = len(self.samples)
+        p50, p90, p99 = self.percentiles(50, 90, 99)
+        return SpanSummary(
+            count=count,
+            mean_ms=self.total_ns / count / 1e6 if count else None,
+            p50_ms=p50,
+            p90_ms=p90,
+            p99_ms=p99,
+            last_ms=self.last_ns / 1e6 if count else None,
+        )
+
+
+class _NullSpan:
+    """Участок без замера (трассировка выключена)."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class Tracer:
+    """
+    Замер времени участков кода (спанов). Выключенный трассировщик
+    сводится к проверке одного флага. Включённый собирает скользящие
+    гистограммы по именам участков и последние trace_events событий
+    для выгрузки в формате Chrome Trace (chrome://tracing, Perfetto).
+    Может вызываться из любых потоков.
+    """
+
+    def __init__(self, window=1000, trace_events=100_000):
+        self.enabled = False
+        self.window = window  # Замеров в скользящей гистограмме
+        self.histograms = {}  # Имя участка -> RollingHistogram
+        self.events = deque(maxlen=trace_events)  # (имя, начало нс, длит. нс, поток)
+        self._origin = time.perf_counter_ns()  # Начало отсчёта времени трассы
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """Удаляет накопленные замеры и события."""
+        with self._lock:
+            self.histograms = {}
+            self.events.clear()
+            self._origin = time.perf_counter_ns()
+
+    def span(self, name):
+        """Контекстный менеджер замера участка name."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, start_ns, end_ns):
+        """Учитывает замер участка name (время perf_counter_ns)."""
+        duration = end_ns - start_ns
+        thread = threading.get_ident()
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = RollingHistogram(self.window)
+            histogram.add(duration)
+            self.events.append((name, start_ns, duration, thread))
+
+    def summary(self):
+        """Сводки по участкам: имя -> SpanSummary."""
+        with self._lock:
+            return {name: h.summary() for name, h in self.histograms.items()}
+
+    def chrome_trace(self):
+        """События в формате Chrome Trace Event (словарь для JSON)."""
+        with self._lock:
+            events = list(self.events)
+            origin = self._origin
+        pid = os.getpid()
+        threads = {}  # Идентификатор потока -> короткий номер
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        trace = []
+        for name, start, duration, thread in events:
+            tid = threads.setdefault(thread, len(threads) + 1)
+            trace.append(
+                {
+                    "name": name,
+                    "cat": "wifi",
+                    "ph": "X",  # Завершённое событие с длительностью
+                    "ts": (start - origin) / 1000,  # Микросекунды
+                    "dur": duration / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                }
+            )
+        for thread, tid in threads.items():
+            trace.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": names.get(thread, f"thread-{tid}")},
+                }
+            )
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        """Сохраняет трассу в файл JSON для chrome://tracing или Perfetto."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.chrome_trace(), file)
+
+
+TRACER = Tracer()  # Общий трассировщик приложения (по умолчанию выключен)
+
+
+def span(name):
+    """Замер участка общим трассировщиком: with span("parse"): ..."""
+    return TRACER.span(name)
+
+
+def traced(name=None, tracer=TRACER):
+    """
+    Декоратор замера функции. При выключенном трассировщике добавляет
+    только проверку флага.
+    """
+
+    def decorate(func):
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.record(label, start, time.perf_counter_ns())
+
+        return wrapper
+
+    return decorate
+
+
+def format_summary(summaries, names=None):
+    """Строка состояния: "имя p50/p99 мс" для каждого участка."""
+    parts = []
+    for name in names or sorted(summaries):
+        summary = summaries.get(name)
+        if summary is None or not summary.count:
+            continue
+        parts.append(f"{name} {summary.p50_ms:.1f}/{summary.p99_ms:.1f}")
+    return " · ".join(parts) + (" мс (p50/p99)" if parts else "")